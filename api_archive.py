@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Record/replay of API-FOOTBALL traffic, one gzip JSONL archive per date and job.
+
+    API_ARCHIVE=record  python focus_bets.py 2024-04-01   -> archive/2024-04-01/feed.jsonl.gz
+    API_ARCHIVE=replay  python focus_bets.py 2024-04-01   (no network, no API key needed)
+
+Each line is {"k": "<path>?<sorted params>", "r": <payload>}. Replay serves the
+responses for a key in recorded order and repeats the last one once exhausted.
+"""
+from __future__ import annotations
+import os, json, gzip, time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+from urllib.parse import urlencode
+
+MODE = os.getenv("API_ARCHIVE", "").strip().lower()   # "" | "record" | "replay"
+ARCHIVE_DIR = Path(os.getenv("API_ARCHIVE_DIR", "archive"))
+
+
+def request_key(path: str, params: Dict[str, Any]) -> str:
+    p = "/" + path.lstrip("/")
+    return f"{p}?{urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))}"
+
+
+def archive_path(date_str: str, job: str) -> Path:
+    return ARCHIVE_DIR / date_str / f"{job}.jsonl.gz"
+
+
+def read_archive(path: Path) -> Dict[str, List[Any]]:
+    out: Dict[str, List[Any]] = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                out.setdefault(row["k"], []).append(row["r"])
+    return out
+
+
+class ApiArchive:
+    def __init__(self, path: Path, mode: str, data: Optional[Dict[str, List[Any]]] = None):
+        self.path = path
+        self.mode = mode
+        self._fh = None
+        self._data: Dict[str, List[Any]] = {}
+        self._pos: Dict[str, int] = {}
+        if mode == "record":
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = gzip.open(path, "wt", encoding="utf-8")
+        elif mode == "replay":
+            if data is not None:
+                self._data = data   # already parsed by the caller; lookups never modify it
+                return
+            if not path.exists():
+                raise SystemExit(f"Missing API archive for replay: {path}")
+            self._data = read_archive(path)
+
+    def record(self, path: str, params: Dict[str, Any], payload: Any) -> None:
+        if self._fh is None:
+            return
+        self._fh.write(json.dumps({"k": request_key(path, params), "r": payload}, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def lookup(self, path: str, params: Dict[str, Any]) -> Any:
+        key = request_key(path, params)
+        seq = self._data.get(key)
+        if not seq:
+            raise KeyError(key)
+        i = self._pos.get(key, 0)
+        self._pos[key] = i + 1
+        return seq[min(i, len(seq) - 1)]
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+_ACTIVE: Optional[ApiArchive] = None
+
+
+def open_for(date_str: str, job: str) -> Optional[ApiArchive]:
+    global _ACTIVE
+    close()
+    if MODE in ("record", "replay"):
+        _ACTIVE = ApiArchive(archive_path(date_str, job), MODE)
+    return _ACTIVE
+
+
+def active() -> Optional[ApiArchive]:
+    return _ACTIVE
+
+
+def now() -> float:
+    """Wall clock of the run; recorded with the traffic so a replay sees the same "now"."""
+    arc = _ACTIVE
+    if arc is not None and arc.mode == "replay":
+        try:
+            return float(arc.lookup("/@clock", {}))
+        except KeyError:
+            pass
+    ts = time.time()
+    if arc is not None:
+        arc.record("/@clock", {}, ts)
+    return ts
+
+
+@contextmanager
+def replay(date_str: str, job: str, data: Optional[Dict[str, List[Any]]] = None):
+    """Serve one archive for the duration of the block, whatever API_ARCHIVE says (backtests).
+
+    `data` is the archive as read_archive returned it, so a caller replaying one
+    day many times parses it once.
+    """
+    global _ACTIVE
+    prev = _ACTIVE
+    _ACTIVE = ApiArchive(archive_path(date_str, job), "replay", data)
+    try:
+        yield _ACTIVE
+    finally:
+        _ACTIVE = prev
+
+
+def replaying() -> bool:
+    return MODE == "replay"
+
+
+def close() -> None:
+    global _ACTIVE
+    if _ACTIVE is not None:
+        _ACTIVE.close()
+        _ACTIVE = None
@@ -9,44 +9,32 @@ import {
   ImageBackground,
   TouchableOpacity
 } from "react-native";
+import { useFeed } from "../lib/feedCache";
 
 const emoji = { win: "✅", lose: "❌", pending: "⏳", none: "" };
 
 export default function TicketScreen({ route, navigation }) {
   const { title, url } = route.params;
-  const [data, setData] = useState(null);        // tiket
-  const [evalData, setEvalData] = useState(null); // evaluacija
-  const [err, setErr] = useState("");
-  const [refreshing, setRefreshing] = useState(false);
-
   const evalUrlFrom = (u) => u.replace(/\/([^/]+)\.json$/, "/eval_$1.json");
 
-  const load = useCallback(async () => {
-    try {
-      setErr("");
-      const [r1, r2] = await Promise.all([
-        fetch(url, { cache: "no-store" }),
-        fetch(evalUrlFrom(url), { cache: "no-store" }).catch(() => null)
-      ]);
-      if (!r1?.ok) throw new Error(`HTTP ${r1?.status || "?"} feed`);
-      const j1 = await r1.json();
-
-      let j2 = null;
-      if (r2 && r2.ok) j2 = await r2.json(); // eval može još da ne postoji tokom dana
-
-      setData(j1);
-      setEvalData(j2);
-      // naslov + ukupni status
-      const head = j2?.ticket_result ? ` (${j2.ticket_result.toUpperCase()})` : "";
-      navigation.setOptions({ title: `${title}${head}` });
-    } catch (e) {
-      setErr(String(e.message || e));
-    }
-  }, [url, title]);
-
-  useEffect(() => { navigation.setOptions({ title }); load(); }, [title]);
+  const feed = useFeed(url);                 // tiket
+  const evaluation = useFeed(evalUrlFrom(url)); // evaluacija (može još da ne postoji tokom dana)
+  const data = feed.data;
+  const evalData = evaluation.data;
+  const err = feed.error || (feed.missing ? "HTTP 404 feed" : "");
+  const [refreshing, setRefreshing] = useState(false);
 
-  const onRefresh = useCallback(async () => { setRefreshing(true); await load(); setRefreshing(false); }, [load]);
+  useEffect(() => {
+    // naslov + ukupni status
+    const head = evalData?.ticket_result ? ` (${evalData.ticket_result.toUpperCase()})` : "";
+    navigation.setOptions({ title: `${title}${head}` });
+  }, [title, evalData?.ticket_result]);
+
+  const onRefresh = useCallback(async () => {
+    setRefreshing(true);
+    await Promise.all([feed.refresh(), evaluation.refresh()]);
+    setRefreshing(false);
+  }, [feed.refresh, evaluation.refresh]);
 
   // pomoćna mapa: fixture_id -> result object
   const resultById = (() => {
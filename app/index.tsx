@@ -2,6 +2,7 @@ import React, { useCallback, useEffect, useState } from "react";
 import { View, Text, TouchableOpacity, StyleSheet, ScrollView, RefreshControl, ImageBackground, Linking } from "react-native";
 import { useRouter } from "expo-router";
 import TopMenu from "../components/TopMenu";
+import { revalidate, useFeed } from "../lib/feedCache";
 
 const FEED = "https://darkotosic.github.io/focus-bets-feed";
 const BG = require("../assets/splash.jpg");
@@ -11,31 +12,32 @@ type Stat = { "2plus": boolean | null; "3plus": boolean | null; "4plus": boolean
 export default function Home() {
   const r = useRouter();
   const [refreshing, setRefreshing] = useState(false);
-  const [stat, setStat] = useState<Stat>({ "2plus": null, "3plus": null, "4plus": null, date: "" });
+  // daily_log.json lists every published ticket: one small conditional request instead of three full files
+  const log = useFeed(`${FEED}/daily_log.json`);
 
-  const probe = async (slug: string) => {
-    try {
-      const res = await fetch(`${FEED}/${slug}.json`, { cache: "no-store" });
-      if (!res.ok) throw new Error(String(res.status));
-      const j = await res.json();
-      return { ok: true, date: j?.date || "" };
-    } catch {
-      return { ok: false, date: "" };
-    }
+  const published = (slug: string): boolean | null => {
+    if (log.data) return (log.data.tickets || []).some((t: { name?: string }) => t?.name === slug);
+    return log.error || log.missing ? false : null;
+  };
+  const stat: Stat = {
+    "2plus": published("2plus"),
+    "3plus": published("3plus"),
+    "4plus": published("4plus"),
+    date: log.data?.date || "",
   };
 
-  const load = useCallback(async () => {
-    const [a, b, c] = await Promise.all([probe("2plus"), probe("3plus"), probe("4plus")]);
-    setStat({ "2plus": a.ok, "3plus": b.ok, "4plus": c.ok, date: a.date || b.date || c.date || "" });
-  }, []);
-
-  useEffect(() => { load(); }, [load]);
+  useEffect(() => {
+    // warm the ticket files in the background; unchanged ones come back as 304
+    for (const t of log.data?.tickets || []) {
+      if (t?.name) revalidate(`${FEED}/${t.name}.json`).catch(() => {});
+    }
+  }, [log.data]);
 
   const onRefresh = useCallback(async () => {
     setRefreshing(true);
-    await load();
+    await log.refresh();
     setRefreshing(false);
-  }, [load]);
+  }, [log.refresh]);
 
   const Dot = ({ ok }: { ok: boolean | null }) => (
     <View style={[s.dot, ok === true ? s.ok : ok === false ? s.bad : s.na]} />
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Backtest ticket-building configs against archived days (see api_archive.py).
+
+    python backtest.py --grid grid.json --from 2024-01-01 --to 2024-12-31 --workers 8
+
+grid.json is either a list of configs or a dict of lists (cartesian product) over
+th_add (added to every BASE_TH cap), MAX_PER_COUNTRY, MAX_HEAVY_FAVORITES, LEGS_MIN
+and LEGS_MAX. Each day is parsed once per worker and reused for every config. Tickets
+come from the production selector (prefilter, consensus, relax loop) replaying the
+day's archive; legs are scored with evaluate_results.leg_hit and each ticket stakes
+1 unit.
+"""
+from __future__ import annotations
+import os, json, argparse, itertools
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple, Optional
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import api_archive
+import focus_bets as fb
+import evaluate_results as ev
+
+KNOBS = ("th_add", "MAX_PER_COUNTRY", "MAX_HEAVY_FAVORITES", "LEGS_MIN", "LEGS_MAX")
+DEFAULTS = {
+    "th_add": 0.0,
+    "MAX_PER_COUNTRY": fb.MAX_PER_COUNTRY,
+    "MAX_HEAVY_FAVORITES": fb.MAX_HEAVY_FAVORITES,
+    "LEGS_MIN": fb.LEGS_MIN,
+    "LEGS_MAX": fb.LEGS_MAX,
+}
+FINAL = ev.SETTLED_STATUSES
+BACKTEST_NODE_BUDGET = int(os.getenv("BACKTEST_NODE_BUDGET", "5000"))
+
+
+def expand_grid(grid: Any) -> List[Dict[str, Any]]:
+    if isinstance(grid, list):
+        return [{**DEFAULTS, **g} for g in grid]
+    keys = [k for k in KNOBS if k in grid]
+    return [{**DEFAULTS, **dict(zip(keys, combo))} for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def _split_key(key: str) -> Tuple[str, Dict[str, str]]:
+    path, _, query = key.partition("?")
+    return path, dict(parse_qsl(query))
+
+
+class Day:
+    """One archived date: focus_bets caches as the morning run filled them, final results, memoized tickets."""
+
+    def __init__(self, date_str: str):
+        self.date = date_str
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.memo: Dict[Any, List[Optional[List[Dict[str, Any]]]]] = {}
+        feed_p = api_archive.archive_path(date_str, "feed")
+        eval_p = api_archive.archive_path(date_str, "eval")
+        # parsed once: every replay of this day (one per config) serves from this dict
+        self.feed = api_archive.read_archive(feed_p) if feed_p.exists() else {}
+        evals = api_archive.read_archive(eval_p) if eval_p.exists() else {}
+
+        fixtures: List[Dict[str, Any]] = []
+        with_odds = set()
+        for key, payloads in self.feed.items():
+            path, params = _split_key(key)
+            if path == "/fixtures" and "date" in params:
+                fixtures = payloads[0].get("response") or []
+            elif path == "/odds" and "fixture" in params:
+                with_odds.add(int(params["fixture"]))
+        for key, payloads in evals.items():
+            path, params = _split_key(key)
+            if path == "/fixtures" and "id" in params:
+                items = payloads[-1].get("response") or []
+                if items:
+                    self.results[int(params["id"])] = ev.result_from_fixture(items[0])
+        for f in fixtures:
+            if (f.get("fixture", {}).get("status") or {}).get("short", "") in FINAL:
+                self.results.setdefault(int(f["fixture"]["id"]), ev.result_from_fixture(f))
+
+        # fixtures the morning run never priced stay out, so replays cannot miss the archive
+        self.fixtures = [f for f in fixtures if int(f["fixture"]["id"]) in with_odds]
+        self.caches: Tuple[Dict[int, Any], ...] = ({}, {}, {})
+        if feed_p.exists():
+            with api_archive.replay(date_str, "feed", self.feed):
+                self.install()
+                usable = fb.fetch_all_fixtures_no_filter(date_str)
+                fb.prefetch_odds(usable)
+                for f in usable:
+                    fb.fixture_best_odds(int(f["fixture"]["id"]))
+                self.caches = (dict(fb._ODDS_CACHE), dict(fb._TABLE_CACHE), dict(fb._FAIR_CACHE))
+
+    def install(self) -> None:
+        # parsed once, then swapped into focus_bets for every config of this day
+        fb._reset_caches()
+        fb._FIXTURES_CACHE[self.date] = self.fixtures
+        for cache, saved in zip((fb._ODDS_CACHE, fb._TABLE_CACHE, fb._FAIR_CACHE), self.caches):
+            cache.update(saved)
+
+
+@lru_cache(maxsize=16)
+def load_day(date_str: str) -> Day:
+    return Day(date_str)
+
+
+@contextmanager
+def _knobs(cfg: Dict[str, Any]):
+    # focus_bets reads these as module globals; put them back for whoever builds next in this process
+    saved = {k: getattr(fb, k) for k in (*KNOBS[1:], "DEBUG")}
+    try:
+        for k in KNOBS[1:]:
+            setattr(fb, k, int(cfg[k]))
+        fb.DEBUG = False
+        yield
+    finally:
+        for k, v in saved.items():
+            setattr(fb, k, v)
+
+
+def _tickets(day: Day, cfg: Dict[str, Any]) -> List[Optional[List[Dict[str, Any]]]]:
+    key = tuple(cfg[k] for k in KNOBS)
+    if key not in day.memo:
+        caps = {k: v + float(cfg["th_add"]) for k, v in fb.BASE_TH.items()}
+        configs = [(allowed, target, (BACKTEST_NODE_BUDGET, 0)) for allowed, target, _ in fb._ticket_configs()]
+        with api_archive.replay(day.date, "feed", day.feed), _knobs(cfg):
+            day.install()
+            fixtures = fb._lazy_fixtures(day.date, configs, caps) if fb.PREFILTER else None
+            day.memo[key] = [fb._build_ticket(day.date, allowed, target, budget, fixtures, caps=caps)[0]
+                             for allowed, target, budget in configs]
+    return day.memo[key]
+
+
+def _score(legs: List[Dict[str, Any]], results: Dict[int, Dict[str, Any]]) -> Tuple[str, int, int]:
+    hits = settled = 0
+    lost = False
+    for L in legs:
+        res = results.get(L["fid"]) or {"status": "NA"}
+        if res.get("status") not in FINAL:
+            continue
+        settled += 1
+        if ev.leg_hit({"market": L["market"], "pick": L["pick_name"]}, res):
+            hits += 1
+        else:
+            lost = True
+    if lost:
+        return "lose", hits, settled
+    return ("win" if settled == len(legs) else "pending"), hits, settled
+
+
+def _empty() -> Dict[str, Any]:
+    return {"days": 0, "tickets": 0, "built": 0, "win": 0, "lose": 0, "pending": 0,
+            "legs": 0, "legs_settled": 0, "legs_hit": 0, "staked": 0.0, "returned": 0.0}
+
+
+def run_task(task: Tuple[str, List[int], List[Dict[str, Any]]]) -> List[Tuple[int, Dict[str, Any]]]:
+    date_str, idxs, grid = task
+    day = load_day(date_str)
+    out = []
+    for i in idxs:
+        cfg = grid[i]
+        agg = _empty()
+        agg["days"] = 1
+        for legs in _tickets(day, cfg):
+            agg["tickets"] += 1
+            if not legs:
+                continue
+            agg["built"] += 1
+            outcome, hits, settled = _score(legs, day.results)
+            agg[outcome] += 1
+            agg["legs"] += len(legs)
+            agg["legs_hit"] += hits
+            agg["legs_settled"] += settled
+            if outcome != "pending":
+                agg["staked"] += 1.0
+                if outcome == "win":
+                    agg["returned"] += fb._product([L["odd"] for L in legs])
+        out.append((i, agg))
+    return out
+
+
+def backtest(dates: List[str], grid: List[Dict[str, Any]], workers: int = 1, chunk: int = 64) -> List[Dict[str, Any]]:
+    tasks = [(d, list(range(i, min(i + chunk, len(grid)))), grid) for d in dates for i in range(0, len(grid), chunk)]
+    totals = [_empty() for _ in grid]
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(run_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        parts = [run_task(t) for t in tasks]
+    for part in parts:
+        for i, agg in part:
+            for k, v in agg.items():
+                totals[i][k] += v
+
+    rows = []
+    for cfg, t in zip(grid, totals):
+        rows.append({
+            "config": {k: cfg[k] for k in KNOBS},
+            **t,
+            "returned": round(t["returned"], 4),
+            "hit_rate": round(t["win"] / t["staked"], 4) if t["staked"] else None,
+            "leg_hit_rate": round(t["legs_hit"] / t["legs_settled"], 4) if t["legs_settled"] else None,
+            "roi": round((t["returned"] - t["staked"]) / t["staked"], 4) if t["staked"] else None,
+        })
+    rows.sort(key=lambda r: (r["roi"] is not None, r["roi"] or 0.0), reverse=True)
+    return rows
+
+
+def archived_dates(start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+    if not api_archive.ARCHIVE_DIR.exists():
+        return []
+    days = sorted(p.name for p in api_archive.ARCHIVE_DIR.iterdir() if (p / "feed.jsonl.gz").exists())
+    return [d for d in days if (not start or d >= start) and (not end or d <= end)]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--grid", type=Path, required=True)
+    ap.add_argument("--from", dest="start", default=None)
+    ap.add_argument("--to", dest="end", default=None)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", type=Path, default=Path("backtest.json"))
+    a = ap.parse_args(argv)
+
+    with open(a.grid, "r", encoding="utf-8") as f:
+        grid = expand_grid(json.load(f))
+    dates = archived_dates(a.start, a.end)
+    fb._log(f"▶ backtest dates={len(dates)} configs={len(grid)} workers={a.workers}")
+    rows = backtest(dates, grid, a.workers)
+    with open(a.out, "w", encoding="utf-8") as f:
+        json.dump({"dates": dates, "results": rows}, f, ensure_ascii=False, indent=2)
+    print(json.dumps({"dates": len(dates), "configs": len(grid), "best": rows[0] if rows else None}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Bookmaker consensus over a whole batch of /odds payloads (needs numpy).
+
+The payloads become one dense odds matrix O[fixture, bookmaker, outcome] (NaN
+where a book has no price). From it, with no per-fixture Python loops:
+
+  * implied probabilities P = 1 / O
+  * overround removal per book and outcome group (Home/Draw/Away, Yes/No,
+    Over/Under on one line, ...): fair = P / (sum(P over group) / group total),
+    only for books that quote the complete group
+  * outlier filtering: a price whose implied probability is more than
+    CONSENSUS_MAX_DEV (relative) away from the median of the books is dropped,
+    once at least CONSENSUS_MIN_BOOKS quote the outcome
+  * best price = max of the kept prices, fair price = 1 / mean fair probability
+
+ODDS_CONSENSUS=best|fair in focus_bets switches leg selection to these numbers.
+"""
+from __future__ import annotations
+import os, warnings
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:   # optional: focus_bets falls back to the plain best price
+    np = None
+
+CONSENSUS_MAX_DEV = float(os.getenv("CONSENSUS_MAX_DEV", "0.10"))
+CONSENSUS_MIN_BOOKS = int(os.getenv("CONSENSUS_MIN_BOOKS", "3"))
+
+# (outcomes, total probability of the group)
+GROUPS: List[Tuple[Tuple[Tuple[str, str], ...], float]] = [
+    ((("Match Winner", "Home"), ("Match Winner", "Draw"), ("Match Winner", "Away")), 1.0),
+    ((("Double Chance", "1X"), ("Double Chance", "X2"), ("Double Chance", "12")), 2.0),
+    ((("BTTS", "Yes"), ("BTTS", "No")), 1.0),
+    ((("Over/Under", "Over 1.5"), ("Over/Under", "Under 1.5")), 1.0),
+    ((("Over/Under", "Over 2.5"), ("Over/Under", "Under 2.5")), 1.0),
+    ((("Over/Under", "Over 3.5"), ("Over/Under", "Under 3.5")), 1.0),
+    ((("1st Half Goals", "Over 0.5"), ("1st Half Goals", "Under 0.5")), 1.0),
+    ((("Home Team Goals", "Over 0.5"), ("Home Team Goals", "Under 0.5")), 1.0),
+    ((("Away Team Goals", "Over 0.5"), ("Away Team Goals", "Under 0.5")), 1.0),
+]
+OUTCOMES: List[Tuple[str, str]] = [o for outs, _ in GROUPS for o in outs]
+OUTCOME_INDEX = {o: i for i, o in enumerate(OUTCOMES)}
+
+
+def available() -> bool:
+    return np is not None
+
+
+def odds_matrix(prices: Iterable[Tuple[int, Any, str, str, float]]):
+    """(fids, bookmaker ids, O) from (fid, bookmaker, market, pick, odd) rows;
+    O is shaped fixtures x bookmakers x OUTCOMES."""
+    fid_index: Dict[int, int] = {}
+    books: Dict[Any, int] = {}
+    cells: List[Tuple[int, int, int, float]] = []
+    for fid, book, mkt, val, odd in prices:
+        fi = fid_index.setdefault(fid, len(fid_index))
+        k = OUTCOME_INDEX.get((mkt, val))
+        if k is None or odd is None or odd <= 1.0:
+            continue
+        cells.append((fi, books.setdefault(book, len(books)), k, odd))
+    fids = list(fid_index)
+    O = np.full((len(fids), max(1, len(books)), len(OUTCOMES)), np.nan)
+    if cells:
+        f, b, k, v = (np.array(c) for c in zip(*cells))
+        # a book quoting one outcome twice (duplicate bet names) keeps its highest price
+        np.fmax.at(O, (f.astype(int), b.astype(int), k.astype(int)), v)
+    return fids, list(books), O
+
+
+def consensus(O):
+    """(best, fair, books) arrays shaped fixtures x OUTCOMES; NaN where undefined."""
+    P = 1.0 / O
+    fair = np.full_like(P, np.nan)
+    for outs, total in GROUPS:
+        idx = [OUTCOME_INDEX[o] for o in outs]
+        over = P[:, :, idx].sum(axis=2, keepdims=True) / total   # NaN unless the book quotes the whole group
+        fair[:, :, idx] = P[:, :, idx] / over
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN slices are expected
+        quoted = ~np.isnan(P)
+        n = quoted.sum(axis=1, keepdims=True)
+        med = np.nanmedian(P, axis=1, keepdims=True)
+        outlier = (np.abs(P / med - 1.0) > CONSENSUS_MAX_DEV) & (n >= CONSENSUS_MIN_BOOKS)
+        kept = quoted & ~outlier
+        best = np.nanmax(np.where(kept, O, np.nan), axis=1)
+        fair_p = np.nanmean(np.where(kept, fair, np.nan), axis=1)
+    return best, 1.0 / fair_p, kept.sum(axis=1)
+
+
+def consensus_tables(prices: Iterable[Tuple[int, Any, str, str, float]]) -> Dict[int, Dict[str, Dict[str, Tuple[float, float, int]]]]:
+    """fid -> market -> pick -> (best price, fair price or NaN, books kept)."""
+    fids, _, O = odds_matrix(prices)
+    best, fair, books = consensus(O)
+    out: Dict[int, Dict[str, Dict[str, Tuple[float, float, int]]]] = {fid: {} for fid in fids}
+    fi, ki = np.nonzero(~np.isnan(best))
+    for f, k in zip(fi.tolist(), ki.tolist()):
+        mkt, val = OUTCOMES[k]
+        out[fids[f]].setdefault(mkt, {})[val] = (float(best[f, k]), float(fair[f, k]), int(books[f, k]))
+    return out
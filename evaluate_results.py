@@ -4,10 +4,18 @@ import os, json, sys, time
 from pathlib import Path
 from datetime import datetime, timezone
 
+import api_archive
+import history
+
 API_KEY = os.getenv("API_FOOTBALL_KEY", "").strip()
 BASE_URL = os.getenv("API_FOOTBALL_URL", "https://v3.football.api-sports.io").rstrip("/")
 PUBLIC = Path("public")
 PUBLIC.mkdir(parents=True, exist_ok=True)
+# interno stanje između pokretanja (CI cache), ne objavljuje se
+STATE_DIR = Path(os.getenv("STATE_DIR", "state"))
+# statusi koji se više ne menjaju: takve mečeve ne pitamo API ponovo; isti skup odlučuje
+# i da li je leg završen, da keš i ocena nikad ne odstupaju
+SETTLED_STATUSES = {"FT", "AET", "PEN"}
 
 
 def log(s: str) -> None:
@@ -15,6 +23,14 @@ def log(s: str) -> None:
 
 
 def http_get(url: str, params: dict) -> dict:
+    path = url[len(BASE_URL):] if url.startswith(BASE_URL) else url
+    arc = api_archive.active()
+    if arc is not None and arc.mode == "replay":
+        try:
+            return arc.lookup(path, params)
+        except KeyError as e:
+            log(f"API archive miss {e}")
+            return {}
     import httpx
     headers = {"x-apisports-key": API_KEY}
     for _ in range(4):
@@ -26,7 +42,10 @@ def http_get(url: str, params: dict) -> dict:
                 time.sleep(float(ra))
                 continue
             r.raise_for_status()
-            return r.json()
+            data = r.json()
+            if arc is not None:
+                arc.record(path, params, data)
+            return data
         except Exception as e:
             log(f"HTTP error {e}, retrying...")
             time.sleep(1.5)
@@ -39,9 +58,27 @@ def fetch_fixture_result(fid: int) -> dict:
     data = http_get(url, {"id": fid}).get("response") or []
     if not data:
         return {"status": "NA"}
-    fx = data[0].get("fixture", {}) or {}
-    goals = data[0].get("goals", {}) or {}
-    score = data[0].get("score", {}) or {}
+    return result_from_fixture(data[0])
+
+
+def fetch_fixture_results(fids: list) -> dict:
+    """Rezultati za više mečeva, do 20 id-jeva po pozivu (/fixtures?ids=a-b-c)."""
+    out = {}
+    fids = list(dict.fromkeys(int(x) for x in fids))
+    for i in range(0, len(fids), 20):
+        chunk = fids[i:i + 20]
+        data = http_get(f"{BASE_URL}/fixtures", {"ids": "-".join(str(x) for x in chunk)}).get("response") or []
+        for item in data:
+            fid = (item.get("fixture") or {}).get("id")
+            if fid is not None:
+                out[int(fid)] = result_from_fixture(item)
+    return out
+
+
+def result_from_fixture(item: dict) -> dict:
+    fx = item.get("fixture", {}) or {}
+    goals = item.get("goals", {}) or {}
+    score = item.get("score", {}) or {}
     halftime = score.get("halftime", {}) or {}
     return {
         "status": (fx.get("status") or {}).get("short") or "NA",
@@ -146,6 +183,31 @@ def leg_hit(leg: dict, res: dict) -> bool:
     return False
 
 
+def _load_state(date_str: str) -> dict:
+    p = STATE_DIR / "eval_state.json"
+    if not p.exists():
+        return {}
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return {}
+    if state.get("date") != date_str:
+        return {}
+    return {int(k): v for k, v in (state.get("settled") or {}).items()}
+
+
+def _write_if_changed(path: Path, obj) -> bool:
+    raw = json.dumps(obj, ensure_ascii=False, indent=2)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == raw:
+                return False
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(raw)
+    return True
+
+
 def main() -> None:
     snap_path = PUBLIC / "feed_snapshot.json"
     if not snap_path.exists():
@@ -161,8 +223,81 @@ def main() -> None:
         snap = json.load(f)
 
     date_str = snap.get("date") or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    settled = _load_state(date_str)
+    results = dict(settled)
+    fetched = []
+    api_archive.open_for(date_str, "eval")
+    try:
+        evaluated_tickets, per_ticket_payloads = _evaluate_tickets(snap, results, fetched)
+    finally:
+        api_archive.close()
+
+    written = write_outputs(date_str, evaluated_tickets, per_ticket_payloads, results)
+    log(f"eval fetched={len(fetched)} cached={len(settled)} written={written}")
+
+    print(json.dumps({"status": "ok", "file": "public/evaluation.json"}, ensure_ascii=False))
+
+
+def write_outputs(date_str: str, evaluated_tickets: list, per_ticket_payloads: list, results: dict) -> list:
+    """Upiše evaluation.json, eval_<slug>.json i eval_state.json, dopiše završene tikete u
+    public/history/; vraća imena promenjenih fajlova."""
+    out_obj = {
+        "date": date_str,
+        "tickets": evaluated_tickets,
+    }
+
+    written = []
+    if _write_if_changed(PUBLIC / "evaluation.json", out_obj):
+        written.append("evaluation.json")
+
+    for item in per_ticket_payloads:
+        name = f"eval_{item['slug']}.json"
+        if _write_if_changed(PUBLIC / name, item["payload"]):
+            written.append(name)
+
+    now_settled = {fid: res for fid, res in results.items() if res.get("status") in SETTLED_STATUSES}
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    _write_if_changed(STATE_DIR / "eval_state.json", {"date": date_str, "settled": {str(k): v for k, v in sorted(now_settled.items())}})
+
+    # u istoriju ide tek kad je svaki meč tiketa završen
+    summaries = []
+    for t, item in zip(evaluated_tickets, per_ticket_payloads):
+        legs = item["payload"]["legs"]
+        done = all(L["result"] != "pending" for L in legs)
+        summaries.append({
+            "name": t["name"],
+            "total_odds": t["total_odds"],
+            "result": item["payload"]["ticket_result"] if done else "pending",
+            "legs": len(legs),
+            "hit": sum(1 for L in legs if L["result"] == "win"),
+        })
+    if history.append_settled(PUBLIC / "history", date_str, summaries):
+        written.append("history/index.json")
+    return written
+
+
+def _evaluate_tickets(snap: dict, results: dict = None, fetched: list = None):
+    # results: fid -> rezultat; već završeni mečevi dolaze iz eval_state.json i ne traže se ponovo
+    results = {} if results is None else results
+    fetched = [] if fetched is None else fetched
     evaluated_tickets = []
 
+    # svi nezavršeni mečevi odjednom, do 20 po /fixtures?ids= pozivu, ne meč po meč
+    todo = []
+    for ticket in snap.get("tickets", []):
+        for leg in ticket.get("legs") or []:
+            try:
+                fid = int(str(leg.get("fid")))
+            except (TypeError, ValueError):
+                continue
+            if fid not in results and fid not in todo:
+                todo.append(fid)
+    if todo:
+        fresh = fetch_fixture_results(todo)
+        for fid in todo:
+            results[fid] = fresh.get(fid) or {"status": "NA"}
+        fetched.extend(todo)
+
     per_ticket_payloads = []
 
     for ticket in snap.get("tickets", []):
@@ -181,7 +316,7 @@ def main() -> None:
             if fetch_id is None:
                 res = {"status": "NA", "home_goals": None, "away_goals": None}
             else:
-                res = fetch_fixture_result(fetch_id)
+                res = results[fetch_id]
             ok = leg_hit(
                 {
                     "market": leg.get("market"),
@@ -192,7 +327,7 @@ def main() -> None:
             if not ok:
                 all_hit = False
             status = res.get("status")
-            is_final = status in {"FT", "AET", "PEN"}
+            is_final = status in SETTLED_STATUSES
             if not is_final:
                 any_pending = True
             elif not ok:
@@ -267,20 +402,7 @@ def main() -> None:
             }
         )
 
-    out_obj = {
-        "date": date_str,
-        "tickets": evaluated_tickets,
-    }
-
-    with open(PUBLIC / "evaluation.json", "w", encoding="utf-8") as f:
-        json.dump(out_obj, f, ensure_ascii=False, indent=2)
-
-    for item in per_ticket_payloads:
-        out_path = PUBLIC / f"eval_{item['slug']}.json"
-        with open(out_path, "w", encoding="utf-8") as fh:
-            json.dump(item["payload"], fh, ensure_ascii=False, indent=2)
-
-    print(json.dumps({"status": "ok", "file": "public/evaluation.json"}, ensure_ascii=False))
+    return evaluated_tickets, per_ticket_payloads
 
 
 if __name__ == "__main__":
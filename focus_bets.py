@@ -1,30 +1,54 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import os, sys, json, time, random, re
-from typing import Any, Dict, List, Tuple, Optional
+import os, sys, json, time, random, re, zlib, argparse, subprocess
+from typing import Any, Dict, Iterator, List, Tuple, Optional
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from pathlib import Path
 import httpx
+import api_archive
+import odds_columns
+import consensus
+import history
 
 # ========= ENV =========
-API_KEY = os.getenv("API_FOOTBALL_KEY", "").strip()
-if not API_KEY:
-    raise SystemExit("Missing API_FOOTBALL_KEY (env)")
+API_KEY = os.getenv("API_FOOTBALL_KEY", "").strip()   # checked on the first network request; replays need none
 
 BASE_URL = os.getenv("API_FOOTBALL_URL", "https://v3.football.api-sports.io").rstrip("/")
 TIMEZONE = os.getenv("TIMEZONE", "Europe/Belgrade")
 TZ = ZoneInfo(TIMEZONE)
+# extra feeds from the same build: "Europe/London=en_GB,America/New_York=en_US" -> public/<tz>/*.json
+FEED_OUTPUTS = os.getenv("FEED_OUTPUTS", "").strip()
+LOCALE_FORMATS = {
+    "en_GB": "%d/%m/%Y %H:%M",
+    "en_US": "%m/%d/%Y %I:%M %p",
+    "de_DE": "%d.%m.%Y %H:%M",
+    "sr_RS": "%d.%m.%Y. %H:%M",
+}
 
 # All tickets target 2.0 as requested
 TARGETS = [2.0, 2.0, 2.0]
 LEGS_MIN = int(os.getenv("LEGS_MIN", "3"))
 LEGS_MAX = int(os.getenv("LEGS_MAX", "7"))
+SEARCH_NODE_BUDGET = int(os.getenv("SEARCH_NODE_BUDGET", "200000"))
+SEARCH_TIME_BUDGET_MS = float(os.getenv("SEARCH_TIME_BUDGET_MS", "2000"))
+SOLVER_WORKERS = int(os.getenv("SOLVER_WORKERS", "1"))
+PARALLEL_MIN_POOL = int(os.getenv("PARALLEL_MIN_POOL", "60"))
+BEAM_WIDTH = int(os.getenv("BEAM_WIDTH", "64"))
 MAX_PER_COUNTRY = int(os.getenv("MAX_PER_COUNTRY", "2"))
 MAX_HEAVY_FAVORITES = int(os.getenv("MAX_HEAVY_FAVORITES", "1"))
 RELAX_STEPS = int(os.getenv("RELAX_STEPS", "5"))
 RELAX_ADD = float(os.getenv("RELAX_ADD", "0.03"))
+PREFILTER = os.getenv("PREFILTER", "0") == "1"
+PREFILTER_BATCH = int(os.getenv("PREFILTER_BATCH", "12"))
+KICKOFF_MARGIN_MIN = int(os.getenv("KICKOFF_MARGIN_MIN", "15"))
+LEAGUE_MIN_SEEN = int(os.getenv("LEAGUE_MIN_SEEN", "10"))
+POOL_MIN_LEGS = int(os.getenv("POOL_MIN_LEGS", "25"))
+ODDS_COLUMNS_DIR = os.getenv("ODDS_COLUMNS_DIR", "").strip()   # "" = off
+SHARD_DIR = Path(os.getenv("SHARD_DIR", "shards"))
+STATE_DIR = Path(os.getenv("STATE_DIR", "state"))   # carried between runs (CI cache), never published
+ODDS_CONSENSUS = os.getenv("ODDS_CONSENSUS", "").strip().lower()   # "" | "best" | "fair" (needs numpy)
 DEBUG = os.getenv("DEBUG", "1") == "1"
 
 OUT_DIR = Path("public")
@@ -78,6 +102,14 @@ def _client() -> httpx.Client:
     return httpx.Client(timeout=30)
 
 def _get(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    arc = api_archive.active()
+    if arc is not None and arc.mode == "replay":
+        try:
+            return arc.lookup(path, params)
+        except KeyError as e:
+            raise RuntimeError(f"API archive miss {e}") from None
+    if not API_KEY:
+        raise SystemExit("Missing API_FOOTBALL_KEY (env)")
     url = f"{BASE_URL}{'' if path.startswith('/') else '/'}{path}"
     backoff = 1.5
     for _ in range(6):
@@ -91,20 +123,38 @@ def _get(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
                 time.sleep(sleep + random.uniform(0, 0.3 * sleep))
                 backoff *= 1.8
                 continue
+            if r.status_code >= 500:
+                _log(f"HTTP {r.status_code}, retry in {backoff:.1f}s")
+                time.sleep(backoff)
+                backoff *= 1.8
+                continue
             r.raise_for_status()
-            return r.json()
+            data = r.json()
+            if data.get("errors"):
+                _log(f"⚠️ API errors {data['errors']}")
+            if arc is not None:
+                arc.record(path, params, data)
+            return data
         except (httpx.ConnectError, httpx.ReadTimeout, httpx.ProtocolError) as e:
             _log(f"HTTP transient {e.__class__.__name__}")
             time.sleep(backoff)
             backoff *= 1.8
     raise RuntimeError("HTTP retries exhausted")
 
-def _fmt_dt_local(iso: str) -> str:
+def _get_paged(path: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    data = _get(path, params)
+    out = list(data.get("response") or [])
+    total = int((data.get("paging") or {}).get("total") or 1)
+    for page in range(2, total + 1):
+        out.extend(_get(path, {**params, "page": page}).get("response") or [])
+    return out
+
+def _fmt_dt_local(iso: str, tz: Optional[ZoneInfo] = None, fmt: str = "%Y-%m-%d %H:%M") -> str:
     try:
         return (
             datetime.fromisoformat(iso.replace("Z", "+00:00"))
-            .astimezone(TZ)
-            .strftime("%Y-%m-%d %H:%M")
+            .astimezone(tz or TZ)
+            .strftime(fmt)
         )
     except Exception:
         return iso
@@ -149,19 +199,17 @@ def _normalize_ou_value(v: str) -> str:
     s = re.sub(r"\s+", " ", s.title())
     return s
 
-def best_market_odds(odds_resp: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
-    best: Dict[str, Dict[str, float]] = {}
-
-    def put(mkt: str, val: str, odd_raw: Any):
-        odd = _try_float(odd_raw)
-        if odd is None:
-            return
-        best.setdefault(mkt, {})
-        if best[mkt].get(val, 0.0) < odd:
-            best[mkt][val] = odd
+def _iter_market_odds(odds_resp: List[Dict[str, Any]], full: bool = False) -> Iterator[Tuple[Any, str, str, Any]]:
+    """Yields (bookmaker, market, pick, raw odd) for every recognised price.
 
+    `full` also yields the complements the ticket rules never pick (Draw, the
+    Under/Over side of each line) so consensus.py can remove the overround.
+    """
+    bi = -1
     for item in odds_resp:
         for bm in item.get("bookmakers", []) or []:
+            bi += 1
+            book = bm.get("id", f"#{bi}")
             for bet in bm.get("bets", []) or []:
                 raw = (bet.get("name") or "").strip()
                 if not raw:
@@ -171,7 +219,9 @@ def best_market_odds(odds_resp: List[Dict[str, Any]]) -> Dict[str, Dict[str, flo
                 if _is_market_named(raw, DOC_MARKETS["ou_1st"]):
                     for v in bet.get("values", []) or []:
                         if re.search(r"(?i)\bover\s*0\.5\b", v.get("value") or ""):
-                            put("1st Half Goals", "Over 0.5", v.get("odd"))
+                            yield book, "1st Half Goals", "Over 0.5", v.get("odd")
+                        elif full and re.search(r"(?i)\bunder\s*0\.5\b", v.get("value") or ""):
+                            yield book, "1st Half Goals", "Under 0.5", v.get("odd")
                     continue
 
                 if not _is_fulltime_main(raw):
@@ -181,58 +231,103 @@ def best_market_odds(odds_resp: List[Dict[str, Any]]) -> Dict[str, Dict[str, flo
                     for v in bet.get("values", []) or []:
                         val = (v.get("value") or "").strip()
                         if val in ("Home","1"):
-                            put("Match Winner", "Home", v.get("odd"))
+                            yield book, "Match Winner", "Home", v.get("odd")
                         elif val in ("Away","2"):
-                            put("Match Winner", "Away", v.get("odd"))
+                            yield book, "Match Winner", "Away", v.get("odd")
+                        elif full and val in ("Draw","X"):
+                            yield book, "Match Winner", "Draw", v.get("odd")
                     continue
 
                 if _is_market_named(raw, DOC_MARKETS["double_chance"]):
                     for v in bet.get("values", []) or []:
                         val = (v.get("value") or "").replace(" ", "").upper()
                         if val in {"1X","X2","12"}:
-                            put("Double Chance", val, v.get("odd"))
+                            yield book, "Double Chance", val, v.get("odd")
                     continue
 
                 if _is_market_named(raw, DOC_MARKETS["btts"]):
                     for v in bet.get("values", []) or []:
                         val = (v.get("value") or "").strip().title()
                         if val in {"Yes","No"}:
-                            put("BTTS", val, v.get("odd"))
+                            yield book, "BTTS", val, v.get("odd")
                     continue
 
                 if _is_market_named(raw, DOC_MARKETS["ou"]):
                     for v in bet.get("values", []) or []:
                         norm = _normalize_ou_value(v.get("value") or "")
-                        if norm in {"Over 1.5","Under 3.5","Over 2.5"}:
-                            put("Over/Under", norm, v.get("odd"))
+                        if norm in {"Over 1.5","Under 3.5","Over 2.5"} or (full and norm in {"Under 1.5","Under 2.5","Over 3.5"}):
+                            yield book, "Over/Under", norm, v.get("odd")
                     continue
 
                 if _is_market_named(raw, DOC_MARKETS["ttg_home"]):
                     for v in bet.get("values", []) or []:
                         if re.search(r"(?i)\bover\s*0\.5\b", v.get("value") or ""):
-                            put("Home Team Goals", "Over 0.5", v.get("odd"))
+                            yield book, "Home Team Goals", "Over 0.5", v.get("odd")
+                        elif full and re.search(r"(?i)\bunder\s*0\.5\b", v.get("value") or ""):
+                            yield book, "Home Team Goals", "Under 0.5", v.get("odd")
                     continue
 
                 if _is_market_named(raw, DOC_MARKETS["ttg_away"]):
                     for v in bet.get("values", []) or []:
                         if re.search(r"(?i)\bover\s*0\.5\b", v.get("value") or ""):
-                            put("Away Team Goals", "Over 0.5", v.get("odd"))
+                            yield book, "Away Team Goals", "Over 0.5", v.get("odd")
+                        elif full and re.search(r"(?i)\bunder\s*0\.5\b", v.get("value") or ""):
+                            yield book, "Away Team Goals", "Under 0.5", v.get("odd")
                     continue
 
                 if _is_market_named(raw, DOC_MARKETS["ttg_generic"]):
                     for v in bet.get("values", []) or []:
                         vv = (v.get("value") or "").strip().lower()
                         if "over 0.5" in vv and "home" in vv:
-                            put("Home Team Goals", "Over 0.5", v.get("odd"))
+                            yield book, "Home Team Goals", "Over 0.5", v.get("odd")
                         elif "over 0.5" in vv and "away" in vv:
-                            put("Away Team Goals", "Over 0.5", v.get("odd"))
+                            yield book, "Away Team Goals", "Over 0.5", v.get("odd")
+                        elif full and "under 0.5" in vv and "home" in vv:
+                            yield book, "Home Team Goals", "Under 0.5", v.get("odd")
+                        elif full and "under 0.5" in vv and "away" in vv:
+                            yield book, "Away Team Goals", "Under 0.5", v.get("odd")
                     continue
 
-    return best
+def market_odds_table(odds_resp: List[Dict[str, Any]]) -> Dict[str, Dict[str, Tuple[float, int]]]:
+    """Best odd per (market, pick) plus the number of bookmakers quoting it."""
+    best: Dict[str, Dict[str, float]] = {}
+    books: Dict[Tuple[str, str], set] = {}
+    for book, mkt, val, odd_raw in _iter_market_odds(odds_resp):
+        odd = _try_float(odd_raw)
+        if odd is None:
+            continue
+        best.setdefault(mkt, {})
+        books.setdefault((mkt, val), set()).add(book)
+        if best[mkt].get(val, 0.0) < odd:
+            best[mkt][val] = odd
+    return {mkt: {val: (odd, len(books[(mkt, val)])) for val, odd in v.items()} for mkt, v in best.items()}
+
+def best_market_odds(odds_resp: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    return {mkt: {val: odd for val, (odd, _) in v.items()} for mkt, v in market_odds_table(odds_resp).items()}
+
 
 # ===== fixtures =====
+# per-run caches: relax steps and tickets re-read the same fixtures/odds many times
+_FIXTURES_CACHE: Dict[str, List[Dict[str, Any]]] = {}
+_ODDS_CACHE: Dict[int, Dict[str, Dict[str, float]]] = {}
+_TABLE_CACHE: Dict[int, Dict[str, Dict[str, Tuple[float, int]]]] = {}
+_FAIR_CACHE: Dict[int, Dict[str, Dict[str, float]]] = {}
+_SEEN_FIDS: set[int] = set()   # fixtures the build actually looked at (a merge preloads more than that)
+
+def _reset_caches() -> None:
+    _FIXTURES_CACHE.clear()
+    _ODDS_CACHE.clear()
+    _TABLE_CACHE.clear()
+    _FAIR_CACHE.clear()
+    _SEEN_FIDS.clear()
+
+def _fixtures_for_date(date_str: str) -> List[Dict[str, Any]]:
+    if date_str not in _FIXTURES_CACHE:
+        _FIXTURES_CACHE[date_str] = _get("/fixtures", {"date": date_str}).get("response") or []
+    return _FIXTURES_CACHE[date_str]
+
 def fetch_fixtures(date_str: str) -> List[Dict[str, Any]]:
-    items = _get("/fixtures", {"date": date_str}).get("response") or []
+    items = _fixtures_for_date(date_str)
     out = []
     for f in items:
         lg = f.get("league", {}) or {}
@@ -244,7 +339,7 @@ def fetch_fixtures(date_str: str) -> List[Dict[str, Any]]:
     return out
 
 def fetch_all_fixtures_no_filter(date_str: str) -> List[Dict[str, Any]]:
-    items = _get("/fixtures", {"date": date_str}).get("response") or []
+    items = _fixtures_for_date(date_str)
     out = []
     for f in items:
         fx = f.get("fixture", {}) or {}
@@ -255,7 +350,76 @@ def fetch_all_fixtures_no_filter(date_str: str) -> List[Dict[str, Any]]:
     return out
 
 def odds_by_fixture(fid: int) -> List[Dict[str, Any]]:
-    return _get("/odds", {"fixture": fid}).get("response") or []
+    return _get_paged("/odds", {"fixture": fid})
+
+def _consensus_on() -> bool:
+    return ODDS_CONSENSUS in ("best", "fair") and consensus.available()
+
+def load_odds(fids: List[int]) -> Dict[int, Tuple[Dict[str, Any], Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]]:
+    """fid -> (table, best, fair) straight from /odds, without touching the caches.
+
+    In consensus mode consensus.py runs over the whole batch at once; otherwise
+    fair is empty.
+    """
+    out = {}
+    if not _consensus_on():
+        for fid in fids:
+            table = market_odds_table(odds_by_fixture(fid))
+            out[fid] = (table, {mkt: {val: odd for val, (odd, _) in v.items()} for mkt, v in table.items()}, {})
+        return out
+    prices = []
+    for fid in fids:
+        for book, mkt, val, odd_raw in _iter_market_odds(odds_by_fixture(fid), full=True):
+            odd = _try_float(odd_raw)
+            if odd is not None:
+                prices.append((fid, book, mkt, val, odd))
+    tables = consensus.consensus_tables(prices)
+    for fid in fids:
+        t = tables.get(fid, {})
+        out[fid] = (
+            {mkt: {val: (b, n) for val, (b, _, n) in v.items()} for mkt, v in t.items()},
+            {mkt: {val: b for val, (b, _, _) in v.items()} for mkt, v in t.items()},
+            {mkt: {val: fr for val, (_, fr, _) in v.items() if fr == fr} for mkt, v in t.items()},
+        )
+    _log(f"… consensus fixtures={len(fids)} prices={len(prices)}")
+    return out
+
+def _store_odds(odds: Dict[int, Tuple[Dict[str, Any], Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]]) -> None:
+    for fid, (table, best, fair) in odds.items():
+        _TABLE_CACHE[fid] = table
+        _ODDS_CACHE[fid] = best
+        if fair:
+            _FAIR_CACHE[fid] = fair
+
+def prefetch_odds(fixtures: List[Dict[str, Any]]) -> None:
+    """Consensus mode: fetch the uncached fixtures and run consensus.py over the batch at once."""
+    if not _consensus_on():
+        return
+    fids = [int((f.get("fixture") or {}).get("id")) for f in fixtures]
+    fids = [fid for fid in dict.fromkeys(fids) if fid not in _ODDS_CACHE]
+    if fids:
+        _store_odds(load_odds(fids))
+
+def fixture_best_odds(fid: int, label: str = "") -> Dict[str, Dict[str, float]]:
+    _SEEN_FIDS.add(fid)
+    if fid not in _ODDS_CACHE:
+        _store_odds(load_odds([fid]))
+        if not _consensus_on():
+            _log(f"… fid={fid} league={label} odds_keys={list(_ODDS_CACHE[fid].keys())}")
+    return _ODDS_CACHE[fid]
+
+def _status(f: Dict[str, Any]) -> str:
+    return ((f.get("fixture") or {}).get("status") or {}).get("short", "")
+
+def _kickoff_ts(f: Dict[str, Any]) -> float:
+    fx = f.get("fixture", {}) or {}
+    ts = fx.get("timestamp")
+    if ts:
+        return float(ts)
+    try:
+        return datetime.fromisoformat((fx.get("date") or "").replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return 0.0
 
 # ===== priority scoring =====
 def _priority_score(league_country: str, league_name: str) -> int:
@@ -265,58 +429,208 @@ def _priority_score(league_country: str, league_name: str) -> int:
         return 2
     return 1
 
+# ===== prefilter: rank fixtures by expected usefulness, fetch odds lazily =====
+def _load_league_stats() -> Dict[str, Dict[str, Any]]:
+    p = STATE_DIR / "league_stats.json"
+    if not p.exists():
+        return {}
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _ranking_stats() -> Dict[str, Dict[str, Any]]:
+    # recorded with the traffic (like the clock) so a replay ranks fixtures as the live run did
+    arc = api_archive.active()
+    if arc is not None and arc.mode == "replay":
+        try:
+            return arc.lookup("/@league_stats", {})
+        except KeyError:
+            pass
+    stats = _load_league_stats()
+    if arc is not None:
+        arc.record("/@league_stats", {}, stats)
+    return stats
+
+def _loosest_caps(base: Optional[Dict[Tuple[str,str], float]] = None) -> Dict[Tuple[str,str], float]:
+    return {k: v + RELAX_STEPS * RELAX_ADD for k, v in (base or BASE_TH).items()}
+
+def _update_league_stats(date_str: str, fixtures: List[Dict[str, Any]]) -> None:
+    # a league "hits" when one of its fixtures had any price under the loosest cap we would ever use
+    arc = api_archive.active()
+    if arc is not None and arc.mode == "replay":
+        return   # the day was counted when it ran live
+    stats = _load_league_stats()
+    caps = _loosest_caps()
+    for f in fixtures:
+        fid = int((f.get("fixture") or {}).get("id"))
+        if fid not in _SEEN_FIDS or fid not in _ODDS_CACHE:
+            continue
+        lid = str((f.get("league") or {}).get("id"))
+        s = stats.setdefault(lid, {"seen": 0, "hits": 0})
+        if s.get("day") != date_str:
+            s["day"], s["fids"] = date_str, []
+        if fid in s["fids"]:
+            continue   # counted by an earlier run of the same day
+        s["fids"].append(fid)
+        s["seen"] += 1
+        if any(odd < caps.get((mkt, name), 0.0) for mkt, v in _ODDS_CACHE[fid].items() for name, odd in v.items()):
+            s["hits"] += 1
+    _write_json(STATE_DIR / "league_stats.json", stats)
+
+def rank_fixtures(fixtures: List[Dict[str, Any]], now_ts: float, stats: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    rows = []
+    started = 0
+    for f in fixtures:
+        ko = _kickoff_ts(f)
+        if ko and ko <= now_ts + KICKOFF_MARGIN_MIN * 60:
+            started += 1
+            continue
+        lg = f.get("league", {}) or {}
+        s = stats.get(str(lg.get("id"))) or {}
+        seen, hits = int(s.get("seen", 0)), int(s.get("hits", 0))
+        dead = seen >= LEAGUE_MIN_SEEN and hits == 0
+        rate = (hits + 1) / (seen + 2)
+        prio = _priority_score(lg.get("country") or "", lg.get("name") or "")
+        rows.append((dead, -prio, -rate, ko, int(f["fixture"]["id"]), f))
+    rows.sort(key=lambda r: r[:5])
+
+    # a ticket takes at most MAX_PER_COUNTRY legs per country, so extra fixtures of one country go to later tiers
+    reserve = max(1, MAX_PER_COUNTRY * len(TARGETS))
+    per_country: Dict[str, int] = {}
+    tiered = []
+    for pos, r in enumerate(rows):
+        c = ((r[5].get("league") or {}).get("country") or "").strip() or "World"
+        n = per_country.get(c, 0)
+        per_country[c] = n + 1
+        tiered.append((r[0], n // reserve, pos, r[5]))
+    tiered.sort(key=lambda t: t[:3])
+    if started:
+        _log(f"⏭ prefilter skipped {started} fixtures kicking off before publication")
+    return [t[3] for t in tiered]
+
+def _lazy_fixtures(
+    date_str: str,
+    configs: List[Tuple[Optional[set[Tuple[str,str]]], float, Tuple[int, float]]],
+    caps: Optional[Dict[Tuple[str,str], float]] = None,
+    only: Optional[set] = None,
+    shards: int = 1
+) -> List[Dict[str, Any]]:
+    # `caps` are the strict caps the relax loop will start from (BASE_TH unless a backtest shifts them);
+    # `only` restricts the candidates to those fixture ids (a shard's partition, a merge's priced fixtures).
+    # One of `shards` partitions only has to cover its share of a ticket: target ** (1/shards) over
+    # ceil(legs / shards) legs, from a pool of ceil(POOL_MIN_LEGS / shards)
+    strict = caps or BASE_TH
+    now_ts = api_archive.now()
+    stats = _ranking_stats()
+    allow = [f for f in fetch_fixtures(date_str) if only is None or int(f["fixture"]["id"]) in only]
+    allow_ids = {int(f["fixture"]["id"]) for f in allow}
+    rest = [f for f in fetch_all_fixtures_no_filter(date_str)
+            if int(f["fixture"]["id"]) not in allow_ids and (only is None or int(f["fixture"]["id"]) in only)]
+    ranked = rank_fixtures(allow, now_ts, stats) + rank_fixtures(rest, now_ts, stats)
+
+    loose = _loosest_caps(strict)
+    legs_min, legs_max, pool_min = (-(-n // shards) for n in (LEGS_MIN, LEGS_MAX, POOL_MIN_LEGS))
+
+    def enough(allowed: Optional[set[Tuple[str,str]]], target: float) -> bool:
+        # feasible under the strict caps, or a full-size pool that the relax loop can finish;
+        # only a greedy check per batch, the real search runs once over what was fetched
+        share = target ** (1.0 / shards)
+        if _feasible(assemble_legs_from_fixtures(fetched, strict, allowed), share, legs_min, legs_max):
+            return True
+        pool = assemble_legs_from_fixtures(fetched, loose, allowed)
+        return len(pool) >= pool_min and _feasible(pool, share, legs_min, legs_max)
+
+    fetched: List[Dict[str, Any]] = []
+    for i in range(0, len(ranked), PREFILTER_BATCH):
+        fetched.extend(ranked[i:i + PREFILTER_BATCH])
+        if all(enough(allowed, target) for allowed, target, _ in configs):
+            break
+    _log(f"🔎 prefilter odds fetched={len(fetched)}/{len(ranked)}")
+    return fetched
+
 # ===== leg assembly =====
+def _leg_base(f: Dict[str, Any]) -> Dict[str, Any]:
+    """Display fields of a fixture's leg; the pick (market, pick_name, odd) is added on top."""
+    fx = f.get("fixture", {}) or {}
+    lg = f.get("league", {}) or {}
+    tm = f.get("teams", {}) or {}
+    fid = int(fx.get("id"))
+    when_local = _fmt_dt_local(fx.get("date", ""))
+    home = (tm.get("home") or {})
+    away = (tm.get("away") or {})
+    return {
+        "fid": fid,
+        "country": (lg.get("country") or "").strip() or "World",
+        "league_name": lg.get("name") or "",
+        "league": f"{lg.get('country','')} — {lg.get('name','')}",
+        "home_name": home.get("name") or "",
+        "away_name": away.get("name") or "",
+        "teams": f"{home.get('name','')} vs {away.get('name','')}",
+        "time": f"{when_local} • {fid}",
+        "kickoff": fx.get("date", ""),   # ISO; per-feed "time" strings are formatted from it in _ticket_json
+        "prio": _priority_score(lg.get("country") or "", lg.get("name") or ""),
+    }
+
+def _pick_under_caps(
+    best: Dict[str, Dict[str, float]],
+    caps: Dict[Tuple[str,str], float],
+    allowed_pairs: Optional[set[Tuple[str,str]]] = None,
+    ref: Optional[Dict[str, Dict[str, float]]] = None
+) -> Optional[Tuple[str, str, float]]:
+    # highest odd still under its cap; `ref` (fair prices) replaces the odd in the cap check
+    pick_mkt = None
+    pick_name = None
+    pick_odd = 0.0
+    for (mkt, variants) in best.items():
+        for name, odd in variants.items():
+            if allowed_pairs is not None and (mkt, name) not in allowed_pairs:
+                continue
+            cap = caps.get((mkt, name))
+            if cap is None:
+                continue
+            if ref is not None and (ref.get(mkt) or {}).get(name, odd) >= cap:
+                continue
+            if (ref is not None or odd < cap) and odd > pick_odd:
+                pick_mkt = mkt
+                pick_name = name
+                pick_odd = odd
+    return (pick_mkt, pick_name, pick_odd) if pick_mkt else None
+
+def _make_leg(
+    base: Dict[str, Any],
+    best: Dict[str, Dict[str, float]],
+    fair: Optional[Dict[str, Dict[str, float]]],
+    caps: Dict[Tuple[str,str], float],
+    allowed_pairs: Optional[set[Tuple[str,str]]] = None
+) -> Optional[Dict[str, Any]]:
+    # the fixture's pick under `caps` on top of its _leg_base fields, or None
+    pick = _pick_under_caps(best, caps, allowed_pairs, fair if ODDS_CONSENSUS == "fair" else None)
+    if not pick:
+        return None
+    base = dict(base)
+    prio = base.pop("prio")
+    leg = {**base, "market": pick[0], "pick_name": pick[1], "odd": float(pick[2]), "prio": prio}
+    fair_odd = ((fair or {}).get(pick[0]) or {}).get(pick[1])
+    if fair_odd is not None:
+        leg["fair_odd"] = fair_odd
+    return leg
+
 def assemble_legs_from_fixtures(
     fixtures: List[Dict[str, Any]],
     caps: Dict[Tuple[str,str], float],
     allowed_pairs: Optional[set[Tuple[str,str]]] = None
 ) -> List[Dict[str, Any]]:
     legs = []
+    prefetch_odds(fixtures)
     for f in fixtures:
-        fx = f.get("fixture", {}) or {}
         lg = f.get("league", {}) or {}
-        tm = f.get("teams", {}) or {}
-        fid = int(fx.get("id"))
-        when_local = _fmt_dt_local(fx.get("date", ""))
-        home = (tm.get("home") or {})
-        away = (tm.get("away") or {})
-
-        resp = odds_by_fixture(fid)
-        best = best_market_odds(resp)
-        _log(f"… fid={fid} league={lg.get('country','')}/{lg.get('name','')} odds_keys={[k for k in best.keys()]}")
-
-        pick_mkt = None
-        pick_name = None
-        pick_odd = 0.0
-
-        for (mkt, variants) in best.items():
-            for name, odd in variants.items():
-                if allowed_pairs is not None and (mkt, name) not in allowed_pairs:
-                    continue
-                cap = caps.get((mkt, name))
-                if cap is None:
-                    continue
-                if odd < cap and odd > pick_odd:
-                    pick_mkt = mkt
-                    pick_name = name
-                    pick_odd = odd
-
-        if pick_mkt:
-            display_time = f"{when_local} • {fid}"
-            legs.append({
-                "fid": fid,
-                "country": (lg.get("country") or "").strip() or "World",
-                "league_name": lg.get("name") or "",
-                "league": f"{lg.get('country','')} — {lg.get('name','')}",
-                "home_name": home.get("name") or "",
-                "away_name": away.get("name") or "",
-                "teams": f"{home.get('name','')} vs {away.get('name','')}",
-                "time": display_time,
-                "market": pick_mkt,
-                "pick_name": pick_name,
-                "odd": float(pick_odd),
-                "prio": _priority_score(lg.get("country") or "", lg.get("name") or "")
-            })
+        fid = int((f.get("fixture", {}) or {}).get("id"))
+        best = fixture_best_odds(fid, f"{lg.get('country','')}/{lg.get('name','')}")
+        leg = _make_leg(_leg_base(f), best, _FAIR_CACHE.get(fid), caps, allowed_pairs)
+        if leg:
+            legs.append(leg)
 
     # priority first, then by descending odd
     legs.sort(key=lambda L: (L["prio"], L["odd"]), reverse=True)
@@ -333,68 +647,427 @@ def _product(vals: List[float]) -> float:
     return p
 
 def _diversity_ok(ticket: List[Dict[str, Any]], cand: Dict[str, Any]) -> bool:
-    countries = [x["country"] for x in ticket] + [cand["country"]]
-    if countries.count(cand["country"]) > MAX_PER_COUNTRY:
-        return False
-    heavy = sum(1 for x in ticket if x["odd"] < 1.20) + (1 if cand["odd"] < 1.20 else 0)
-    if heavy > MAX_HEAVY_FAVORITES:
-        return False
-    if any(x["fid"] == cand["fid"] for x in ticket):
-        return False
-    return True
-
-def _build_for_target(pool: List[Dict[str, Any]], target: float, used_fids: set) -> Optional[List[Dict[str, Any]]]:
-    cand = [x for x in pool if x["fid"] not in used_fids]
-    cand.sort(key=lambda L: (L["prio"], L["odd"]), reverse=True)
-    best = None
-
-    # greedy
-    t = []
+    # single pass: hot in every solver's inner loop
+    country = cand["country"]
+    fid = cand["fid"]
+    same = 1
+    heavy = 1 if cand["odd"] < 1.20 else 0
+    for x in ticket:
+        if x["fid"] == fid:
+            return False
+        if x["country"] == country:
+            same += 1
+        if x["odd"] < 1.20:
+            heavy += 1
+    return same <= MAX_PER_COUNTRY and heavy <= MAX_HEAVY_FAVORITES
+
+def _feasible(pool: List[Dict[str, Any]], target: float, legs_min: Optional[int] = None, legs_max: Optional[int] = None) -> bool:
+    """Cheap yes/maybe: a greedy ticket from the longest prices reaches target within LEGS_MAX."""
+    legs_min = LEGS_MIN if legs_min is None else legs_min
+    legs_max = LEGS_MAX if legs_max is None else legs_max
+    t: List[Dict[str, Any]] = []
     total = 1.0
-    for L in cand:
+    for L in sorted(pool, key=lambda x: x["odd"], reverse=True):
+        if len(t) >= legs_max:
+            break
         if not _diversity_ok(t, L):
             continue
         t.append(L)
         total *= L["odd"]
-        if len(t) >= LEGS_MIN and total >= target:
-            best = list(t)
+        if len(t) >= legs_min and total >= target:
+            return True
+    return False
+
+class _BudgetExhausted(Exception):
+    pass
+
+def _search_ticket(
+    pool: List[Dict[str, Any]],
+    target: float,
+    used_fids: set,
+    node_budget: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+    order: str = "prio",
+    shared: Any = None,
+    legs_min: Optional[int] = None,
+    legs_max: Optional[int] = None,
+    pinned: Optional[List[Dict[str, Any]]] = None,
+    stop: Any = None,
+    stripe: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """Anytime branch & bound: fewest legs first, then most priority legs.
+
+    Returns the best ticket found when the node/time budget runs out, with
+    nodes explored and the gap (in legs) to a proven lower bound. `order` picks
+    the candidate ordering ("prio", "odd", "random:<seed>"); `shared` is a
+    multiprocessing.Value holding the portfolio-wide best key. `legs_min`/`legs_max`
+    override LEGS_MIN/LEGS_MAX for one call (ticket_service specs). `pinned` legs are
+    in every ticket considered and count towards the leg limits (intraday refresh).
+    `stop` is a multiprocessing.Value that ends the search early once set; `stripe`
+    (i, n) keeps only every n-th first-level branch, starting at i, so n workers
+    split one search between them.
+    """
+    node_budget = SEARCH_NODE_BUDGET if node_budget is None else node_budget
+    time_budget_ms = SEARCH_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    legs_min = LEGS_MIN if legs_min is None else legs_min
+    legs_max = LEGS_MAX if legs_max is None else legs_max
+    t0 = time.perf_counter()
+    deadline = t0 + time_budget_ms / 1000.0 if time_budget_ms and time_budget_ms > 0 else None
+
+    pinned = list(pinned or [])
+    pin_prod = _product([x["odd"] for x in pinned])
+    pin_prio = sum(x["prio"] for x in pinned)
+    n_pinned = len(pinned)
+    cand = _ordered_candidates(pool, used_fids | {x["fid"] for x in pinned} if pinned else used_fids, order)
+    n = len(cand)
+    # suffix max odd: optimistic growth factor for whatever is still reachable from index j
+    sufmax = [1.0] * (n + 1)
+    sufprio = [0] * (n + 1)
+    for j in range(n - 1, -1, -1):
+        sufmax[j] = max(cand[j]["odd"], sufmax[j + 1])
+        sufprio[j] = max(cand[j]["prio"], sufprio[j + 1])
+    # once a ticket holds MAX_HEAVY_FAVORITES short prices, only these indices can still join it
+    light = [j for j in range(n) if cand[j]["odd"] >= 1.20]
+    light_at = [0] * (n + 1)
+    p = len(light)
+    for j in range(n, -1, -1):
+        while p > 0 and light[p - 1] >= j:
+            p -= 1
+        light_at[j] = p
+
+    def legs_needed(prod: float, have: int, j: int) -> Optional[int]:
+        k = max(0, legs_min - have)
+        m = sufmax[j]
+        p = prod * (m ** k)
+        while p < target:
+            if m <= 1.0 or have + k >= legs_max:
+                return None
+            p *= m
+            k += 1
+        return k if have + k <= legs_max and j + k <= n else None
+
+    best: Optional[List[Dict[str, Any]]] = None
+    best_key = (legs_max + 1, 0)
+    bound = best_key
+    # the portfolio bound only cuts strictly worse subtrees: each worker still reaches its own
+    # first optimal ticket, so which tie wins does not depend on worker timing
+    sbound = best_key
+    nodes = 0
+
+    def offer(t: List[Dict[str, Any]]) -> None:
+        nonlocal best, best_key, bound
+        key = (len(t), -sum(x["prio"] for x in t))
+        if key < best_key:
+            best, best_key = list(t), key
+            bound = min(bound, key)
+            if shared is not None:
+                with shared.get_lock():
+                    if _encode_key(key) < shared.value:
+                        shared.value = _encode_key(key)
+
+    # greedy incumbent
+    t: List[Dict[str, Any]] = list(pinned)
+    total = pin_prod
+    for L in cand:
+        if len(t) >= legs_min and total >= target:
             break
-
-    # dfs
-    def dfs(idx, cur, prod):
-        nonlocal best
-        if best and len(cur) >= len(best):
+        if not _diversity_ok(t, L):
+            continue
+        t.append(L)
+        total *= L["odd"]
+    if len(t) >= legs_min and total >= target and len(t) <= legs_max:
+        offer(t)
+
+    def dfs(idx: int, cur: List[Dict[str, Any]], prod: float, prio: int) -> None:
+        nonlocal nodes, sbound
+        nodes += 1
+        if nodes > node_budget > 0:
+            raise _BudgetExhausted
+        if not (nodes & 255):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise _BudgetExhausted
+            if shared is not None:
+                sbound = min(sbound, _decode_key(shared.value))
+            if stop is not None and stop.value:
+                raise _BudgetExhausted
+        if len(cur) >= legs_min and prod >= target:
+            offer(cur)
             return
-        if len(cur) > LEGS_MAX:
+        k = legs_needed(prod, len(cur), idx)
+        if k is None:
             return
-        if len(cur) >= LEGS_MIN and prod >= target:
-            best = list(cur)
+        size = len(cur) + k
+        opt = -(prio + sufprio[idx] * k)
+        if (size > bound[0] or (size == bound[0] and opt >= bound[1])
+                or size > sbound[0] or (size == sbound[0] and opt > sbound[1])):
             return
-        for j in range(idx, min(idx + 24, len(cand))):
-            L = cand[j]
-            if any(x["fid"] == L["fid"] for x in cur):
+        striped = stripe is not None and len(cur) == n_pinned
+        heavy_full = sum(1 for x in cur if x["odd"] < 1.20) >= MAX_HEAVY_FAVORITES
+        prev = idx
+        for j in (light[light_at[idx]:] if heavy_full else range(idx, n)):
+            if j > idx and (sufmax[j] < sufmax[prev] or sufprio[j] < sufprio[prev]):
+                # both suffix maxima only shrink with j: once later picks cannot beat the bound, none can
+                k = legs_needed(prod, len(cur), j)
+                if k is None:
+                    break
+                size = len(cur) + k
+                opt = -(prio + sufprio[j] * k)
+                if (size > bound[0] or (size == bound[0] and opt >= bound[1])
+                        or size > sbound[0] or (size == sbound[0] and opt > sbound[1])):
+                    break
+            prev = j
+            if striped and j % stripe[1] != stripe[0]:
                 continue
+            L = cand[j]
             if not _diversity_ok(cur, L):
                 continue
-            dfs(j + 1, cur + [L], prod * L["odd"])
-            if best:
-                return
+            cur.append(L)
+            dfs(j + 1, cur, prod * L["odd"], prio + L["prio"])
+            cur.pop()
+
+    complete = True
+    try:
+        dfs(0, list(pinned), pin_prod, pin_prio)
+    except _BudgetExhausted:
+        complete = False
 
-    if not best:
-        dfs(0, [], 1.0)
-    return best
+    lower = legs_needed(pin_prod, len(pinned), 0)
+    lower = None if lower is None else lower + len(pinned)
+    gap = 0 if complete or best is None else max(0, len(best) - (lower or len(best)))
+    return {
+        "legs": best,
+        "nodes": nodes,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+        "complete": complete,
+        "lower_bound": lower,
+        "gap": gap,
+    }
+
+def _ordered_candidates(pool: List[Dict[str, Any]], used_fids: set, order: str) -> List[Dict[str, Any]]:
+    cand = [x for x in pool if x["fid"] not in used_fids]
+    if order == "odd":
+        cand.sort(key=lambda L: L["odd"], reverse=True)
+    elif order.startswith("random:"):
+        cand.sort(key=lambda L: (L["prio"], L["odd"]), reverse=True)
+        random.Random(int(order.split(":", 1)[1])).shuffle(cand)
+    else:
+        cand.sort(key=lambda L: (L["prio"], L["odd"]), reverse=True)
+    return cand
+
+# best key (legs, -prio_sum) packed into one int so workers can share it through a multiprocessing.Value
+def _encode_key(key: Tuple[int, int]) -> int:
+    return key[0] * 1000 + key[1]
+
+def _decode_key(enc: int) -> Tuple[int, int]:
+    legs = -(-enc // 1000)
+    return legs, enc - legs * 1000
+
+def _beam_ticket(pool: List[Dict[str, Any]], target: float, used_fids: set, width: int = BEAM_WIDTH) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    cand = _ordered_candidates(pool, used_fids, "prio")
+    n = len(cand)
+    beam: List[Tuple[Tuple[int, ...], float, int]] = [((), 1.0, 0)]
+    nodes = 0
+    best = None
+    for depth in range(1, LEGS_MAX + 1):
+        nxt = []
+        for idxs, prod, prio in beam:
+            cur = [cand[i] for i in idxs]
+            for j in range((idxs[-1] + 1) if idxs else 0, n):
+                L = cand[j]
+                if not _diversity_ok(cur, L):
+                    continue
+                nodes += 1
+                nxt.append((idxs + (j,), prod * L["odd"], prio + L["prio"]))
+        if not nxt:
+            break
+        done = [x for x in nxt if depth >= LEGS_MIN and x[1] >= target]
+        if done:
+            idxs = max(done, key=lambda x: (x[2], -x[0][-1]))[0]
+            best = [cand[i] for i in idxs]
+            break
+        nxt.sort(key=lambda x: (x[2], x[1]), reverse=True)
+        beam = nxt[:width]
+    return {"legs": best, "nodes": nodes, "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+            "complete": False, "lower_bound": None, "gap": None}
+
+# ===== parallel portfolio =====
+_EXECUTOR = None
+_EXECUTOR_WORKERS = 0
+_SHARED = None
+_STOP = None
+
+def _portfolio_init(shared: Any, stop: Any) -> None:
+    global _SHARED, _STOP
+    _SHARED, _STOP = shared, stop
+
+def _portfolio_task(args: Tuple[str, List[Dict[str, Any]], float, set, Optional[int], Optional[float]]) -> Dict[str, Any]:
+    strategy, pool, target, used_fids, node_budget, time_budget_ms = args
+    if strategy == "beam":
+        res = _beam_ticket(pool, target, used_fids)
+    elif strategy.startswith("prio:"):
+        i, n = (int(x) for x in strategy[5:].split("/"))
+        res = _search_ticket(pool, target, used_fids, node_budget, time_budget_ms,
+                             shared=_SHARED, stop=_STOP, stripe=(i, n))
+    else:
+        res = _search_ticket(pool, target, used_fids, node_budget, time_budget_ms, order=strategy,
+                             shared=_SHARED, stop=_STOP)
+    res["strategy"] = strategy
+    return res
+
+def _portfolio(workers: int) -> List[str]:
+    # the prio DFS split over its first-level branches, plus an odd-first DFS and a beam for early incumbents;
+    # workers - 1 stripes + 2 = workers + 1 tasks, and the pool gets one process per task
+    stripes = max(1, workers - 1)
+    return [f"prio:{i}/{stripes}" for i in range(stripes)] + ["odd", "beam"]
+
+def _get_executor(workers: int):
+    global _EXECUTOR, _EXECUTOR_WORKERS, _SHARED, _STOP
+    if _EXECUTOR is not None and _EXECUTOR_WORKERS != workers:
+        shutdown_solvers()
+    if _EXECUTOR is None:
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+        _SHARED = mp.Value("q", 0)
+        _STOP = mp.Value("b", 0)
+        _EXECUTOR = ProcessPoolExecutor(max_workers=workers, initializer=_portfolio_init, initargs=(_SHARED, _STOP))
+        _EXECUTOR_WORKERS = workers
+    return _EXECUTOR
+
+def shutdown_solvers() -> None:
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(cancel_futures=True)
+        _EXECUTOR = None
+        _EXECUTOR_WORKERS = 0
+
+def _ticket_key(legs: List[Dict[str, Any]]) -> Tuple[int, int]:
+    return len(legs), -sum(x["prio"] for x in legs)
+
+def _tie_key(legs: List[Dict[str, Any]]) -> Tuple[int, int, Tuple[int, ...]]:
+    # equal tickets resolve by their fixtures, never by which worker reported first
+    return _ticket_key(legs) + (tuple(sorted(x["fid"] for x in legs)),)
+
+def _search_portfolio(
+    pool: List[Dict[str, Any]],
+    target: float,
+    used_fids: set,
+    node_budget: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+    workers: int = SOLVER_WORKERS,
+    incumbent: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Portfolio over a process pool; `incumbent` (e.g. from a sequential probe) seeds the shared bound.
+
+    Proven optimal once every prio stripe or the odd-first DFS has exhausted its
+    tree. The stop flag ends the remaining workers once every stripe is done:
+    the stripes together cover the tree, so the ticket picked from them is the
+    same on every run. Only a run cut short by its budget depends on timing.
+    """
+    from concurrent.futures import as_completed
+    t0 = time.perf_counter()
+    strategies = _portfolio(workers)
+    ex = _get_executor(len(strategies))
+    _SHARED.value = _encode_key(_ticket_key(incumbent) if incumbent else (LEGS_MAX + 1, 0))
+    _STOP.value = 0
+    stripes = sum(1 for s in strategies if s.startswith("prio:"))
+    # beam first: it finishes almost at once and hands the DFS workers a bound
+    futs = [ex.submit(_portfolio_task, (s, pool, target, used_fids, node_budget, time_budget_ms))
+            for s in ["beam"] + [s for s in strategies if s != "beam"]]
+    results = []
+    stripes_done = 0
+    proven = False
+    for fut in as_completed(futs):
+        r = fut.result()
+        results.append(r)
+        if r["strategy"].startswith("prio:"):
+            stripes_done += 1 if r["complete"] else 0
+        if r["complete"] and r["strategy"] == "odd":
+            proven = True
+        if stripes_done == stripes:
+            proven = True
+            _STOP.value = 1
+
+    lower = next((r["lower_bound"] for r in results if r["lower_bound"] is not None), None)
+    found = [r for r in results if r["legs"]]
+    nodes = sum(r["nodes"] for r in results)
+    elapsed = round((time.perf_counter() - t0) * 1000.0, 1)
+    if stripes_done == stripes:
+        # the stripes alone hold an optimal ticket; the others depend on when they were stopped
+        found = [r for r in found if r["strategy"].startswith("prio:")]
+    elif incumbent:
+        found.append({"legs": incumbent, "strategy": "incumbent"})
+    if not found:
+        return {"legs": None, "nodes": nodes, "elapsed_ms": elapsed, "complete": proven,
+                "lower_bound": lower, "gap": None, "strategy": None}
+    win = min(found, key=lambda r: _tie_key(r["legs"]))
+    return {
+        "legs": win["legs"],
+        "strategy": win["strategy"],
+        "nodes": nodes,
+        "elapsed_ms": elapsed,
+        "complete": proven,
+        "lower_bound": lower,
+        "gap": 0 if proven else max(0, len(win["legs"]) - (lower or len(win["legs"]))),
+    }
 
-def _ticket_json(legs: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _solve(
+    pool: List[Dict[str, Any]],
+    target: float,
+    used_fids: set,
+    node_budget: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+) -> Dict[str, Any]:
+    # most pools are proven in milliseconds: a sequential probe with a quarter of the budget first,
+    # the portfolio (seeded with the probe's ticket) only when that runs out
+    if SOLVER_WORKERS <= 1 or len(pool) < PARALLEL_MIN_POOL:
+        return _search_ticket(pool, target, used_fids, node_budget, time_budget_ms)
+    node_budget = SEARCH_NODE_BUDGET if node_budget is None else node_budget
+    time_budget_ms = SEARCH_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    probe = _search_ticket(pool, target, used_fids, node_budget // 4 if node_budget > 0 else node_budget,
+                           time_budget_ms / 4 if time_budget_ms and time_budget_ms > 0 else time_budget_ms)
+    if probe["complete"]:
+        return probe
+    if time_budget_ms and time_budget_ms > 0:
+        # one deadline for the whole solve: the portfolio gets what the probe left
+        time_budget_ms -= probe["elapsed_ms"]
+        if time_budget_ms <= 0:
+            return probe
+    res = _search_portfolio(pool, target, used_fids, node_budget, time_budget_ms, SOLVER_WORKERS, probe["legs"])
+    res["nodes"] += probe["nodes"]
+    res["elapsed_ms"] = round(res["elapsed_ms"] + probe["elapsed_ms"], 1)
+    return res
+
+def _build_for_target(
+    pool: List[Dict[str, Any]],
+    target: float,
+    used_fids: set,
+    node_budget: Optional[int] = None,
+    time_budget_ms: Optional[float] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    res = _solve(pool, target, used_fids, node_budget, time_budget_ms)
+    if not res["complete"]:
+        _log(f"⏱ search budget hit nodes={res['nodes']} {res['elapsed_ms']}ms gap={res['gap']} legs")
+    return res["legs"]
+
+def _leg_time(leg: Dict[str, Any], tz: ZoneInfo, locale: Optional[str]) -> str:
+    if not leg.get("kickoff"):
+        return leg["time"]
+    fmt = LOCALE_FORMATS.get(locale or "", "%Y-%m-%d %H:%M")
+    return f"{_fmt_dt_local(leg['kickoff'], tz, fmt)} • {leg['fid']}"
+
+def _ticket_json(legs: List[Dict[str, Any]], tz: Optional[ZoneInfo] = None, locale: Optional[str] = None) -> Dict[str, Any]:
     return {
         "total_odds": round(_product([l["odd"] for l in legs]), 2),
         "legs": [{
             "fid": l["fid"],
             "league": l["league"],
             "teams": l["teams"],
-            "time": l["time"],               # TicketScreen reads "time" or "kickoff_local"
+            "time": l["time"] if tz is None else _leg_time(l, tz, locale),   # TicketScreen reads "time" or "kickoff_local"
             "market": l["market"],
             "pick": l["pick_name"],          # TicketScreen maps pick/pick_name
-            "odds": round(float(l["odd"]), 2)
+            "odds": round(float(l["odd"]), 2),
+            **({"fair_odds": round(float(l["fair_odd"]), 2)} if "fair_odd" in l else {}),
         } for l in legs]
     }
 
@@ -413,49 +1086,85 @@ ALLOWED_T3: set[Tuple[str,str]] = {
     ("Match Winner","Away"),
 }
 
-def _pool_for_ticket(date_str: str, caps: Dict[Tuple[str,str], float], allowed_pairs: Optional[set[Tuple[str,str]]]) -> List[Dict[str, Any]]:
+def _pool_for_ticket(
+    date_str: str,
+    caps: Dict[Tuple[str,str], float],
+    allowed_pairs: Optional[set[Tuple[str,str]]],
+    fixtures: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    if fixtures is not None:
+        return assemble_legs_from_fixtures(fixtures, caps, allowed_pairs)
     legs = assemble_legs(date_str, caps, allowed_pairs)
     # if pool too small, widen to ALL fixtures while keeping the same allowed pairs rule
-    if len(legs) < 25:
+    if len(legs) < POOL_MIN_LEGS:
         all_fixtures = fetch_all_fixtures_no_filter(date_str)
         legs = assemble_legs_from_fixtures(all_fixtures, caps, allowed_pairs)
     return legs
 
-def build_three_tickets(date_str: str) -> List[List[Dict[str, Any]]]:
+def _search_budget(ticket_no: int) -> Tuple[int, float]:
+    # SEARCH_BUDGET_T<n>="<nodes>/<ms>" overrides the global budget for one ticket
+    raw = os.getenv(f"SEARCH_BUDGET_T{ticket_no}", "").strip()
+    if raw:
+        nodes, _, ms = raw.partition("/")
+        return int(nodes or SEARCH_NODE_BUDGET), float(ms or SEARCH_TIME_BUDGET_MS)
+    return SEARCH_NODE_BUDGET, SEARCH_TIME_BUDGET_MS
+
+def _ticket_configs() -> List[Tuple[Optional[set[Tuple[str,str]]], float, Tuple[int, float]]]:
+    # ticket configs: [(allowed_pairs or None), target, (node budget, time budget ms)]
+    return [
+        (None, TARGETS[0], _search_budget(1)),        # Ticket #1: mixed like before
+        (ALLOWED_T2, TARGETS[1], _search_budget(2)),  # Ticket #2: 1X/X2/O1.5/O2.5/U3.5
+        (ALLOWED_T3, TARGETS[2], _search_budget(3))   # Ticket #3: BTTS Yes/No + Home/Away
+    ]
+
+def _build_ticket(
+    date_str: str,
+    allowed_pairs: Optional[set[Tuple[str,str]]],
+    target: float,
+    budget: Tuple[int, float],
+    fixtures: Optional[List[Dict[str, Any]]] = None,
+    idx: int = 0,
+    caps: Optional[Dict[Tuple[str,str], float]] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, Any]]:
+    """One ticket through the relax loop; also what backtest.py scores."""
+    caps = dict(BASE_TH) if caps is None else dict(caps)
+    built = None
+    search: Dict[str, Any] = {}
+    for step in range(RELAX_STEPS + 1):
+        pool = _pool_for_ticket(date_str, caps, allowed_pairs, fixtures)
+        search = _solve(pool, target, set(), *budget)  # allow reuse if absolutely needed
+        built = search["legs"]
+
+        if built:
+            break
+        caps = {k: (v + RELAX_ADD) for k, v in caps.items()}
+        _log(f"↘ relax T{idx} step={step+1} caps+= {RELAX_ADD}")
+    if not built:
+        # last-ditch: drop country diversity but keep used_fids and caps
+        pool = _pool_for_ticket(date_str, caps, allowed_pairs, fixtures)
+        built = _build_for_target(pool, target, set(), *budget)  # allow reuse if absolutely needed
+    return built, search
+
+def build_three_tickets(date_str: str, only: Optional[set] = None) -> List[List[Dict[str, Any]]]:
     tickets: List[List[Dict[str, Any]]] = []
     used: set[int] = set()
 
-    # ticket configs: [(allowed_pairs or None), target]
-    configs = [
-        (None, TARGETS[0]),        # Ticket #1: mixed like before
-        (ALLOWED_T2, TARGETS[1]),  # Ticket #2: 1X/X2/O1.5/O2.5/U3.5
-        (ALLOWED_T3, TARGETS[2])   # Ticket #3: BTTS Yes/No + Home/Away
-    ]
+    configs = _ticket_configs()
+    fixtures = _lazy_fixtures(date_str, configs, only=only) if PREFILTER else None
 
     # progressive relaxation for each ticket independently
-    for idx, (allowed_pairs, target) in enumerate(configs, start=1):
-        caps = dict(BASE_TH)
-        built = None
-        for step in range(RELAX_STEPS + 1):
-            pool = _pool_for_ticket(date_str, caps, allowed_pairs)
-            built = built = _build_for_target(pool, target, set())  # allow reuse if absolutely needed
-
-            if built:
-                break
-            caps = {k: (v + RELAX_ADD) for k, v in caps.items()}
-            _log(f"↘ relax T{idx} step={step+1} caps+= {RELAX_ADD}")
-        if not built:
-            # last-ditch: drop country diversity but keep used_fids and caps
-            pool = _pool_for_ticket(date_str, caps, allowed_pairs)
-            built = _build_for_target(pool, target, used=set())  # allow reuse if absolutely needed
+    for idx, (allowed_pairs, target, budget) in enumerate(configs, start=1):
+        built, search = _build_ticket(date_str, allowed_pairs, target, budget, fixtures, idx)
         if built:
             tickets.append(built)
             used.update(x["fid"] for x in built)
             total = _product([x["odd"] for x in built])
-            _log(f"🎫 ticket#{idx} legs={len(built)} total={total:.2f}")
+            _log(f"🎫 ticket#{idx} legs={len(built)} total={total:.2f} "
+                 f"nodes={search.get('nodes')} complete={search.get('complete')} gap={search.get('gap')}")
         else:
             tickets.append([])  # keep file shape consistent
 
+    _update_league_stats(date_str, _FIXTURES_CACHE.get(date_str, []))
     return tickets[:3]
 
 # ===== I/O =====
@@ -478,20 +1187,41 @@ def _save_snapshot(date_str: str, tickets_payload: List[Dict[str, Any]]) -> None
     with open(OUT_DIR / "feed_snapshot.txt", "w", encoding="utf-8") as f:
         f.write("\n".join(lines))
 
-def write_pages(date_str: str, tickets: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+def _feed_outputs() -> List[Tuple[str, Optional[str]]]:
+    out = []
+    for item in FEED_OUTPUTS.split(","):
+        tz, _, locale = item.strip().partition("=")
+        if tz:
+            ZoneInfo(tz)   # fail fast on a typo
+            if locale and locale not in LOCALE_FORMATS:
+                raise ValueError(f"FEED_OUTPUTS: unknown locale {locale!r} (one of {', '.join(sorted(LOCALE_FORMATS))})")
+            out.append((tz, locale or None))
+    return out
+
+def write_pages(
+    date_str: str,
+    tickets: List[List[Dict[str, Any]]],
+    tz_name: Optional[str] = None,
+    locale: Optional[str] = None
+) -> Dict[str, Any]:
     names = ["2plus","3plus","4plus"]  # file names remain the same for app/pages.yml compatibility
     out_meta = []
     tickets_payload_for_snapshot: List[Dict[str, Any]] = []
+    # the default feed keeps the build-time strings; extra feeds only re-serialize the same legs
+    out_dir = OUT_DIR if tz_name is None else OUT_DIR / tz_name
+    tz = None if tz_name is None else ZoneInfo(tz_name)
+    extra = {} if tz_name is None else {"timezone": tz_name, **({"locale": locale} if locale else {})}
 
     for i, legs in enumerate(tickets):
         name = names[i] if i < len(names) else f"t{i+1}"
-        ticket_json = _ticket_json(legs) if legs else {"total_odds": 0, "legs": []}
+        ticket_json = _ticket_json(legs, tz, locale) if legs else {"total_odds": 0, "legs": []}
         payload = {
             "date": date_str,
             "name": name,
-            "ticket": ticket_json
+            "ticket": ticket_json,
+            **extra
         }
-        _write_json(OUT_DIR / f"{name}.json", payload)
+        _write_json(out_dir / f"{name}.json", payload)
         out_meta.append({"name": name, "total_odds": ticket_json["total_odds"], "legs": len(ticket_json["legs"])})
         tickets_payload_for_snapshot.append({
             "name": name,
@@ -500,21 +1230,332 @@ def write_pages(date_str: str, tickets: List[List[Dict[str, Any]]]) -> Dict[str,
             "legs": ticket_json["legs"],
         })
 
-    _write_json(OUT_DIR / "daily_log.json", {
+    _write_json(out_dir / "daily_log.json", {
         "date": date_str,
-        "tickets": out_meta
+        "tickets": out_meta,
+        **extra
     })
 
+    if tz_name is not None:
+        return {"count": len(out_meta), "files": [f"{tz_name}/{m['name']}.json" for m in out_meta]}
     _save_snapshot(date_str, tickets_payload_for_snapshot)
+    history.record_open(OUT_DIR / "history", date_str, out_meta)
+    for extra_tz, extra_locale in _feed_outputs():
+        write_pages(date_str, tickets, extra_tz, extra_locale)
     return {"count": len(out_meta), "files": [f"{m['name']}.json" for m in out_meta]}
 
+def _append_odds_columns(date_str: str) -> None:
+    """Archive the day's prices; a failed append is logged and never blocks the publish."""
+    if not ODDS_COLUMNS_DIR:
+        return
+    try:
+        n = odds_columns.append_day(Path(ODDS_COLUMNS_DIR), date_str, candidate_rows(date_str))
+    except (ValueError, OSError) as e:
+        _log(f"odds columns skipped for {date_str}: {e}")
+        return
+    _log(f"odds columns +{n} rows -> {ODDS_COLUMNS_DIR}")
+
+def candidate_rows(date_str: str) -> List[Tuple[int, int, str, str, str, float, int]]:
+    """Every parsed price of the day's fetched fixtures, for odds_columns.append_day."""
+    rows = []
+    for f in _FIXTURES_CACHE.get(date_str, []):
+        fid = (f.get("fixture") or {}).get("id")
+        if fid not in _TABLE_CACHE:
+            continue
+        lg = f.get("league", {}) or {}
+        country = (lg.get("country") or "").strip() or "World"
+        for mkt, v in _TABLE_CACHE[fid].items():
+            for name, (odd, books) in v.items():
+                rows.append((int(fid), int(lg.get("id") or 0), country, mkt, name, odd, books))
+    return rows
+
 def run(date_str: Optional[str] = None) -> Dict[str, Any]:
     if not date_str:
         date_str = datetime.now(TZ).strftime("%Y-%m-%d")
     _log(f"▶ date={date_str} targets={TARGETS} legs_min={LEGS_MIN} legs_max={LEGS_MAX}")
-    tickets_legs = build_three_tickets(date_str)
+    api_archive.open_for(date_str, "feed")
+    _reset_caches()
+    try:
+        tickets_legs = build_three_tickets(date_str)
+        _append_odds_columns(date_str)
+    finally:
+        api_archive.close()
+        shutdown_solvers()
     meta = write_pages(date_str, tickets_legs)
+    save_run_state(date_str, tickets_legs)
     return {"date": date_str, "tickets_count": meta["count"]}
 
+# ===== sharded runs =====
+def shard_of(fid: int, shards: int) -> int:
+    # crc32, not hash(): stable across processes and machines
+    return zlib.crc32(str(int(fid)).encode()) % shards
+
+def _shard_path(date_str: str, shard: int, shards: int) -> Path:
+    return SHARD_DIR / date_str / f"shard-{shard}-of-{shards}.json"
+
+def _shard_fixtures_path(date_str: str) -> Path:
+    return SHARD_DIR / date_str / "fixtures.json"
+
+def write_shard_fixtures(date_str: str) -> Dict[str, Any]:
+    """Fetch the day's fixture list once for every shard (a setup job before the matrix).
+
+    Shards started minutes apart would otherwise see different live statuses and
+    scores, and the merge would refuse them.
+    """
+    _reset_caches()
+    fixtures = _fixtures_for_date(date_str)
+    _write_json(_shard_fixtures_path(date_str), {"date": date_str, "fixtures": fixtures})
+    return {"date": date_str, "fixtures": len(fixtures)}
+
+def run_shard(date_str: str, shard: int, shards: int) -> Dict[str, Any]:
+    """Fetch and parse odds for one hash partition of the day's fixtures into a partial file.
+
+    The fixture list comes from write_shard_fixtures when its file exists. With
+    PREFILTER the partition is priced in rank order, like a single node prices
+    the whole day, until it covers its share of every ticket.
+    """
+    _reset_caches()
+    p = _shard_fixtures_path(date_str)
+    if p.exists():
+        with open(p, "r", encoding="utf-8") as f:
+            _FIXTURES_CACHE[date_str] = json.load(f)["fixtures"]
+    fixtures = _fixtures_for_date(date_str)
+    mine = [f for f in fetch_all_fixtures_no_filter(date_str) if shard_of(f["fixture"]["id"], shards) == shard]
+    if PREFILTER:
+        mine = _lazy_fixtures(date_str, _ticket_configs(), only={int(f["fixture"]["id"]) for f in mine}, shards=shards)
+    prefetch_odds(mine)
+    odds = {}
+    for f in mine:
+        fid = int(f["fixture"]["id"])
+        fixture_best_odds(fid, "shard")
+        odds[str(fid)] = {"table": _TABLE_CACHE.get(fid, {}), "fair": _FAIR_CACHE.get(fid, {})}
+    _write_json(_shard_path(date_str, shard, shards), {
+        "date": date_str, "shard": shard, "shards": shards, "fixtures": fixtures, "odds": odds,
+    })
+    _log(f"🧩 shard {shard}/{shards} fixtures={len(mine)}")
+    return {"date": date_str, "shard": shard, "fixtures": len(mine)}
+
+def load_shards(date_str: str, shards: int) -> None:
+    """Seed the fixture and odds caches from every partial file, as if this process had fetched them."""
+    _reset_caches()
+    fixtures = None
+    for i in range(shards):
+        p = _shard_path(date_str, i, shards)
+        if not p.exists():
+            raise SystemExit(f"Missing shard {i}/{shards}: {p}")
+        with open(p, "r", encoding="utf-8") as f:
+            part = json.load(f)
+        if fixtures is None:
+            fixtures = part["fixtures"]
+        elif part["fixtures"] != fixtures:
+            raise SystemExit(f"Shard {i}/{shards} saw a different fixture list (run --shard-fixtures first)")
+        _seed_odds(part["odds"])
+    _FIXTURES_CACHE[date_str] = fixtures or []
+
+def _seed_odds(odds: Dict[str, Dict[str, Any]]) -> None:
+    # {fid: {"table": {mkt: {pick: [odd, books]}}, "fair": {...}}} as written by run_shard / save_run_state
+    for fid, o in odds.items():
+        table = {mkt: {val: (odd, books) for val, (odd, books) in v.items()} for mkt, v in o["table"].items()}
+        _TABLE_CACHE[int(fid)] = table
+        _ODDS_CACHE[int(fid)] = {mkt: {val: odd for val, (odd, _) in v.items()} for mkt, v in table.items()}
+        _FAIR_CACHE[int(fid)] = o["fair"]
+
+def run_merged(date_str: str, shards: int) -> Dict[str, Any]:
+    """Build and publish from shard files; the output matches run() on a single node."""
+    _log(f"▶ merge date={date_str} shards={shards}")
+    load_shards(date_str, shards)
+    try:
+        # only what the shards priced: the merge never goes back to the API for odds
+        tickets_legs = build_three_tickets(date_str, only=set(_TABLE_CACHE))
+        _append_odds_columns(date_str)
+    finally:
+        shutdown_solvers()
+    meta = write_pages(date_str, tickets_legs)
+    save_run_state(date_str, tickets_legs)
+    return {"date": date_str, "tickets_count": meta["count"], "shards": shards}
+
+def run_local_shards(date_str: str, shards: int) -> Dict[str, Any]:
+    """N shard processes on this machine, then the merge (what a CI matrix does across runners)."""
+    write_shard_fixtures(date_str)
+    procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), date_str, "--shard", f"{i}/{shards}"],
+                              stdout=subprocess.DEVNULL) for i in range(shards)]
+    codes = [p.wait() for p in procs]
+    if any(codes):
+        raise SystemExit(f"shard processes failed: {codes}")
+    return run_merged(date_str, shards)
+
+# ===== incremental intraday refresh =====
+PREMATCH_STATUS = {"NS", "TBD"}
+
+def save_run_state(date_str: str, tickets: List[List[Dict[str, Any]]]) -> None:
+    """What refresh() diffs against: status/kickoff of every fixture, the parsed odds, the ticket legs."""
+    _write_json(STATE_DIR / "run_state.json", {
+        "date": date_str,
+        "fixtures": {str(f["fixture"]["id"]): [_status(f), _kickoff_ts(f)] for f in _FIXTURES_CACHE.get(date_str, [])},
+        "odds": {str(fid): {"table": t, "fair": _FAIR_CACHE.get(fid, {})} for fid, t in _TABLE_CACHE.items()},
+        "tickets": tickets,
+    })
+
+def _refetch_odds(fids: List[int]) -> None:
+    for fid in fids:
+        _ODDS_CACHE.pop(fid, None)
+        _TABLE_CACHE.pop(fid, None)
+        _FAIR_CACHE.pop(fid, None)
+    prefetch_odds([{"fixture": {"id": fid}} for fid in fids])
+    for fid in fids:
+        fixture_best_odds(fid, "refresh")
+
+def _repriced(leg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # the leg at the cached price of its pick; None once the pick is no longer offered
+    odd = (_ODDS_CACHE.get(leg["fid"], {}).get(leg["market"]) or {}).get(leg["pick_name"])
+    if odd is None:
+        return None
+    out = {k: v for k, v in leg.items() if k != "fair_odd"}
+    out["odd"] = float(odd)
+    fair = (_FAIR_CACHE.get(leg["fid"], {}).get(leg["market"]) or {}).get(leg["pick_name"])
+    if fair is not None:
+        out["fair_odd"] = fair
+    return out
+
+def _playable(f: Optional[Dict[str, Any]], now_ts: float) -> bool:
+    return f is not None and _status(f) in PREMATCH_STATUS and _kickoff_ts(f) > now_ts + KICKOFF_MARGIN_MIN * 60
+
+def _kept(leg: Dict[str, Any], f: Optional[Dict[str, Any]], now_ts: float) -> Optional[Dict[str, Any]]:
+    # a published leg stays while its fixture is pre-match and its pick is offered under the loosest cap
+    if not _playable(f, now_ts):
+        return None
+    L = _repriced(leg)
+    if L is None:
+        return None
+    price = L.get("fair_odd", L["odd"]) if ODDS_CONSENSUS == "fair" else L["odd"]
+    return L if price < _loosest_caps().get((L["market"], L["pick_name"]), 0.0) else None
+
+def _resolve_pinned(
+    date_str: str,
+    fixtures: List[Dict[str, Any]],
+    allowed_pairs: Optional[set[Tuple[str,str]]],
+    target: float,
+    budget: Tuple[int, float],
+    pinned: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    # same relax loop as build_three_tickets around the pinned legs; a fresh ticket only if they cannot be completed
+    for pins in ([pinned, []] if pinned else [[]]):
+        caps = dict(BASE_TH)
+        for _ in range(RELAX_STEPS + 1):
+            pool = _pool_for_ticket(date_str, caps, allowed_pairs, fixtures)
+            legs = _search_ticket(pool, target, set(), *budget, pinned=pins)["legs"]
+            if legs:
+                return legs
+            caps = {k: (v + RELAX_ADD) for k, v in caps.items()}
+    return []
+
+def update_tickets(
+    date_str: str,
+    old_tickets: List[List[Dict[str, Any]]],
+    by_id: Dict[int, Dict[str, Any]],
+    now_ts: float,
+    fresh_set: set,
+    check: Optional[set] = None
+) -> Tuple[List[List[Dict[str, Any]]], int]:
+    """Keep, or re-solve around their kept legs, the published tickets; returns (tickets, legs replaced).
+
+    `by_id` holds the current fixture payloads and `fresh_set` the fids whose odds
+    were re-read this round; replacement legs outside it are re-read and re-priced
+    (and added to it) before they are returned. With `check`, only those legs are
+    re-checked and every other leg is kept as published (scheduler).
+    """
+    fixtures = [f for fid, f in by_id.items() if fid in _ODDS_CACHE and _playable(f, now_ts)]
+    tickets: List[List[Dict[str, Any]]] = []
+    replaced = 0
+    for i, (allowed_pairs, target, budget) in enumerate(_ticket_configs()):
+        old = old_tickets[i] if i < len(old_tickets) else []
+        pinned = [L for L in (_kept(L, by_id.get(L["fid"]), now_ts) if check is None or L["fid"] in check else L
+                              for L in old) if L is not None]
+        if old and len(pinned) == len(old) and _product([L["odd"] for L in pinned]) >= target:
+            tickets.append(pinned)
+            continue
+        legs: List[Dict[str, Any]] = []
+        for _ in range(3):
+            legs = _resolve_pinned(date_str, fixtures, allowed_pairs, target, budget, pinned)
+            stale = [L["fid"] for L in legs if L["fid"] not in fresh_set]
+            if not stale:
+                break
+            before = {L["fid"]: L["odd"] for L in legs}
+            _refetch_odds(stale)
+            fresh_set.update(stale)
+            legs = [L for L in (_repriced(L) for L in legs) if L is not None]
+            if len(legs) == len(before) and all(L["odd"] == before[L["fid"]] for L in legs):
+                break
+        old_fids = {L["fid"] for L in old}
+        replaced += sum(1 for L in legs if L["fid"] not in old_fids)
+        tickets.append(legs)
+        _log(f"↻ ticket#{i+1} pinned={len(pinned)}/{len(old)} legs={len(legs)} "
+             f"total={_product([L['odd'] for L in legs]):.2f}")
+    return tickets, replaced
+
+def refresh(date_str: Optional[str] = None, now_ts: Optional[float] = None) -> Dict[str, Any]:
+    """Intraday update of the published tickets against run_state.json.
+
+    One /fixtures call finds fixtures whose status or kickoff changed. /odds is
+    re-read only for those and for the published legs. Legs that are still
+    pre-match and still offered under the loosest cap stay pinned at their
+    current price; a ticket is re-solved around its pinned legs only when a leg
+    dropped out or its total fell below target. Replacement legs are re-priced
+    before publishing.
+    """
+    if not date_str:
+        date_str = datetime.now(TZ).strftime("%Y-%m-%d")
+    p = STATE_DIR / "run_state.json"
+    state = None
+    if p.exists():
+        with open(p, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    if not state or state.get("date") != date_str:
+        _log(f"↻ no run state for {date_str}, full run")
+        return run(date_str)
+
+    api_archive.open_for(date_str, "refresh")
+    _reset_caches()
+    try:
+        now_ts = api_archive.now() if now_ts is None else now_ts
+        _seed_odds(state["odds"])
+        by_id = {int(f["fixture"]["id"]): f for f in _fixtures_for_date(date_str)}
+        changed = {fid for fid, f in by_id.items() if state["fixtures"].get(str(fid)) != [_status(f), _kickoff_ts(f)]}
+
+        old_tickets = state["tickets"]
+        leg_fids = {L["fid"] for t in old_tickets for L in t}
+        fresh = sorted(fid for fid in (changed & set(_ODDS_CACHE)) | leg_fids if _playable(by_id.get(fid), now_ts))
+        _refetch_odds(fresh)
+        fresh_set = set(fresh)
+        tickets, replaced = update_tickets(date_str, old_tickets, by_id, now_ts, fresh_set)
+    finally:
+        api_archive.close()
+    meta = write_pages(date_str, tickets)
+    save_run_state(date_str, tickets)
+    return {"date": date_str, "tickets_count": meta["count"], "changed_fixtures": len(changed),
+            "odds_refetched": len(fresh_set), "legs_replaced": replaced}
+
 if __name__ == "__main__":
-    print(json.dumps(run(), ensure_ascii=False, indent=2))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("date", nargs="?", default=None)
+    ap.add_argument("--shard-fixtures", action="store_true", help="fetch the fixture list once for the shard jobs")
+    ap.add_argument("--shard", default=None, help="i/N: fetch one partition of the fixtures")
+    ap.add_argument("--merge", type=int, default=None, help="N: build from N shard files")
+    ap.add_argument("--local-shards", type=int, default=None, help="N: run N shard processes here, then merge")
+    ap.add_argument("--refresh", action="store_true", help="intraday: update the published tickets from run_state.json")
+    a = ap.parse_args()
+    day = a.date or datetime.now(TZ).strftime("%Y-%m-%d")
+    if a.shard_fixtures:
+        out = write_shard_fixtures(day)
+    elif a.shard:
+        i, n = (int(x) for x in a.shard.split("/"))
+        out = run_shard(day, i, n)
+    elif a.merge:
+        out = run_merged(day, a.merge)
+    elif a.local_shards:
+        out = run_local_shards(day, a.local_shards)
+    elif a.refresh:
+        out = refresh(day)
+    else:
+        out = run(a.date)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Paginated ticket history under public/history/ for the app's history/stats views.
+
+    index.json      page_size, pages, total, running aggregate, today's open tickets
+    page-0000.json  {"page": 0, "entries": [...]}   fixed size; full pages never change
+
+Each entry is one settled ticket plus the running totals up to and including it
+(1 unit stake per ticket), so a client renders months of history and the
+hit-rate/ROI curve from index.json and the last page or two. The morning job
+merges its tickets into the small "open" list in the index (earlier days that
+are still pending stay there); the evening job appends a ticket once its result
+is final, and skips tickets the pages already hold.
+"""
+from __future__ import annotations
+import os, json
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "100"))
+FINAL_RESULTS = {"win", "lose"}
+
+
+def _read(path: Path, default: Any) -> Any:
+    if not path.exists():
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write(path: Path, obj: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def page_path(root: Path, page: int) -> Path:
+    return root / f"page-{page:04d}.json"
+
+
+def load_index(root: Path) -> Dict[str, Any]:
+    return _read(root / "index.json", {
+        "page_size": HISTORY_PAGE_SIZE,
+        "pages": 0,
+        "total": 0,
+        "aggregate": {"tickets": 0, "wins": 0, "staked": 0.0, "returned": 0.0, "hit_rate": None, "roi": None},
+        "open": [],
+    })
+
+
+def _appended(root: Path, index: Dict[str, Any], keys: set) -> set:
+    """Which of `keys` ("date/name") the pages already hold; reads from the newest page back."""
+    found: set = set()
+    for p in range(index["pages"] - 1, -1, -1):
+        if found == keys:
+            break
+        for e in _read(page_path(root, p), {"entries": []})["entries"]:
+            k = f"{e['date']}/{e['name']}"
+            if k in keys:
+                found.add(k)
+    return found
+
+
+def record_open(root: Path, date_str: str, tickets: List[Dict[str, Any]]) -> None:
+    """Morning: today's published tickets (name, total_odds, legs) as pending.
+
+    A rerun replaces that day's entries; other days still waiting for results stay.
+    """
+    index = load_index(root)
+    today = [
+        {"date": date_str, "name": t["name"], "odds": t["total_odds"], "legs": t["legs"]}
+        for t in tickets if t.get("legs")
+    ]
+    done = _appended(root, index, {f"{date_str}/{o['name']}" for o in today})
+    today = [o for o in today if f"{date_str}/{o['name']}" not in done]
+    index["open"] = sorted(
+        [o for o in index["open"] if o["date"] != date_str] + today,
+        key=lambda o: o["date"],
+    )
+    _write(root / "index.json", index)
+
+
+def append_settled(root: Path, date_str: str, tickets: List[Dict[str, Any]]) -> List[str]:
+    """Evening: append tickets whose result is final; returns the appended keys.
+
+    `tickets` items: name, total_odds, result ("win"/"lose"/"pending"), legs, hit.
+    """
+    index = load_index(root)
+    size = index["page_size"]
+    final = [t for t in tickets if t["result"] in FINAL_RESULTS and t["legs"]]
+    seen = _appended(root, index, {f"{date_str}/{t['name']}" for t in final})
+    agg = dict(index["aggregate"])
+    new = []
+    for t in final:
+        key = f"{date_str}/{t['name']}"
+        if key in seen:
+            continue
+        agg["tickets"] += 1
+        agg["staked"] = round(agg["staked"] + 1.0, 4)
+        if t["result"] == "win":
+            agg["wins"] += 1
+            agg["returned"] = round(agg["returned"] + float(t["total_odds"]), 4)
+        agg["hit_rate"] = round(agg["wins"] / agg["tickets"], 4)
+        agg["roi"] = round((agg["returned"] - agg["staked"]) / agg["staked"], 4)
+        new.append({
+            "date": date_str, "name": t["name"], "odds": t["total_odds"], "legs": t["legs"], "hit": t["hit"],
+            "result": t["result"], "n": agg["tickets"], "hit_rate": agg["hit_rate"], "roi": agg["roi"],
+        })
+        seen.add(key)
+    if not new:
+        return []
+
+    total = index["total"]
+    page = total // size
+    entries = _read(page_path(root, page), {"entries": []})["entries"] if total % size else []
+    for e in new:
+        entries.append(e)
+        if len(entries) == size:
+            _write(page_path(root, page), {"page": page, "entries": entries})
+            page, entries = page + 1, []
+    if entries:
+        _write(page_path(root, page), {"page": page, "entries": entries})
+
+    index["total"] = total + len(new)
+    index["pages"] = -(-index["total"] // size)
+    index["aggregate"] = agg
+    index["open"] = [o for o in index["open"] if f"{o['date']}/{o['name']}" not in seen]
+    index.pop("recent", None)
+    _write(root / "index.json", index)
+    return [f"{e['date']}/{e['name']}" for e in new]
+
+
+def read_pages(root: Path, last: Optional[int] = None) -> List[Dict[str, Any]]:
+    """All entries (or those of the last `last` pages), oldest first."""
+    index = load_index(root)
+    first = 0 if last is None else max(0, index["pages"] - last)
+    out: List[Dict[str, Any]] = []
+    for p in range(first, index["pages"]):
+        out.extend(_read(page_path(root, p), {"entries": []})["entries"])
+    return out
@@ -0,0 +1,127 @@
+// Shared data layer for the GitHub Pages feed.
+//
+// Every JSON file is kept (memory + AsyncStorage) together with its ETag and
+// Last-Modified, so a revalidation is a conditional GET that usually answers 304
+// with an empty body. Screens render the cached copy first and get the fresh one
+// through a subscription; concurrent requests for one URL share a single fetch.
+import { useCallback, useEffect, useState } from "react";
+import AsyncStorage from "@react-native-async-storage/async-storage";
+
+const KEY = (url) => `feed:${url}`;
+const FRESH_MS = 60 * 1000; // skip the network when a copy is younger than this (pull-to-refresh ignores it)
+
+const memory = new Map();   // url -> { body, etag, lastModified, fetchedAt, missing }
+const inflight = new Map(); // url -> Promise<entry>
+const listeners = new Map(); // url -> Set<(entry) => void>
+
+const notify = (url, entry) => {
+  for (const cb of listeners.get(url) || []) cb(entry);
+};
+
+export async function readCached(url) {
+  if (memory.has(url)) return memory.get(url);
+  try {
+    const raw = await AsyncStorage.getItem(KEY(url));
+    if (raw) {
+      const entry = JSON.parse(raw);
+      if (!memory.has(url)) memory.set(url, entry);
+      return memory.get(url);
+    }
+  } catch {
+    // pokvaren zapis se tretira kao da ga nema
+  }
+  return null;
+}
+
+const store = (url, entry) => {
+  memory.set(url, entry);
+  AsyncStorage.setItem(KEY(url), JSON.stringify(entry)).catch(() => {});
+  notify(url, entry);
+  return entry;
+};
+
+async function fetchConditional(url) {
+  const prev = await readCached(url);
+  const headers = {};
+  if (prev?.etag) headers["If-None-Match"] = prev.etag;
+  if (prev?.lastModified) headers["If-Modified-Since"] = prev.lastModified;
+
+  const res = await fetch(url, { cache: "no-store", headers });
+  if (res.status === 304 && prev) {
+    const entry = { ...prev, fetchedAt: Date.now() };
+    memory.set(url, entry);
+    AsyncStorage.setItem(KEY(url), JSON.stringify(entry)).catch(() => {});
+    return entry;
+  }
+  if (res.status === 404) {
+    // npr. eval_*.json pre večernjeg run-a
+    return store(url, { body: null, missing: true, fetchedAt: Date.now() });
+  }
+  if (!res.ok) throw new Error(`HTTP ${res.status}`);
+  const body = await res.json();
+  return store(url, {
+    body,
+    etag: res.headers.get("ETag"),
+    lastModified: res.headers.get("Last-Modified"),
+    fetchedAt: Date.now(),
+  });
+}
+
+// Revalidate one URL; callers asking for the same URL while a request is
+// running get the same promise.
+export function revalidate(url, { force = false } = {}) {
+  if (inflight.has(url)) return inflight.get(url);
+  const p = (async () => {
+    const prev = await readCached(url);
+    if (!force && prev && Date.now() - prev.fetchedAt < FRESH_MS) return prev;
+    return fetchConditional(url);
+  })().finally(() => inflight.delete(url));
+  inflight.set(url, p);
+  return p;
+}
+
+export function subscribe(url, cb) {
+  if (!listeners.has(url)) listeners.set(url, new Set());
+  listeners.get(url).add(cb);
+  return () => listeners.get(url)?.delete(cb);
+}
+
+// Stale-while-revalidate hook: { data, missing, error, loading, refresh }.
+// `data` is the cached body as soon as storage answers, then the fresh one.
+export function useFeed(url) {
+  const [entry, setEntry] = useState(() => memory.get(url) || null);
+  const [error, setError] = useState("");
+  const [loading, setLoading] = useState(!memory.has(url));
+
+  const refresh = useCallback(async (force = true) => {
+    if (!url) return;
+    try {
+      setError("");
+      setEntry(await revalidate(url, { force }));
+    } catch (e) {
+      setError(String(e?.message || e));
+    } finally {
+      setLoading(false);
+    }
+  }, [url]);
+
+  useEffect(() => {
+    if (!url) return undefined;
+    let alive = true;
+    const unsub = subscribe(url, (e) => alive && setEntry(e));
+    readCached(url).then((e) => {
+      if (!alive) return;
+      if (e) { setEntry(e); setLoading(false); }
+      refresh(false);
+    });
+    return () => { alive = false; unsub(); };
+  }, [url, refresh]);
+
+  return {
+    data: entry?.body ?? null,
+    missing: !!entry?.missing,
+    error: entry?.body ? "" : error,
+    loading,
+    refresh,
+  };
+}
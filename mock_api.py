@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local stand-in for API-FOOTBALL (/fixtures and /odds) for offline load and regression runs.
+
+    python mock_api.py --port 8099 --latency-ms 50 --error-rate 0.02 --rate-429 0.05
+    API_FOOTBALL_URL=http://127.0.0.1:8099 API_FOOTBALL_KEY=x python focus_bets.py
+
+Data comes from --data DIR (recorded payloads: fixtures_<date>.json, odds_<fid>.json,
+fixture_<fid>.json) and falls back to a seeded synthetic generator.
+"""
+from __future__ import annotations
+import os, sys, json, time, random, threading, zlib, argparse
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+LEAGUES = [
+    (39, "England", "Premier League"), (140, "Spain", "La Liga"), (135, "Italy", "Serie A"),
+    (78, "Germany", "Bundesliga"), (61, "France", "Ligue 1"), (88, "Netherlands", "Eredivisie"),
+    (286, "Serbia", "Super Liga"), (203, "Turkey", "Süper Lig"), (2, "World", "UEFA Champions League"),
+    (113, "Sweden", "Allsvenskan"), (103, "Norway", "Eliteserien"), (9999, "Nowhere", "Amateur League"),
+]
+BOOKMAKERS = ["Bet365", "Pinnacle", "1xBet", "Unibet", "Betfair", "Marathonbet"]
+ODDS_PAGE_SIZE = 10
+
+
+def _rng(*parts: Any) -> random.Random:
+    return random.Random(zlib.crc32("|".join(str(p) for p in parts).encode()))
+
+
+def _odd(p: float, margin: float) -> str:
+    return f"{max(1.01, 1.0 / min(0.99, p * margin)):.2f}"
+
+
+class MockData:
+    def __init__(self, data_dir: Optional[Path] = None, fixtures_per_day: int = 40, seed: int = 0):
+        self.data_dir = data_dir
+        self.fixtures_per_day = fixtures_per_day
+        self.seed = seed
+        self.clock = time.time   # tests swap in a fake clock to play a whole matchday
+
+    def _recorded(self, name: str) -> Optional[Dict[str, Any]]:
+        if not self.data_dir:
+            return None
+        p = self.data_dir / name
+        if not p.exists():
+            return None
+        with open(p, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ===== synthetic =====
+    def _fixture(self, date_str: str, i: int) -> Dict[str, Any]:
+        r = _rng(self.seed, date_str, i)
+        fid = int(date_str.replace("-", "")) * 1000 + i
+        lid, country, lname = LEAGUES[r.randrange(len(LEAGUES))]
+        ko = datetime.fromisoformat(date_str).replace(tzinfo=timezone.utc) + timedelta(hours=r.randint(10, 21), minutes=r.choice([0, 15, 30, 45]))
+        hg, ag = r.choice([0, 0, 1, 1, 1, 2, 2, 3, 4]), r.choice([0, 0, 1, 1, 2, 2, 3])
+        hth, hta = min(hg, r.randint(0, 2)), min(ag, r.randint(0, 1))
+        finished = ko + timedelta(minutes=115) < datetime.fromtimestamp(self.clock(), timezone.utc)
+        return {
+            "fixture": {
+                "id": fid,
+                "date": ko.isoformat(),
+                "timestamp": int(ko.timestamp()),
+                "status": {"short": "FT" if finished else "NS"},
+            },
+            "league": {"id": lid, "country": country, "name": lname},
+            "teams": {"home": {"name": f"Home {fid}"}, "away": {"name": f"Away {fid}"}},
+            "goals": {"home": hg if finished else None, "away": ag if finished else None},
+            "score": {"halftime": {"home": hth if finished else None, "away": hta if finished else None}},
+        }
+
+    def fixtures(self, date_str: str) -> List[Dict[str, Any]]:
+        rec = self._recorded(f"fixtures_{date_str}.json")
+        if rec is not None:
+            return rec.get("response") or []
+        return [self._fixture(date_str, i) for i in range(self.fixtures_per_day)]
+
+    def fixture(self, fid: int) -> List[Dict[str, Any]]:
+        rec = self._recorded(f"fixture_{fid}.json")
+        if rec is not None:
+            return rec.get("response") or []
+        if self.data_dir:
+            for p in sorted(self.data_dir.glob("fixtures_*.json")):
+                for f in self.fixtures(p.stem.split("_", 1)[1]):
+                    if int(f["fixture"]["id"]) == fid:
+                        return [f]
+        # synthetic ids encode their day: yyyymmdd * 1000 + index
+        day, i = divmod(fid, 1000)
+        try:
+            date_str = datetime.strptime(str(day), "%Y%m%d").strftime("%Y-%m-%d")
+        except ValueError:
+            return []
+        return [self._fixture(date_str, i)] if i < self.fixtures_per_day else []
+
+    def odds(self, fid: int) -> List[Dict[str, Any]]:
+        rec = self._recorded(f"odds_{fid}.json")
+        if rec is not None:
+            return rec.get("response") or []
+        r = _rng(self.seed, "odds", fid)
+        ph = r.uniform(0.25, 0.75)
+        pd = min(0.3, (1 - ph) * r.uniform(0.3, 0.5))
+        pa = max(0.02, 1 - ph - pd)
+        btts = r.uniform(0.35, 0.7)
+        o15, o25, u35 = r.uniform(0.65, 0.9), r.uniform(0.4, 0.65), r.uniform(0.6, 0.85)
+        ht05, home05, away05 = r.uniform(0.6, 0.85), r.uniform(0.65, 0.9), r.uniform(0.55, 0.85)
+        books = []
+        for bi, name in enumerate(r.sample(BOOKMAKERS, r.randint(2, len(BOOKMAKERS)))):
+            m = r.uniform(1.02, 1.08)
+            n = lambda p: _odd(p * r.uniform(0.97, 1.03), m)
+            books.append({"id": bi + 1, "name": name, "bets": [
+                {"id": 1, "name": "Match Winner", "values": [
+                    {"value": "Home", "odd": n(ph)}, {"value": "Draw", "odd": n(pd)}, {"value": "Away", "odd": n(pa)}]},
+                {"id": 12, "name": "Double Chance", "values": [
+                    {"value": "1X", "odd": n(ph + pd)},
+                    {"value": "X2", "odd": n(pa + pd)}, {"value": "12", "odd": n(ph + pa)}]},
+                {"id": 8, "name": "Both Teams Score", "values": [
+                    {"value": "Yes", "odd": n(btts)}, {"value": "No", "odd": n(1 - btts)}]},
+                {"id": 5, "name": "Goals Over/Under", "values": [
+                    {"value": "Over 1.5", "odd": n(o15)}, {"value": "Under 1.5", "odd": n(1 - o15)},
+                    {"value": "Over 2.5", "odd": n(o25)}, {"value": "Under 2.5", "odd": n(1 - o25)},
+                    {"value": "Over 3.5", "odd": n(1 - u35)}, {"value": "Under 3.5", "odd": n(u35)}]},
+                {"id": 6, "name": "Goals Over/Under - 1st Half", "values": [
+                    {"value": "Over 0.5", "odd": n(ht05)}, {"value": "Under 0.5", "odd": n(1 - ht05)}]},
+                {"id": 16, "name": "Home Team Total Goals", "values": [
+                    {"value": "Over 0.5", "odd": n(home05)}, {"value": "Under 0.5", "odd": n(1 - home05)}]},
+                {"id": 17, "name": "Away Team Total Goals", "values": [
+                    {"value": "Over 0.5", "odd": n(away05)}, {"value": "Under 0.5", "odd": n(1 - away05)}]},
+                {"id": 45, "name": "Corners Over Under", "values": [{"value": "Over 9.5", "odd": n(0.5)}]},
+            ]})
+        return [{"fixture": {"id": fid}, "bookmakers": books}]
+
+
+class MockState:
+    def __init__(self, data: MockData, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_429: float = 0.0, retry_after: float = 1.0, quota: int = 7500, per_minute: int = 300, seed: int = 0):
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.quota = quota
+        self.per_minute = per_minute
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.used = 0
+        self.minute: List[float] = []
+        self.hits: Dict[str, int] = {}
+
+    def admit(self, path: str) -> Dict[str, Any]:
+        """Book one request and decide its fate: ok / 429 / 500 / quota."""
+        with self.lock:
+            now = time.time()
+            self.hits[path] = self.hits.get(path, 0) + 1
+            self.minute = [t for t in self.minute if now - t < 60]
+            roll = self.rng.random()
+            if len(self.minute) >= self.per_minute or roll < self.rate_429:
+                fate = "429"
+            elif roll < self.rate_429 + self.error_rate:
+                fate = "500"
+            elif self.used >= self.quota:
+                fate = "quota"
+            else:
+                fate = "ok"
+                self.used += 1
+                self.minute.append(now)
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            return {
+                "fate": fate,
+                "delay": delay,
+                "headers": {
+                    "x-ratelimit-requests-limit": str(self.quota),
+                    "x-ratelimit-requests-remaining": str(max(0, self.quota - self.used)),
+                    "X-RateLimit-Limit": str(self.per_minute),
+                    "X-RateLimit-Remaining": str(max(0, self.per_minute - len(self.minute))),
+                },
+            }
+
+
+def _envelope(endpoint: str, params: Dict[str, Any], response: List[Any], current: int = 1, total: int = 1,
+              errors: Any = None) -> Dict[str, Any]:
+    return {
+        "get": endpoint.strip("/"),
+        "parameters": params,
+        "errors": errors or [],
+        "results": len(response),
+        "paging": {"current": current, "total": total},
+        "response": response,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: MockState
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code: int, body: Dict[str, Any], headers: Dict[str, str]) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        u = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(u.query).items()}
+        adm = self.state.admit(u.path)
+        if adm["delay"]:
+            time.sleep(adm["delay"])
+        headers = adm["headers"]
+        if adm["fate"] == "429":
+            self._send(429, {"message": "Too many requests"}, {**headers, "Retry-After": f"{self.state.retry_after:g}"})
+            return
+        if adm["fate"] == "500":
+            self._send(500, {"message": "Internal Server Error"}, headers)
+            return
+        if adm["fate"] == "quota":
+            self._send(200, _envelope(u.path, params, [], errors={"requests": "You have reached the request limit for the day"}), headers)
+            return
+        if not self.headers.get("x-apisports-key"):
+            self._send(200, _envelope(u.path, params, [], errors={"token": "Missing application key"}), headers)
+            return
+
+        data = self.state.data
+        if u.path == "/fixtures":
+            if "id" in params:
+                resp = data.fixture(int(params["id"]))
+            elif "ids" in params:
+                resp = [f for x in params["ids"].split("-") if x.strip() for f in data.fixture(int(x))]
+            else:
+                resp = data.fixtures(params.get("date", ""))
+            self._send(200, _envelope(u.path, params, resp), headers)
+        elif u.path == "/odds":
+            items = data.odds(int(params.get("fixture", 0)))
+            page = max(1, int(params.get("page", 1)))
+            total = max(1, -(-len(items) // ODDS_PAGE_SIZE))
+            chunk = items[(page - 1) * ODDS_PAGE_SIZE: page * ODDS_PAGE_SIZE]
+            self._send(200, _envelope(u.path, params, chunk, current=page, total=total), headers)
+        else:
+            self._send(404, {"message": "Endpoint not found"}, headers)
+
+
+class MockServer:
+    def __init__(self, state: MockState, host: str = "127.0.0.1", port: int = 0):
+        handler = type("Handler", (_Handler,), {"state": state})
+        self.state = state
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=int(os.getenv("MOCK_PORT", "8099")))
+    ap.add_argument("--data", type=Path, default=None, help="directory with recorded payloads")
+    ap.add_argument("--fixtures", type=int, default=40, help="synthetic fixtures per day")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--quota", type=int, default=7500)
+    ap.add_argument("--per-minute", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+
+    state = MockState(
+        MockData(a.data, a.fixtures, a.seed), latency_ms=a.latency_ms, jitter_ms=a.jitter_ms,
+        error_rate=a.error_rate, rate_429=a.rate_429, retry_after=a.retry_after,
+        quota=a.quota, per_minute=a.per_minute, seed=a.seed,
+    )
+    srv = MockServer(state, a.host, a.port)
+    print(f"mock API-FOOTBALL on {srv.url}", file=sys.stderr, flush=True)
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.httpd.server_close()
+        print(json.dumps({"requests": state.hits, "quota_used": state.used}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
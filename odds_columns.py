@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Columnar archive of every parsed candidate price, one fixed-width file per field.
+
+    ODDS_COLUMNS_DIR=odds_columns python focus_bets.py   -> appends today's table
+    python odds_columns.py --dir odds_columns --from 2024-01-01 --to 2024-12-31
+
+Row i of every <field>.col file is one (fixture, market, pick) with the best odd
+across bookmakers and how many bookmakers quoted it. days.json maps a date to its
+[start, end) row range and dicts.json holds the string tables behind the country,
+market and pick codes (append-only, so codes never change). Readers mmap the
+files and cast them to typed memoryviews: no parsing, memory bounded by the page
+cache. Values are stored in native byte order (little-endian on every runner).
+"""
+from __future__ import annotations
+import os, json, mmap, array, argparse
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from pathlib import Path
+
+COLUMNS: List[Tuple[str, str]] = [
+    ("fid", "q"),       # int64
+    ("date", "i"),      # int32 yyyymmdd
+    ("league", "i"),    # int32
+    ("country", "h"),   # int16 -> dicts.json["country"]
+    ("market", "B"),    # uint8 -> dicts.json["market"]
+    ("pick", "B"),      # uint8 -> dicts.json["pick"]
+    ("odd", "f"),       # float32
+    ("books", "H"),     # uint16
+]
+FORMATS = dict(COLUMNS)
+SEED_DICTS: Dict[str, List[str]] = {
+    "country": [],
+    "market": ["Match Winner", "Double Chance", "BTTS", "Over/Under",
+               "1st Half Goals", "Home Team Goals", "Away Team Goals"],
+    "pick": ["Home", "Away", "1X", "X2", "12", "Yes", "No",
+             "Over 0.5", "Over 1.5", "Over 2.5", "Under 3.5"],
+}
+
+
+def date_code(date_str: str) -> int:
+    return int(date_str.replace("-", ""))
+
+
+def _read_json(path: Path, default: Any) -> Any:
+    if not path.exists():
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _code(table: List[str], value: str) -> int:
+    try:
+        return table.index(value)
+    except ValueError:
+        table.append(value)
+        return len(table) - 1
+
+
+def append_day(root: Path, date_str: str,
+               rows: List[Tuple[int, int, str, str, str, float, int]]) -> int:
+    """Append (fid, league, country, market, pick, odd, books) rows for one date.
+
+    Returns the number of rows written; a date already in the index is skipped.
+    Days must come in date order, so that any date range is one row range.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    days: Dict[str, List[int]] = _read_json(root / "days.json", {})
+    if date_str in days:
+        return 0
+    if days and date_str < max(days):
+        raise ValueError(f"odds columns: {date_str} is before the last archived day {max(days)}")
+    dicts: Dict[str, List[str]] = _read_json(root / "dicts.json", {})
+    for k, seed in SEED_DICTS.items():
+        dicts.setdefault(k, list(seed))
+
+    cols = {name: array.array(fmt) for name, fmt in COLUMNS}
+    d = date_code(date_str)
+    for fid, league, country, market, pick, odd, books in rows:
+        cols["fid"].append(int(fid))
+        cols["date"].append(d)
+        cols["league"].append(int(league or 0))
+        cols["country"].append(_code(dicts["country"], country))
+        cols["market"].append(_code(dicts["market"], market))
+        cols["pick"].append(_code(dicts["pick"], pick))
+        cols["odd"].append(float(odd))
+        cols["books"].append(min(int(books), 0xFFFF))
+
+    start = max((end for _, end in days.values()), default=0)
+    for name, fmt in COLUMNS:
+        path = root / f"{name}.col"
+        with open(path, "ab") as f:
+            # drop the tail of an interrupted append before writing
+            f.truncate(start * array.array(fmt).itemsize)
+            f.write(cols[name].tobytes())
+    _write_json(root / "dicts.json", dicts)
+    days[date_str] = [start, start + len(rows)]
+    _write_json(root / "days.json", days)   # written last: the commit point
+    return len(rows)
+
+
+class OddsColumns:
+    """Read-only mmap view over an archive directory; use as a context manager."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.days: Dict[str, List[int]] = _read_json(self.root / "days.json", {})
+        self.dicts: Dict[str, List[str]] = _read_json(self.root / "dicts.json", dict(SEED_DICTS))
+        self.n = max((end for _, end in self.days.values()), default=0)
+        self._maps: List[mmap.mmap] = []
+        self.cols: Dict[str, memoryview] = {}
+        for name, fmt in COLUMNS:
+            path = self.root / f"{name}.col"
+            if self.n == 0:
+                self.cols[name] = memoryview(b"").cast(fmt)
+                continue
+            size = self.n * array.array(fmt).itemsize
+            if path.stat().st_size < size:
+                raise ValueError(f"odds columns: {path} is shorter than days.json says ({self.n} rows)")
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mm)
+            # bytes past the last committed day (an interrupted append) are ignored
+            self.cols[name] = memoryview(mm)[:size].cast(fmt)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __enter__(self) -> "OddsColumns":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for mv in self.cols.values():
+            mv.release()
+        self.cols = {}
+        for mm in self._maps:
+            mm.close()
+        self._maps = []
+
+    def span(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """Row range covering [start, end] dates (append_day keeps days in date order)."""
+        picked = [r for d, r in self.days.items() if (not start or d >= start) and (not end or d <= end)]
+        if not picked:
+            return 0, 0
+        return min(a for a, _ in picked), max(b for _, b in picked)
+
+    def column(self, name: str, start: Optional[str] = None, end: Optional[str] = None) -> memoryview:
+        a, b = self.span(start, end) if (start or end) else (0, self.n)
+        return self.cols[name][a:b]
+
+    def array(self, name: str, start: Optional[str] = None, end: Optional[str] = None):
+        """numpy view of a column (zero-copy); needs numpy installed."""
+        import numpy as np
+        return np.frombuffer(self.column(name, start, end), dtype=FORMATS[name])
+
+    def rows(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        a, b = self.span(start, end) if (start or end) else (0, self.n)
+        c, dicts = self.cols, self.dicts
+        for i in range(a, b):
+            yield {
+                "fid": c["fid"][i],
+                "date": c["date"][i],
+                "league": c["league"][i],
+                "country": dicts["country"][c["country"][i]],
+                "market": dicts["market"][c["market"][i]],
+                "pick": dicts["pick"][c["pick"][i]],
+                "odd": c["odd"][i],
+                "books": c["books"][i],
+            }
+
+
+def summary(oc: OddsColumns, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+    """Row count and mean best odd per (market, pick) in one pass over three columns."""
+    mk, pk, odd = oc.column("market", start, end), oc.column("pick", start, end), oc.column("odd", start, end)
+    acc: Dict[Tuple[int, int], List[float]] = {}
+    for m, p, o in zip(mk, pk, odd):
+        a = acc.setdefault((m, p), [0, 0.0])
+        a[0] += 1
+        a[1] += o
+    return {
+        "rows": len(odd),
+        "markets": {
+            f"{oc.dicts['market'][m]} / {oc.dicts['pick'][p]}": {"n": n, "mean_odd": round(s / n, 4)}
+            for (m, p), (n, s) in sorted(acc.items())
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", type=Path, default=Path(os.getenv("ODDS_COLUMNS_DIR") or "odds_columns"))
+    ap.add_argument("--from", dest="start", default=None)
+    ap.add_argument("--to", dest="end", default=None)
+    a = ap.parse_args(argv)
+    with OddsColumns(a.dir) as oc:
+        print(json.dumps(summary(oc, a.start, a.end), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
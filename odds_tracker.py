@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Re-samples /odds for today's candidate fixtures until kickoff.
+
+Only deltas versus the previous snapshot are appended to
+STATE_DIR/odds/<date>.jsonl (internal state, not published), one compact line
+per change:
+    [ts, fid, market, pick, odd]      (odd = null when the price disappeared)
+
+The fixture list is re-read every TRACK_FIXTURES_MIN and whenever a listed
+kickoff passes, so a fixture whose kickoff moved is followed to its new kickoff
+and a postponed one is dropped.
+"""
+from __future__ import annotations
+import os, sys, json, time
+from typing import Any, Callable, Dict, List, Tuple, Optional
+from datetime import datetime
+from pathlib import Path
+
+import focus_bets as fb
+
+TRACK_INTERVAL_MIN = float(os.getenv("TRACK_INTERVAL_MIN", "15"))
+TRACK_FIXTURES_MIN = float(os.getenv("TRACK_FIXTURES_MIN", "60"))
+
+Key = Tuple[int, str, str]
+
+
+class OddsTracker:
+    def __init__(self, path: Path):
+        self.path = path
+        self.last: Dict[int, Dict[Tuple[str, str], float]] = {}
+        # best-price history: only the moments a (fid, market, pick) hit a new high
+        self.best: Dict[Key, List[Tuple[float, float]]] = {}
+        self.changes = 0
+        if path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            lines = f.read().split(b"\n")
+        good = 0
+        for n, raw in enumerate(lines):
+            if raw.strip():
+                try:
+                    ts, fid, mkt, pick, odd = json.loads(raw)
+                except ValueError:
+                    if n < len(lines) - 1:
+                        raise
+                    # a write cut short by a crash: drop the partial line so the next append starts clean
+                    with open(self.path, "r+b") as f:
+                        f.truncate(good)
+                    return
+                self._apply((int(fid), mkt, pick), ts, odd)
+            good += len(raw) + 1
+
+    def _apply(self, key: Key, ts: float, odd: Optional[float]) -> None:
+        self.changes += 1
+        prev = self.last.setdefault(key[0], {})
+        if odd is None:
+            prev.pop((key[1], key[2]), None)
+            return
+        prev[(key[1], key[2])] = odd
+        hist = self.best.setdefault(key, [])
+        if not hist or odd > hist[-1][1]:
+            hist.append((ts, odd))
+
+    def observe(self, fid: int, best: Dict[str, Dict[str, float]], ts: Optional[float] = None) -> int:
+        """Diff one parsed snapshot against the previous one; append and return the change count."""
+        ts = round(ts if ts is not None else time.time(), 1)
+        seen: Dict[Tuple[str, str], float] = {}
+        for mkt, variants in best.items():
+            for pick, odd in variants.items():
+                seen[(mkt, pick)] = round(float(odd), 3)
+
+        prev = self.last.get(fid, {})
+        rows = [((fid,) + mp, odd) for mp, odd in seen.items() if prev.get(mp) != odd]
+        rows += [((fid,) + mp, None) for mp in prev if mp not in seen]
+        if not rows:
+            return 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for (k, odd) in rows:
+                f.write(json.dumps([ts, k[0], k[1], k[2], odd], ensure_ascii=False, separators=(",", ":")) + "\n")
+                self._apply(k, ts, odd)
+        return len(rows)
+
+    def current(self, fid: int) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for (mkt, pick), odd in self.last.get(fid, {}).items():
+            out.setdefault(mkt, {})[pick] = odd
+        return out
+
+    def best_price(self, fid: int, market: str, pick: str) -> Optional[Tuple[float, float]]:
+        hist = self.best.get((fid, market, pick))
+        return hist[-1] if hist else None
+
+    def history(self, fid: int, market: str, pick: str) -> List[Tuple[float, float]]:
+        return list(self.best.get((fid, market, pick), []))
+
+
+def _kickoffs(date_str: str) -> Dict[int, float]:
+    # a fresh /fixtures?date= read: postponed fixtures drop out, moved kickoffs are picked up
+    fb._FIXTURES_CACHE.pop(date_str, None)
+    return {int(f["fixture"]["id"]): fb._kickoff_ts(f) for f in fb.fetch_fixtures(date_str)}
+
+
+def track(date_str: str, interval_s: float = TRACK_INTERVAL_MIN * 60, max_samples: Optional[int] = None,
+          clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep) -> Dict[str, Any]:
+    kickoff = _kickoffs(date_str)
+    listed = clock()
+    tracker = OddsTracker(fb.STATE_DIR / "odds" / f"{date_str}.jsonl")
+    samples = 0
+    calls = 0
+    while max_samples is None or samples < max_samples:
+        now = clock()
+        # re-read hourly, and whenever a listed kickoff passed: that fixture may have been moved
+        if now - listed >= TRACK_FIXTURES_MIN * 60 or any(listed < k <= now for k in kickoff.values()):
+            kickoff, listed = _kickoffs(date_str), now
+        live = [fid for fid, k in kickoff.items() if k > now]
+        if not live:
+            break
+        changed = 0
+        for fid in live:
+            changed += tracker.observe(fid, fb.best_market_odds(fb.odds_by_fixture(fid)), now)
+            calls += 1
+        samples += 1
+        fb._log(f"📈 sample={samples} fixtures={len(live)} changes={changed}")
+        if max_samples is not None and samples >= max_samples:
+            break
+        nxt = min(kickoff[fid] for fid in live)
+        sleep(min(interval_s, max(0.0, nxt - clock())))
+    return {"date": date_str, "samples": samples, "odds_calls": calls, "changes": tracker.changes, "file": str(tracker.path)}
+
+
+if __name__ == "__main__":
+    day = sys.argv[1] if len(sys.argv) > 1 else datetime.now(fb.TZ).strftime("%Y-%m-%d")
+    print(json.dumps(track(day), ensure_ascii=False, indent=2))
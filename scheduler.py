@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Kickoff-aware orchestrator: one process follows the whole matchday.
+
+    python scheduler.py [YYYY-MM-DD]           # one process follows the day
+    python scheduler.py --tick [YYYY-MM-DD]    # cron: run the jobs due now, save, exit
+
+After the morning build (focus_bets.run) it reads every ticket leg's kickoff
+from the fixtures payload and keeps a heapq timeline of jobs:
+
+  refresh  REFRESH_BEFORE_MIN before a kickoff: re-check the ticket legs that
+           start then (one /fixtures?ids= call, one /odds call per leg, never
+           the whole day) with focus_bets.refresh's rules; a leg that was
+           postponed, pulled or pushed over its cap is replaced; candidates whose
+           status is older than STATUS_MAX_AGE_MIN are re-read before one is kept
+  settle   SETTLE_AFTER_MIN after a kickoff: one /fixtures?ids= call for every
+           leg due at that moment, retried every SETTLE_RETRY_MIN until final
+  publish  rewrite the ticket files and run_state.json; coalesced so a burst
+           of refreshes publishes once
+
+Legs sharing a kickoff share a job. PUBLISH_CMD (e.g. a deploy script) runs
+after every publish and after each evaluation that changed a file. With
+--tick the timeline lives in STATE_DIR/scheduler.json between runs, so a
+frequent cron (pages.yml) drives the same jobs and publishes after each run.
+"""
+from __future__ import annotations
+import os, sys, json, time, heapq, itertools, subprocess
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+
+import focus_bets as fb
+import evaluate_results as ev
+
+REFRESH_BEFORE_MIN = float(os.getenv("REFRESH_BEFORE_MIN", "60"))
+SETTLE_AFTER_MIN = float(os.getenv("SETTLE_AFTER_MIN", "115"))
+SETTLE_RETRY_MIN = float(os.getenv("SETTLE_RETRY_MIN", "15"))
+SETTLE_GIVE_UP_H = float(os.getenv("SETTLE_GIVE_UP_H", "6"))
+PUBLISH_DEBOUNCE_S = float(os.getenv("PUBLISH_DEBOUNCE_S", "60"))
+PUBLISH_CMD = os.getenv("PUBLISH_CMD", "").strip()
+# a fixture payload older than this is re-read before its fixture becomes a ticket leg
+STATUS_MAX_AGE_MIN = float(os.getenv("STATUS_MAX_AGE_MIN", "10"))
+
+class Scheduler:
+    def __init__(self, date_str: str, clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep,
+                 on_publish: Optional[Callable[[str], None]] = None):
+        self.date = date_str
+        self.clock = clock
+        self.sleep = sleep
+        self.on_publish = on_publish
+        self.timeline: List[Tuple[float, int, str, Tuple[int, ...]]] = []
+        self._seq = itertools.count()
+        self.tickets: List[List[Dict[str, Any]]] = []
+        self.kickoff: Dict[int, float] = {}
+        self.fixtures: Dict[int, Dict[str, Any]] = {}
+        self.seen_at: Dict[int, float] = {}   # when each fixture payload was read
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.publish_pending = False
+        self.log: List[Tuple[float, str, Tuple[int, ...]]] = []   # executed jobs, for tests and the summary
+        self.calls = {"odds": 0, "results": 0, "fixtures": 0}
+
+    def at(self, when: float, kind: str, fids: Tuple[int, ...] = ()) -> None:
+        heapq.heappush(self.timeline, (when, next(self._seq), kind, fids))
+
+    # ===== jobs =====
+    def start(self) -> None:
+        # the regular morning run: archive, odds columns, pages and run_state.json
+        fb.run(self.date)
+        with open(fb.STATE_DIR / "run_state.json", "r", encoding="utf-8") as f:
+            self.tickets = json.load(f)["tickets"]
+        self._published("build")
+
+        self._seen(fb._FIXTURES_CACHE.get(self.date, []))
+        self._schedule(dict.fromkeys(L["fid"] for t in self.tickets for L in t))
+        fb._log(f"🗓 scheduler date={self.date} legs={sum(len(t) for t in self.tickets)} jobs={len(self.timeline)}")
+
+    def _schedule(self, fids) -> None:
+        by_kickoff: Dict[float, List[int]] = {}
+        for fid in fids:
+            by_kickoff.setdefault(self.kickoff.get(fid, 0.0), []).append(fid)
+        now = self.clock()
+        for ko, group in sorted(by_kickoff.items()):
+            fids_t = tuple(sorted(group))
+            if ko - REFRESH_BEFORE_MIN * 60 > now:
+                self.at(ko - REFRESH_BEFORE_MIN * 60, "refresh", fids_t)
+            self.at(max(now, ko + SETTLE_AFTER_MIN * 60), "settle", fids_t)
+
+    def _seen(self, items: List[Dict[str, Any]]) -> None:
+        now = self.clock()
+        for f in items:
+            fid = int(f["fixture"]["id"])
+            self.fixtures[fid] = f
+            self.kickoff[fid] = fb._kickoff_ts(f)
+            self.seen_at[fid] = now
+
+    def _statuses(self, fids: List[int]) -> None:
+        for i in range(0, len(fids), 20):
+            chunk = fids[i:i + 20]
+            self._seen(fb._get("/fixtures", {"ids": "-".join(str(fid) for fid in chunk)}).get("response") or [])
+            self.calls["fixtures"] += 1
+
+    def _day(self) -> None:
+        items = fb._get("/fixtures", {"date": self.date}).get("response") or []
+        fb._FIXTURES_CACHE[self.date] = items
+        self._seen(items)
+        self.calls["fixtures"] += 1
+
+    def _resume_day(self) -> None:
+        # a --tick process starts cold: odds from run_state.json, the day's fixtures as they are now
+        fb._reset_caches()
+        with open(fb.STATE_DIR / "run_state.json", "r", encoding="utf-8") as f:
+            fb._seed_odds(json.load(f)["odds"])
+        self._day()
+
+    def _on_tickets(self, fids: Tuple[int, ...]) -> Tuple[int, ...]:
+        # a leg replaced since the job was queued needs no more work
+        legs = {L["fid"] for t in self.tickets for L in t}
+        return tuple(fid for fid in fids if fid in legs)
+
+    def refresh(self, fids: Tuple[int, ...]) -> None:
+        fids = self._on_tickets(fids)
+        if not fids:
+            return
+        if not self.fixtures:
+            self._resume_day()
+        # status first: a postponed or already started fixture is not re-priced, its leg is replaced
+        self._statuses(list(fids))
+        now = self.clock()
+        live = [fid for fid in fids if fb._playable(self.fixtures.get(fid), now)]
+        fb._refetch_odds(live)
+        fresh_set = set(live)
+        before = {L["fid"] for t in self.tickets for L in t}
+        tickets, _ = fb.update_tickets(self.date, self.tickets, self.fixtures, now, fresh_set, check=set(fids))
+        # candidates carry the status they had when last read: before a replacement is kept,
+        # one /fixtures?date= call re-reads every candidate and the ticket is solved again if needed
+        new = {L["fid"] for t in tickets for L in t} - before
+        if any(now - self.seen_at.get(fid, float("-inf")) > STATUS_MAX_AGE_MIN * 60 for fid in new):
+            self._day()
+            if not all(fb._playable(self.fixtures.get(fid), now) for fid in new):
+                tickets, _ = fb.update_tickets(self.date, self.tickets, self.fixtures, now, fresh_set,
+                                               check=set(fids) | new)
+        self.calls["odds"] += len(fresh_set)
+        changed = tickets != self.tickets
+        self.tickets = tickets
+        # replacement legs get their own refresh/settle jobs
+        self._schedule(dict.fromkeys(L["fid"] for t in tickets for L in t if L["fid"] not in before))
+        if changed and not self.publish_pending:
+            self.publish_pending = True
+            self.at(self.clock() + PUBLISH_DEBOUNCE_S, "publish")
+
+    def publish(self, fids: Tuple[int, ...] = ()) -> None:
+        self.publish_pending = False
+        fb.write_pages(self.date, self.tickets)
+        fb.save_run_state(self.date, self.tickets)
+        self._published("publish")
+
+    def settle(self, fids: Tuple[int, ...]) -> None:
+        fids = self._on_tickets(fids)
+        if not fids:
+            return
+        fresh = ev.fetch_fixture_results(list(fids))
+        self.calls["results"] += 1
+        self.results.update(fresh)
+        now = self.clock()
+        retry = tuple(fid for fid in fids if (self.results.get(fid) or {}).get("status") not in ev.SETTLED_STATUSES
+                      and now < self.kickoff.get(fid, now) + SETTLE_GIVE_UP_H * 3600)
+        if retry:
+            self.at(now + SETTLE_RETRY_MIN * 60, "settle", retry)
+        self.evaluate()
+
+    def evaluate(self) -> List[str]:
+        with open(fb.OUT_DIR / "feed_snapshot.json", "r", encoding="utf-8") as f:
+            snap = json.load(f)
+        # legs without a result yet stay pending instead of being fetched one by one
+        results = {fid: {"status": "NS"} for fid in self.kickoff}
+        results.update(self.results)
+        evaluated, payloads = ev._evaluate_tickets(snap, results)
+        written = ev.write_outputs(self.date, evaluated, payloads, results)
+        if written:
+            self._published("evaluate")
+        return written
+
+    def _published(self, what: str) -> None:
+        if self.on_publish is not None:
+            self.on_publish(what)
+        elif PUBLISH_CMD:
+            subprocess.run(PUBLISH_CMD, shell=True, check=False)
+
+    # ===== saved timeline (--tick) =====
+    def save(self) -> None:
+        legs = {L["fid"] for t in self.tickets for L in t}
+        fb._write_json(fb.STATE_DIR / "scheduler.json", {
+            "date": self.date,
+            "tickets": self.tickets,
+            "kickoff": {str(fid): ko for fid, ko in self.kickoff.items() if fid in legs},
+            "results": {str(fid): r for fid, r in self.results.items()},
+            "timeline": [[when, kind, list(fids)] for when, _, kind, fids in sorted(self.timeline)],
+            "calls": self.calls,
+        })
+
+    def load(self) -> bool:
+        """Pick up the saved timeline of this date; False when there is none (build first)."""
+        p = fb.STATE_DIR / "scheduler.json"
+        if not p.exists():
+            return False
+        with open(p, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("date") != self.date:
+            return False
+        self.tickets = state["tickets"]
+        self.kickoff = {int(fid): ko for fid, ko in state["kickoff"].items()}
+        self.results = {int(fid): r for fid, r in state["results"].items()}
+        self.calls = state["calls"]
+        for when, kind, fids in state["timeline"]:
+            self.at(when, kind, tuple(fids))
+        return True
+
+    # ===== loop =====
+    def _due(self, until: float) -> None:
+        while self.timeline and self.timeline[0][0] <= until:
+            when, _, kind, fids = heapq.heappop(self.timeline)
+            wait = when - self.clock()
+            if wait > 0:
+                self.sleep(wait)
+            getattr(self, kind)(fids)
+            self.log.append((when, kind, fids))
+
+    def run(self) -> Dict[str, Any]:
+        self.start()
+        self._due(float("inf"))
+        return self.summary()
+
+    def tick(self) -> Dict[str, Any]:
+        """One cron run: build if the day has no saved timeline, run the jobs due by now, save."""
+        if not self.load():
+            self.start()
+        self._due(self.clock())
+        if self.publish_pending:
+            # the process exits before a debounced publish would fire
+            self.timeline = [j for j in self.timeline if j[2] != "publish"]
+            heapq.heapify(self.timeline)
+            self.publish()
+        self.save()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "date": self.date,
+            "jobs": len(self.log),
+            "odds_calls": self.calls["odds"],
+            "result_calls": self.calls["results"],
+            "fixtures_calls": self.calls["fixtures"],
+            "settled": sum(1 for r in self.results.values() if r.get("status") in ev.SETTLED_STATUSES),
+        }
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--tick"]
+    day = args[0] if args else datetime.now(fb.TZ).strftime("%Y-%m-%d")
+    s = Scheduler(day)
+    print(json.dumps(s.tick() if "--tick" in sys.argv[1:] else s.run(), ensure_ascii=False, indent=2))
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def ensure_api_key(monkeypatch):
+    monkeypatch.setenv("API_FOOTBALL_KEY", "test-key")
@@ -0,0 +1,54 @@
+import importlib
+
+import pytest
+
+import api_archive
+import mock_api
+
+
+def test_record_then_replay_is_byte_identical(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    evaluate_results = importlib.import_module("evaluate_results")
+    out_dir = tmp_path / "public"
+    monkeypatch.setattr(focus_bets, "OUT_DIR", out_dir)
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(evaluate_results, "PUBLIC", out_dir)
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(api_archive, "ARCHIVE_DIR", tmp_path / "archive")
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=30, seed=3), per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        monkeypatch.setattr(evaluate_results, "BASE_URL", srv.url)
+        monkeypatch.setattr(api_archive, "MODE", "record")
+        focus_bets.run("2030-03-01")
+        evaluate_results.main()
+
+    assert (tmp_path / "archive" / "2030-03-01" / "feed.jsonl.gz").exists()
+    assert (tmp_path / "archive" / "2030-03-01" / "eval.jsonl.gz").exists()
+    recorded = {p.name: p.read_bytes() for p in out_dir.glob("*.json")}
+
+    for p in out_dir.glob("*.json"):
+        p.unlink()
+    monkeypatch.setattr(focus_bets, "BASE_URL", "http://127.0.0.1:9")  # nothing listens here
+    monkeypatch.setattr(evaluate_results, "BASE_URL", "http://127.0.0.1:9")
+    monkeypatch.setattr(api_archive, "MODE", "replay")
+    focus_bets.run("2030-03-01")
+    evaluate_results.main()
+
+    assert {p.name: p.read_bytes() for p in out_dir.glob("*.json")} == recorded
+
+
+def test_replay_repeats_last_response_and_reports_misses(tmp_path):
+    path = tmp_path / "a.jsonl.gz"
+    rec = api_archive.ApiArchive(path, "record")
+    rec.record("/odds", {"fixture": 1}, {"response": [1]})
+    rec.record("odds", {"fixture": "1"}, {"response": [2]})
+    rec.close()
+
+    rep = api_archive.ApiArchive(path, "replay")
+    assert rep.lookup("/odds", {"fixture": 1}) == {"response": [1]}
+    assert rep.lookup("/odds", {"fixture": 1}) == {"response": [2]}
+    assert rep.lookup("/odds", {"fixture": 1}) == {"response": [2]}
+    with pytest.raises(KeyError):
+        rep.lookup("/odds", {"fixture": 2})
@@ -0,0 +1,56 @@
+import copy
+import importlib
+import os
+
+import api_archive
+import mock_api
+
+
+def write_day(date_str, data):
+    fixtures = data.fixtures(date_str)
+    feed = api_archive.ApiArchive(api_archive.archive_path(date_str, "feed"), "record")
+    feed.record("/fixtures", {"date": date_str}, {"response": fixtures})
+    for f in fixtures:
+        fid = f["fixture"]["id"]
+        feed.record("/odds", {"fixture": fid}, {"response": data.odds(fid), "paging": {"current": 1, "total": 1}})
+    feed.close()
+
+    evals = api_archive.ApiArchive(api_archive.archive_path(date_str, "eval"), "record")
+    for i, f in enumerate(fixtures):
+        done = copy.deepcopy(f)
+        done["fixture"]["status"]["short"] = "FT"
+        done["goals"] = {"home": i % 3, "away": (i // 3) % 2}
+        done["score"] = {"halftime": {"home": 0, "away": 0}}
+        evals.record("/fixtures", {"id": f["fixture"]["id"]}, {"response": [done]})
+    evals.close()
+
+
+def test_backtest_grid_over_archived_days(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_archive, "ARCHIVE_DIR", tmp_path / "archive")
+    backtest = importlib.import_module("backtest")
+    fb = importlib.import_module("focus_bets")
+    knobs = {k: getattr(fb, k) for k in backtest.KNOBS[1:]}
+    data = mock_api.MockData(fixtures_per_day=60, seed=21)
+    for d in ("2030-06-01", "2030-06-02"):
+        write_day(d, data)
+
+    reads = []
+    read_archive = api_archive.read_archive
+    monkeypatch.setattr(api_archive, "read_archive", lambda p: reads.append(p) or read_archive(p))
+
+    dates = backtest.archived_dates()
+    grid = backtest.expand_grid({"th_add": [0.0, 0.1], "MAX_PER_COUNTRY": [1, 2]})
+    serial = backtest.backtest(dates, grid, workers=1, chunk=3)
+    assert len(reads) == 2 * len(dates)   # feed + eval, once per day for the whole grid
+    parallel = backtest.backtest(dates, grid, workers=2, chunk=1)
+
+    assert {k: getattr(fb, k) for k in backtest.KNOBS[1:]} == knobs
+    assert "API_ARCHIVE" not in os.environ and api_archive.active() is None
+    assert dates == ["2030-06-01", "2030-06-02"]
+    assert len(serial) == 4
+    assert serial == parallel
+    for row in serial:
+        assert row["days"] == 2 and row["tickets"] == 6
+        assert row["win"] + row["lose"] + row["pending"] == row["built"]
+        assert row["pending"] == 0
+        assert row["staked"] == row["built"]
@@ -0,0 +1,61 @@
+import importlib
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import consensus
+import mock_api
+
+
+def test_outlier_book_is_dropped_and_margin_removed():
+    prices = []
+    for book, (yes, no) in enumerate([(1.90, 1.90), (1.92, 1.88), (1.88, 1.92), (2.60, 1.50)]):
+        prices += [(7, book, "BTTS", "Yes", yes), (7, book, "BTTS", "No", no)]
+    prices.append((8, 0, "BTTS", "Yes", 1.5))   # lone quote, incomplete group
+
+    tables = consensus.consensus_tables(prices)
+
+    best, fair, books = tables[7]["BTTS"]["Yes"]
+    assert best == pytest.approx(1.92)          # 2.60 is an outlier
+    assert books == 3
+    assert fair == pytest.approx(2.0, abs=0.02)  # 1.90/1.90 books -> 50% after the margin
+    best8, fair8, _ = tables[8]["BTTS"]["Yes"]
+    assert best8 == 1.5 and math.isnan(fair8)
+
+
+def test_batch_matches_fixture_by_fixture():
+    data = mock_api.MockData(fixtures_per_day=40, seed=4)
+    focus_bets = importlib.import_module("focus_bets")
+    prices = [
+        (f["fixture"]["id"], book, mkt, val, float(odd))
+        for f in data.fixtures("2030-08-08")
+        for book, mkt, val, odd in focus_bets._iter_market_odds(data.odds(f["fixture"]["id"]), full=True)
+    ]
+    batch = consensus.consensus_tables(prices)
+    assert len(batch) == 40
+    for fid, table in batch.items():
+        one = consensus.consensus_tables([p for p in prices if p[0] == fid])[fid]
+        flat = lambda t: {(m, v): x for m, vs in t.items() for v, x in vs.items()}
+        assert flat(one).keys() == flat(table).keys()
+        for k, (best, fair, books) in flat(table).items():
+            assert flat(one)[k] == pytest.approx((best, fair, books), nan_ok=True)
+
+
+def test_fair_mode_puts_fair_price_on_legs(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "ODDS_CONSENSUS", "fair")
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=60, seed=9), per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        focus_bets._reset_caches()
+        tickets = focus_bets.build_three_tickets("2030-08-09")
+
+    legs = [L for t in tickets for L in t]
+    assert legs and all(L["fair_odd"] > 1.0 for L in legs)
+    assert all(L["fair_odd"] < focus_bets.BASE_TH[(L["market"], L["pick_name"])] + 10 * focus_bets.RELAX_ADD for L in legs)
+    assert "fair_odds" in focus_bets._ticket_json(legs)["legs"][0]
@@ -0,0 +1,147 @@
+"""Randomized differential checks: optimized paths against small reference implementations."""
+import importlib
+import itertools
+import random
+import re
+
+ROUNDS = 2000
+
+
+# ===== solver =====
+def ref_valid(fb, combo, legs_min, legs_max):
+    if not legs_min <= len(combo) <= legs_max:
+        return False
+    if len({L["fid"] for L in combo}) != len(combo):
+        return False
+    per_country = {}
+    for L in combo:
+        per_country[L["country"]] = per_country.get(L["country"], 0) + 1
+    heavy = sum(1 for L in combo if L["odd"] < 1.20)
+    return max(per_country.values()) <= fb.MAX_PER_COUNTRY and heavy <= fb.MAX_HEAVY_FAVORITES
+
+
+def ref_best_key(fb, pool, target, legs_min, legs_max):
+    best = None
+    for k in range(legs_min, min(legs_max, len(pool)) + 1):
+        for combo in itertools.combinations(pool, k):
+            prod = 1.0
+            for L in combo:
+                prod *= L["odd"]
+            if prod >= target and ref_valid(fb, combo, legs_min, legs_max):
+                key = (k, -sum(L["prio"] for L in combo))
+                best = key if best is None or key < best else best
+        if best is not None:
+            return best   # fewer legs always wins
+    return None
+
+
+def test_search_matches_reference_on_random_pools():
+    fb = importlib.import_module("focus_bets")
+    r = random.Random(41)
+    countries = ["England", "Spain", "Italy", "Serbia"]
+    for _ in range(ROUNDS):
+        n = r.randint(3, 9)
+        pool = [{"fid": r.randint(0, n), "country": r.choice(countries),
+                 "odd": round(r.uniform(1.05, 1.6), 2), "prio": r.choice([0, 1, 2])} for _ in range(n)]
+        target = round(r.uniform(1.3, 4.0), 2)
+        legs_min = r.randint(1, 3)
+        legs_max = r.randint(legs_min, 6)
+
+        res = fb._search_ticket(pool, target, set(), 0, 0, legs_min=legs_min, legs_max=legs_max)
+        want = ref_best_key(fb, pool, target, legs_min, legs_max)
+
+        assert res["complete"]
+        if want is None:
+            assert res["legs"] is None
+            continue
+        legs = res["legs"]
+        assert (len(legs), -sum(L["prio"] for L in legs)) == want
+        assert ref_valid(fb, legs, legs_min, legs_max)
+        assert fb._product([L["odd"] for L in legs]) >= target
+
+
+# ===== odds parser =====
+def variants(fb):
+    """(bet names, [(value text, expected (market, pick) or None)])."""
+    d = fb.DOC_MARKETS
+    return [
+        (d["match_winner"], [("Home", ("Match Winner", "Home")), ("1", ("Match Winner", "Home")),
+                             ("Away", ("Match Winner", "Away")), ("2", ("Match Winner", "Away")), ("Draw", None)]),
+        (d["double_chance"], [("1X", ("Double Chance", "1X")), ("x 2", ("Double Chance", "X2")),
+                              ("12", ("Double Chance", "12")), ("Home/Draw", None)]),
+        (d["btts"], [("Yes", ("BTTS", "Yes")), ("no", ("BTTS", "No")), ("Maybe", None)]),
+        (d["ou"], [("Over 1.5", ("Over/Under", "Over 1.5")), ("over 2.5", ("Over/Under", "Over 2.5")),
+                   ("Under3.5", ("Over/Under", "Under 3.5")), ("Over1.5", ("Over/Under", "Over 1.5")),
+                   ("Under 2.5", None), ("Over 4.5", None)]),
+        (d["ou_1st"], [("Over 0.5", ("1st Half Goals", "Over 0.5")), ("Under 0.5", None)]),
+        (d["ttg_home"], [("Over 0.5", ("Home Team Goals", "Over 0.5")), ("Over 1.5", None)]),
+        (["Away Team Total Goals", "Away Team - Total Goals"], [("Over 0.5", ("Away Team Goals", "Over 0.5"))]),
+        (d["ttg_generic"], [("Home Over 0.5", ("Home Team Goals", "Over 0.5")),
+                            ("Away Over 0.5", ("Away Team Goals", "Over 0.5")), ("Home Under 0.5", None)]),
+        (["Corners Over/Under", "Asian Handicap", "Cards Over/Under"], [("Over 1.5", None), ("Home", None)]),
+    ]
+
+
+def test_best_market_odds_matches_reference_on_random_payloads():
+    fb = importlib.import_module("focus_bets")
+    r = random.Random(42)
+    table = variants(fb)
+    for _ in range(ROUNDS):
+        expected = {}
+        books = []
+        for b in range(r.randint(0, 5)):
+            bets = []
+            for names, values in r.sample(table, r.randint(0, len(table))):
+                vals = []
+                for text, want in r.sample(values, r.randint(1, len(values))):
+                    odd = r.choice([round(r.uniform(1.01, 6.0), 2), str(round(r.uniform(1.01, 6.0), 2)), "N/A"])
+                    vals.append({"value": text, "odd": odd})
+                    if want is not None and odd != "N/A":
+                        expected[want] = max(expected.get(want, 0.0), float(odd))
+                bets.append({"name": r.choice(sorted(names)), "values": vals})
+            books.append({"id": b, "bets": bets})
+
+        got = fb.best_market_odds([{"bookmakers": books}])
+
+        assert {(m, p): o for m, v in got.items() for p, o in v.items()} == expected
+
+
+# ===== leg_hit =====
+def ref_hit(market, pick, status, hg, ag, hth, hta):
+    if status not in {"FT", "AET", "PEN", "WO", "AWD"}:
+        return False
+
+    def line(total, text):
+        m = re.fullmatch(r"(Over|Under) (\d+(?:\.\d+)?)", text)
+        if not m:
+            return False
+        return total > float(m.group(2)) if m.group(1) == "Over" else total < float(m.group(2))
+
+    return {
+        ("Match Winner", "Home"): hg > ag, ("Match Winner", "Away"): ag > hg,
+        ("Double Chance", "1X"): hg >= ag, ("Double Chance", "X2"): ag >= hg, ("Double Chance", "12"): hg != ag,
+        ("BTTS", "Yes"): hg > 0 and ag > 0, ("BTTS", "No"): not (hg > 0 and ag > 0),
+    }.get((market, pick), {
+        "Over/Under": line(hg + ag, pick), "1st Half Goals": line(hth + hta, pick),
+        "Home Team Goals": line(hg, pick), "Away Team Goals": line(ag, pick),
+    }.get(market, False))
+
+
+def test_leg_hit_matches_reference_on_random_scores():
+    ev = importlib.import_module("evaluate_results")
+    r = random.Random(43)
+    picks = {
+        "Match Winner": ["Home", "Away", "Draw"], "Double Chance": ["1X", "X2", "12", "21"],
+        "BTTS": ["Yes", "No"], "Over/Under": ["Over 1.5", "Over 2.5", "Under 3.5", "Under 2", "Over", "Sideways 1.5"],
+        "1st Half Goals": ["Over 0.5", "Under 1.5"], "Home Team Goals": ["Over 0.5", "Under 1.5"],
+        "Away Team Goals": ["Over 0.5"], "Corners": ["Over 9.5"],
+    }
+    for _ in range(ROUNDS * 3):
+        market = r.choice(sorted(picks))
+        pick = r.choice(picks[market])
+        status = r.choice(["FT", "FT", "AET", "PEN", "WO", "AWD", "NS", "1H", "CANC", "PST"])
+        hg, ag = r.randint(0, 5), r.randint(0, 5)
+        hth, hta = r.randint(0, hg), r.randint(0, ag)
+        res = {"status": status, "home_goals": hg, "away_goals": ag, "halftime_home": hth, "halftime_away": hta}
+        assert ev.leg_hit({"market": market, "pick": pick}, res) == ref_hit(market, pick, status, hg, ag, hth, hta), \
+            (market, pick, res)
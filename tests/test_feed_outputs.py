@@ -0,0 +1,43 @@
+import importlib
+import json
+
+import pytest
+
+
+def leg(fid, kickoff):
+    return {
+        "fid": fid, "league": "England — Premier League", "teams": "A vs B",
+        "time": f"build-time • {fid}", "kickoff": kickoff,
+        "market": "BTTS", "pick_name": "Yes", "odd": 1.4, "prio": 2,
+    }
+
+
+def test_one_build_publishes_every_timezone_and_locale(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path)
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "FEED_OUTPUTS", "Europe/London=en_GB,America/New_York=en_US")
+    tickets = [[leg(1, "2030-11-11T19:45:00+00:00"), leg(2, "2030-11-11T12:00:00+00:00")], [], []]
+
+    focus_bets.write_pages("2030-11-11", tickets)
+
+    root = json.loads((tmp_path / "2plus.json").read_text())
+    uk = json.loads((tmp_path / "Europe" / "London" / "2plus.json").read_text())
+    us = json.loads((tmp_path / "America" / "New_York" / "2plus.json").read_text())
+    assert root["ticket"]["legs"][0]["time"] == "build-time • 1"   # default feed unchanged
+    assert [L["time"] for L in uk["ticket"]["legs"]] == ["11/11/2030 19:45 • 1", "11/11/2030 12:00 • 2"]
+    assert us["ticket"]["legs"][0]["time"] == "11/11/2030 02:45 PM • 1"
+    assert us["timezone"] == "America/New_York" and us["locale"] == "en_US"
+    assert uk["ticket"]["total_odds"] == root["ticket"]["total_odds"]
+    assert (tmp_path / "Europe" / "London" / "daily_log.json").exists()
+    assert not (tmp_path / "Europe" / "London" / "feed_snapshot.json").exists()
+
+
+def test_unknown_locale_or_timezone_fails_fast(monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "FEED_OUTPUTS", "Europe/London=en-GB")
+    with pytest.raises(ValueError, match="en-GB"):
+        focus_bets._feed_outputs()
+    monkeypatch.setattr(focus_bets, "FEED_OUTPUTS", "Europe/Londn=en_GB")
+    with pytest.raises(Exception):
+        focus_bets._feed_outputs()
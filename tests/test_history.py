@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import history
+
+
+def _day(date, results):
+    return [{"name": n, "total_odds": o, "result": r, "legs": 3, "hit": 3 if r == "win" else 1}
+            for n, o, r in results]
+
+
+def test_pages_fill_in_order_and_carry_running_aggregates(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_PAGE_SIZE", 4)
+    root = tmp_path / "history"
+
+    history.record_open(root, "2030-03-01", [{"name": "2plus", "total_odds": 2.1, "legs": 3},
+                                             {"name": "3plus", "total_odds": 0, "legs": 0}])
+    assert [o["name"] for o in history.load_index(root)["open"]] == ["2plus"]
+
+    day1 = _day("2030-03-01", [("2plus", 2.0, "win"), ("3plus", 3.0, "lose"), ("4plus", 4.0, "pending")])
+    assert history.append_settled(root, "2030-03-01", day1) == ["2030-03-01/2plus", "2030-03-01/3plus"]
+    assert history.append_settled(root, "2030-03-01", day1) == []   # evening reruns are idempotent
+    day1[2]["result"] = "win"
+    assert history.append_settled(root, "2030-03-01", day1) == ["2030-03-01/4plus"]
+    history.append_settled(root, "2030-03-02", _day("2030-03-02", [("2plus", 2.0, "lose"), ("3plus", 3.0, "lose")]))
+
+    index = history.load_index(root)
+    assert index["total"] == 5 and index["pages"] == 2 and index["open"] == []
+    assert index["aggregate"]["wins"] == 2 and index["aggregate"]["hit_rate"] == 0.4
+    assert index["aggregate"]["roi"] == pytest.approx((6.0 - 5.0) / 5.0)
+
+    page0 = json.loads((root / "page-0000.json").read_text())["entries"]
+    assert [e["n"] for e in page0] == [1, 2, 3, 4]
+    assert page0[0]["roi"] == 1.0 and page0[2]["date"] == "2030-03-01"
+    assert [e["n"] for e in history.read_pages(root, last=1)] == [5]
+    assert history.read_pages(root)[-1]["roi"] == index["aggregate"]["roi"]
+
+
+def test_open_tickets_carry_over_and_late_reruns_do_not_duplicate(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_PAGE_SIZE", 2)
+    root = tmp_path / "history"
+
+    history.record_open(root, "2030-03-01", [{"name": "2plus", "total_odds": 2.0, "legs": 3},
+                                             {"name": "3plus", "total_odds": 3.0, "legs": 3}])
+    day1 = _day("2030-03-01", [("2plus", 2.0, "win"), ("3plus", 3.0, "pending")])
+    history.append_settled(root, "2030-03-01", day1)
+    history.record_open(root, "2030-03-02", [{"name": "2plus", "total_odds": 2.2, "legs": 3}])
+    history.record_open(root, "2030-03-02", [{"name": "2plus", "total_odds": 2.1, "legs": 3}])   # morning rerun
+    assert [(o["date"], o["name"], o["odds"]) for o in history.load_index(root)["open"]] == [
+        ("2030-03-01", "3plus", 3.0), ("2030-03-02", "2plus", 2.1)]
+
+    for d in ("2030-03-02", "2030-03-03", "2030-03-04"):
+        history.append_settled(root, d, _day(d, [("2plus", 2.0, "lose")]))
+    # days later the first evening runs again: the pages already hold 2030-03-01/2plus
+    day1[1]["result"] = "lose"
+    assert history.append_settled(root, "2030-03-01", day1) == ["2030-03-01/3plus"]
+    assert history.append_settled(root, "2030-03-01", day1) == []
+    history.record_open(root, "2030-03-01", [{"name": "2plus", "total_odds": 2.0, "legs": 3}])
+
+    index = history.load_index(root)
+    assert index["total"] == 5 and index["open"] == [] and "recent" not in index
+    assert [e["n"] for e in history.read_pages(root)] == [1, 2, 3, 4, 5]
@@ -1,16 +1,13 @@
 import importlib
 import json
-import sys
-from pathlib import Path
 
 import pytest
 
-sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-
-@pytest.fixture(autouse=True)
-def ensure_api_key(monkeypatch):
-    monkeypatch.setenv("API_FOOTBALL_KEY", "test-key")
+def batched(fake_fetch):
+    def fetch_many(fids):
+        return {fid: fake_fetch(fid) for fid in fids}
+    return fetch_many
 
 
 def sample_legs():
@@ -86,6 +83,7 @@ def test_evening_evaluation_from_snapshot(tmp_path, monkeypatch):
 
     evaluate_results = importlib.import_module("evaluate_results")
     evaluate_results.PUBLIC = out_dir
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
 
     def fake_fetch(fid):
         return {
@@ -94,7 +92,7 @@ def test_evening_evaluation_from_snapshot(tmp_path, monkeypatch):
             103: {"status": "NS", "home_goals": None, "away_goals": None},
         }[fid]
 
-    monkeypatch.setattr(evaluate_results, "fetch_fixture_result", fake_fetch)
+    monkeypatch.setattr(evaluate_results, "fetch_fixture_results", batched(fake_fetch))
 
     evaluate_results.main()
 
@@ -154,6 +152,7 @@ def test_ticket_eval_loss_file(tmp_path, monkeypatch):
 
     evaluate_results = importlib.import_module("evaluate_results")
     evaluate_results.PUBLIC = out_dir
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
 
     def fake_fetch(fid):
         return {
@@ -162,7 +161,7 @@ def test_ticket_eval_loss_file(tmp_path, monkeypatch):
             103: {"status": "FT", "home_goals": 0, "away_goals": 3},
         }[fid]
 
-    monkeypatch.setattr(evaluate_results, "fetch_fixture_result", fake_fetch)
+    monkeypatch.setattr(evaluate_results, "fetch_fixture_results", batched(fake_fetch))
 
     evaluate_results.main()
 
@@ -234,6 +233,7 @@ def test_evening_evaluation_extended_markets(tmp_path, monkeypatch):
 
     evaluate_results = importlib.import_module("evaluate_results")
     evaluate_results.PUBLIC = out_dir
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
 
     def fake_fetch(fid):
         data = {
@@ -268,7 +268,7 @@ def test_evening_evaluation_extended_markets(tmp_path, monkeypatch):
         }
         return data[fid]
 
-    monkeypatch.setattr(evaluate_results, "fetch_fixture_result", fake_fetch)
+    monkeypatch.setattr(evaluate_results, "fetch_fixture_results", batched(fake_fetch))
 
     evaluate_results.main()
 
@@ -283,3 +283,56 @@ def test_evening_evaluation_extended_markets(tmp_path, monkeypatch):
     assert results["Home Team Goals"] is True
     assert results["Away Team Goals"] is False
     assert results["Over/Under"] is True
+
+
+def test_incremental_evaluation_only_fetches_unsettled_legs(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    out_dir = tmp_path / "public"
+    focus_bets.OUT_DIR = out_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    legs = sample_legs()
+    focus_bets.write_pages("2024-04-01", [legs[:2], [legs[2]], []])
+
+    evaluate_results = importlib.import_module("evaluate_results")
+    evaluate_results.PUBLIC = out_dir
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
+
+    results = {
+        101: {"status": "FT", "home_goals": 2, "away_goals": 0},
+        102: {"status": "2H", "home_goals": 1, "away_goals": 1},
+        103: {"status": "NS", "home_goals": None, "away_goals": None},
+    }
+    calls = []
+    batches = []
+
+    def fake_fetch(fid):
+        calls.append(fid)
+        return dict(results[fid])
+
+    def fetch_many(fids):
+        batches.append(sorted(fids))
+        return batched(fake_fetch)(fids)
+
+    monkeypatch.setattr(evaluate_results, "fetch_fixture_results", fetch_many)
+
+    evaluate_results.main()
+    assert sorted(calls) == [101, 102, 103]
+    assert batches == [[101, 102, 103]]
+
+    calls.clear()
+    eval_2plus = out_dir / "eval_2plus.json"
+    eval_4plus = out_dir / "eval_4plus.json"
+    before = eval_4plus.stat().st_mtime_ns
+    results[102] = {"status": "FT", "home_goals": 2, "away_goals": 1}
+
+    evaluate_results.main()
+
+    assert sorted(calls) == [102, 103]
+    assert eval_4plus.stat().st_mtime_ns == before
+    with eval_2plus.open("r", encoding="utf-8") as fh:
+        assert json.load(fh)["ticket_result"] == "win"
+
+    calls.clear()
+    evaluate_results.main()
+    assert calls == [103]
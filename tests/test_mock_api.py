@@ -0,0 +1,53 @@
+import importlib
+import json
+
+import pytest
+
+import mock_api
+
+
+@pytest.fixture
+def server():
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=30, seed=7), error_rate=0.1, rate_429=0.1, retry_after=0, per_minute=100000, seed=7)
+    with mock_api.MockServer(state) as srv:
+        yield srv
+
+
+def test_focus_bets_survives_429_and_5xx(server, tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "BASE_URL", server.url)
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets.time, "sleep", lambda s: None)
+
+    out = focus_bets.run("2030-01-15")
+
+    assert out == {"date": "2030-01-15", "tickets_count": 3}
+    snap = json.loads((tmp_path / "public" / "feed_snapshot.json").read_text(encoding="utf-8"))
+    assert any(t["legs"] for t in snap["tickets"])
+    assert server.state.hits["/odds"] > 0
+    assert server.state.used < sum(server.state.hits.values())  # some requests were rejected and retried
+
+
+def test_odds_pagination_is_followed(server, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "BASE_URL", server.url)
+    monkeypatch.setattr(focus_bets.time, "sleep", lambda s: None)
+    monkeypatch.setattr(mock_api, "ODDS_PAGE_SIZE", 1)
+    base = server.state.data.odds(4242)[0]
+    monkeypatch.setattr(server.state.data, "odds", lambda fid: [base, base, base])
+
+    assert len(focus_bets.odds_by_fixture(4242)) == 3
+
+
+def test_evaluate_reads_results_from_mock(server, monkeypatch):
+    evaluate_results = importlib.import_module("evaluate_results")
+    monkeypatch.setattr(evaluate_results, "BASE_URL", server.url)
+    monkeypatch.setattr(evaluate_results, "API_KEY", "test-key")
+    monkeypatch.setattr(evaluate_results.time, "sleep", lambda s: None)
+    fx = server.state.data.fixtures("2020-03-01")[0]
+
+    res = evaluate_results.fetch_fixture_result(fx["fixture"]["id"])
+
+    assert res["status"] == "FT"
+    assert res["home_goals"] == fx["goals"]["home"]
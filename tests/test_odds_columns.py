@@ -0,0 +1,83 @@
+import importlib
+
+import pytest
+
+import mock_api
+import odds_columns
+
+
+def test_append_days_and_read_back_through_mmap(tmp_path):
+    root = tmp_path / "cols"
+    day1 = [(11, 39, "England", "BTTS", "Yes", 1.35, 4), (11, 39, "England", "Over/Under", "Over 1.5", 1.12, 5)]
+    day2 = [(22, 61, "France", "Corners", "Over 9.5", 1.8, 2)]
+
+    assert odds_columns.append_day(root, "2030-01-01", day1) == 2
+    assert odds_columns.append_day(root, "2030-01-02", day2) == 1
+    assert odds_columns.append_day(root, "2030-01-01", day1) == 0   # already archived
+
+    with odds_columns.OddsColumns(root) as oc:
+        assert len(oc) == 3
+        rows = list(oc.rows())
+        assert [r["fid"] for r in rows] == [11, 11, 22]
+        assert rows[2]["market"] == "Corners" and rows[2]["country"] == "France"
+        assert list(oc.column("date", "2030-01-02")) == [20300102]
+        assert oc.column("odd")[0] == pytest.approx(1.35)
+        assert odds_columns.summary(oc, end="2030-01-01")["rows"] == 2
+
+    with odds_columns.OddsColumns(tmp_path / "empty") as oc:
+        assert len(oc) == 0 and list(oc.rows()) == []
+
+
+def test_morning_run_appends_candidate_table(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "ODDS_COLUMNS_DIR", str(tmp_path / "cols"))
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=30, seed=5), per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        focus_bets.run("2030-02-02")
+
+    with odds_columns.OddsColumns(tmp_path / "cols") as oc:
+        fids = set(oc.column("fid"))
+        assert len(fids) == state.hits["/odds"]
+        assert all(b >= 1 for b in oc.column("books"))
+        assert set(oc.column("date")) == {20300202}
+
+
+def test_days_stay_in_order_and_a_torn_append_is_ignored(tmp_path):
+    root = tmp_path / "cols"
+    odds_columns.append_day(root, "2030-01-02", [(22, 61, "France", "BTTS", "Yes", 1.8, 2)])
+    with pytest.raises(ValueError):
+        odds_columns.append_day(root, "2030-01-01", [(11, 39, "England", "BTTS", "No", 1.3, 4)])
+
+    # an append that died after writing part of a record, before days.json
+    with open(root / "odd.col", "ab") as f:
+        f.write(b"\x00\x01")
+    with open(root / "fid.col", "ab") as f:
+        f.write(b"\x07" * 11)
+    with odds_columns.OddsColumns(root) as oc:
+        assert len(oc) == 1 and [r["fid"] for r in oc.rows()] == [22]
+
+    assert odds_columns.append_day(root, "2030-01-03", [(33, 39, "England", "BTTS", "No", 1.3, 4)]) == 1
+    with odds_columns.OddsColumns(root) as oc:
+        assert [r["fid"] for r in oc.rows("2030-01-03")] == [33]
+        assert list(oc.column("date")) == [20300102, 20300103]
+
+
+def test_an_out_of_order_archive_day_does_not_block_the_publish(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "ODDS_COLUMNS_DIR", str(tmp_path / "cols"))
+    odds_columns.append_day(tmp_path / "cols", "2030-02-03", [(22, 61, "France", "BTTS", "Yes", 1.8, 2)])
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=30, seed=5), per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        focus_bets.run("2030-02-02")
+
+    assert (tmp_path / "public" / "feed_snapshot.json").exists()
+    with odds_columns.OddsColumns(tmp_path / "cols") as oc:
+        assert len(oc) == 1
@@ -0,0 +1,86 @@
+import importlib
+import json
+
+
+def test_tracker_writes_only_deltas_and_rebuilds_history(tmp_path):
+    odds_tracker = importlib.import_module("odds_tracker")
+    path = tmp_path / "odds" / "2024-04-01.jsonl"
+
+    tr = odds_tracker.OddsTracker(path)
+    assert tr.observe(101, {"BTTS": {"Yes": 1.40, "No": 2.60}}, ts=1.0) == 2
+    assert tr.observe(101, {"BTTS": {"Yes": 1.40, "No": 2.60}}, ts=2.0) == 0
+    assert tr.observe(101, {"BTTS": {"Yes": 1.45}}, ts=3.0) == 2
+    assert tr.observe(101, {"BTTS": {"Yes": 1.42}}, ts=4.0) == 1
+
+    lines = [json.loads(x) for x in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 5
+    assert [3.0, 101, "BTTS", "No", None] in lines
+
+    again = odds_tracker.OddsTracker(path)
+    assert again.current(101) == {"BTTS": {"Yes": 1.42}}
+    assert again.history(101, "BTTS", "Yes") == [(1.0, 1.40), (3.0, 1.45)]
+    assert again.best_price(101, "BTTS", "Yes") == (3.0, 1.45)
+    assert again.best_price(101, "BTTS", "Maybe") is None
+
+
+def test_a_torn_last_line_is_dropped_before_the_next_append(tmp_path):
+    odds_tracker = importlib.import_module("odds_tracker")
+    path = tmp_path / "odds" / "2024-04-01.jsonl"
+    odds_tracker.OddsTracker(path).observe(101, {"BTTS": {"Yes": 1.40}}, ts=1.0)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('[2.0,101,"BTTS","Y')
+
+    tr = odds_tracker.OddsTracker(path)
+    assert tr.current(101) == {"BTTS": {"Yes": 1.40}}
+    tr.observe(101, {"BTTS": {"Yes": 1.50}}, ts=3.0)
+    assert odds_tracker.OddsTracker(path).current(101) == {"BTTS": {"Yes": 1.50}}
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_tracking_follows_a_moved_kickoff_and_writes_to_state(tmp_path, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    import mock_api
+
+    focus_bets = importlib.import_module("focus_bets")
+    odds_tracker = importlib.import_module("odds_tracker")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+
+    clock = {"t": datetime(2030, 9, 9, 8, tzinfo=timezone.utc).timestamp()}
+    data = mock_api.MockData(fixtures_per_day=6, seed=3)
+    data.clock = lambda: clock["t"]
+    fixture, odds = data._fixture, data.odds
+    moved = {}
+
+    def maybe_moved(date_str, i):
+        out = fixture(date_str, i)
+        fid = out["fixture"]["id"]
+        if fid in moved and clock["t"] >= moved[fid] - 1800:   # announced half an hour before kickoff
+            ko = datetime.fromtimestamp(moved[fid], timezone.utc) + timedelta(hours=3)
+            out["fixture"]["timestamp"], out["fixture"]["date"] = int(ko.timestamp()), ko.isoformat()
+        return out
+
+    sampled = {}
+
+    def odds_seen(fid):
+        sampled.setdefault(fid, []).append(clock["t"])
+        return odds(fid)
+
+    data._fixture, data.odds = maybe_moved, odds_seen
+    first = min((fixture("2030-09-09", i) for i in range(6)), key=lambda f: f["fixture"]["timestamp"])
+    fid = first["fixture"]["id"]
+    moved[fid] = first["fixture"]["timestamp"]
+
+    def sleep(s):
+        clock["t"] += s
+
+    state = mock_api.MockState(data, per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        out = odds_tracker.track("2030-09-09", clock=lambda: clock["t"], sleep=sleep)
+
+    assert max(sampled[fid]) > moved[fid]   # still priced after its original kickoff
+    assert max(sampled[fid]) < moved[fid] + 3 * 3600
+    assert out["file"] == str(tmp_path / "state" / "odds" / "2030-09-09.jsonl")
+    assert not (tmp_path / "public" / "odds").exists()
@@ -0,0 +1,73 @@
+"""Timing gate for the hot paths, in units of a fixed pure-Python calibration loop.
+
+    PERF_RECORD=1 python -m pytest tests/test_perf_gate.py   # rewrite perf_baselines.json, then commit it
+
+A case fails when it is slower than its baseline by more than PERF_TOLERANCE
+(fraction, default 1.0 = twice as slow), so only real regressions trip it. The
+baselines are committed; a missing file or case fails instead of being written.
+"""
+import importlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+import mock_api
+
+BASELINES = Path(__file__).with_name("perf_baselines.json")
+TOLERANCE = float(os.getenv("PERF_TOLERANCE", "1.0"))
+RECORD = os.getenv("PERF_RECORD") == "1"
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def calibration():
+    acc = 0
+    for i in range(200_000):
+        acc += (i * i) % 7
+    return acc
+
+
+def cases():
+    fb = importlib.import_module("focus_bets")
+    ev = importlib.import_module("evaluate_results")
+    pools = []
+    for seed in range(10):
+        r = random.Random(seed)
+        pools.append([{"fid": i, "country": r.choice(["England", "Spain", "Italy", "Serbia", "Norway"]),
+                       "odd": round(r.uniform(1.05, 1.45), 2), "prio": r.choice([1, 2])} for i in range(120)])
+    r = random.Random(7)
+    data = mock_api.MockData(fixtures_per_day=200, seed=7)
+    payloads = [data.odds(f["fixture"]["id"]) for f in data.fixtures("2030-12-12")]
+    results = [{"status": "FT", "home_goals": r.randint(0, 4), "away_goals": r.randint(0, 4),
+                "halftime_home": 0, "halftime_away": 1} for _ in range(200)]
+    legs = [{"market": m, "pick": p} for m, p in fb.BASE_TH]
+    return {
+        "search_ticket_10x120": lambda: [fb._search_ticket(pool, 6.0, set(), 0, 0) for pool in pools],
+        "best_market_odds_200": lambda: [fb.best_market_odds(p) for p in payloads],
+        "leg_hit_2600": lambda: [ev.leg_hit(L, res) for res in results for L in legs],
+    }
+
+
+def test_hot_paths_stay_within_recorded_baselines():
+    unit = best_of(calibration)
+    measured = {name: round(best_of(fn) / unit, 3) for name, fn in cases().items()}
+    if RECORD:
+        BASELINES.write_text(json.dumps(measured, indent=2, sort_keys=True) + "\n")
+        pytest.skip(f"recorded baselines: {measured}")
+    assert BASELINES.exists(), f"{BASELINES.name} missing; record it with PERF_RECORD=1 and commit it"
+    baselines = json.loads(BASELINES.read_text())
+    missing = sorted(set(measured) - set(baselines))
+    assert not missing, f"no baseline for {missing}; record with PERF_RECORD=1 and commit {BASELINES.name}"
+    slow = {k: (v, baselines[k]) for k, v in measured.items() if v > baselines[k] * (1 + TOLERANCE)}
+    assert not slow, f"slower than baseline x{1 + TOLERANCE:g} (measured, baseline): {slow}"
@@ -0,0 +1,63 @@
+import importlib
+import json
+
+import mock_api
+
+
+def fixture(fid, country, league_id=39, name="League", kickoff=10_000):
+    return {
+        "fixture": {"id": fid, "timestamp": kickoff, "status": {"short": "NS"}},
+        "league": {"id": league_id, "country": country, "name": name},
+    }
+
+
+def test_rank_fixtures_drops_started_and_defers_dead_leagues_and_crowded_countries(monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "MAX_PER_COUNTRY", 1)
+    monkeypatch.setattr(focus_bets, "TARGETS", [2.0])
+    fixtures = [
+        fixture(1, "England"),
+        fixture(2, "England"),
+        fixture(3, "Norway", league_id=103),
+        fixture(4, "Sweden", league_id=113),
+        fixture(5, "England", kickoff=1_000),  # kicks off before publication
+    ]
+    stats = {"113": {"seen": 40, "hits": 0}, "103": {"seen": 40, "hits": 30}}
+
+    ranked = focus_bets.rank_fixtures(fixtures, now_ts=0.0 + 1_000, stats=stats)
+
+    assert [f["fixture"]["id"] for f in ranked] == [1, 3, 2, 4]
+
+
+def test_lazy_prefilter_fetches_fewer_odds_than_fixtures(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "PREFILTER", True)
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=150, seed=11), per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        focus_bets._reset_caches()
+        tickets = focus_bets.build_three_tickets("2030-05-05")
+
+    assert all(tickets)
+    assert state.hits["/fixtures"] == 1
+    assert state.hits["/odds"] < 150
+    stats = json.loads((tmp_path / "state" / "league_stats.json").read_text())
+    assert stats and not (tmp_path / "public" / "league_stats.json").exists()
+
+    # a rerun of the same day does not count its fixtures again
+    focus_bets._update_league_stats("2030-05-05", focus_bets._FIXTURES_CACHE["2030-05-05"])
+    assert json.loads((tmp_path / "state" / "league_stats.json").read_text()) == stats
+
+    # but a fixture of an already counted league priced only by the rerun is counted
+    counted = {fid for s in stats.values() for fid in s["fids"]}
+    extra = next(f for f in focus_bets._FIXTURES_CACHE["2030-05-05"]
+                 if f["fixture"]["id"] not in counted and str(f["league"]["id"]) in stats)
+    fid, lid = extra["fixture"]["id"], str(extra["league"]["id"])
+    focus_bets._SEEN_FIDS.add(fid)
+    focus_bets._ODDS_CACHE[fid] = {}
+    focus_bets._update_league_stats("2030-05-05", focus_bets._FIXTURES_CACHE["2030-05-05"])
+    after = json.loads((tmp_path / "state" / "league_stats.json").read_text())
+    assert after[lid]["seen"] == stats[lid]["seen"] + 1 and fid in after[lid]["fids"]
@@ -0,0 +1,68 @@
+import importlib
+import json
+from datetime import datetime, timezone
+
+import mock_api
+
+
+def _leg(fid, odd, country, prio=0):
+    return {"fid": fid, "odd": odd, "country": country, "prio": prio}
+
+
+def test_search_keeps_pinned_legs_and_completes_the_ticket():
+    focus_bets = importlib.import_module("focus_bets")
+    pinned = [_leg(1, 1.2, "England", 1), _leg(2, 1.25, "England", 1)]
+    pool = [_leg(3, 1.3, "England", 1), _leg(4, 1.1, "Spain"), _leg(5, 1.35, "Italy"), pinned[0]]
+    res = focus_bets._search_ticket(pool, 2.0, set(), 0, 0, legs_min=3, legs_max=5, pinned=pinned)
+    assert [L["fid"] for L in res["legs"][:2]] == [1, 2]
+    assert {L["fid"] for L in res["legs"][2:]} == {5}   # a third English leg would break MAX_PER_COUNTRY
+    assert res["complete"] and res["lower_bound"] == 3
+
+
+def test_refresh_refetches_only_changed_fixtures_and_keeps_unaffected_legs(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    out_dir = tmp_path / "public"
+    out_dir.mkdir()
+    monkeypatch.setattr(focus_bets, "OUT_DIR", out_dir)
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "DEBUG", False)
+
+    day = datetime(2030, 9, 20, tzinfo=timezone.utc).timestamp()
+    data = mock_api.MockData(fixtures_per_day=60, seed=21)
+    data.clock = lambda: day
+    state = mock_api.MockState(data, per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        focus_bets.run("2030-09-20")
+        morning = json.loads((tmp_path / "state" / "run_state.json").read_text())
+        assert not (out_dir / "run_state.json").exists()   # never deployed to Pages
+        legs = {L["fid"]: L for t in morning["tickets"] for L in t}
+        hits = dict(state.hits)
+
+        # nothing moved: one fixtures call, the published legs re-priced, tickets untouched
+        out = focus_bets.refresh("2030-09-20", now_ts=day)
+        assert state.hits["/fixtures"] - hits["/fixtures"] == 1
+        assert state.hits["/odds"] - hits["/odds"] == len(legs)
+        assert out["changed_fixtures"] == 0 and out["legs_replaced"] == 0
+        assert json.loads((tmp_path / "state" / "run_state.json").read_text())["tickets"] == morning["tickets"]
+
+        # mid-afternoon: early legs have kicked off (some already final) and get replaced
+        kickoffs = sorted(datetime.fromisoformat(L["kickoff"]).timestamp() for L in legs.values())
+        now = kickoffs[len(kickoffs) // 2]
+        data.clock = lambda: now
+        hits = dict(state.hits)
+        out = focus_bets.refresh("2030-09-20", now_ts=now)
+        after = json.loads((tmp_path / "state" / "run_state.json").read_text())
+
+    later = now + focus_bets.KICKOFF_MARGIN_MIN * 60
+    assert out["changed_fixtures"] > 0 and out["legs_replaced"] > 0
+    assert state.hits["/fixtures"] - hits["/fixtures"] == 1
+    assert state.hits["/odds"] - hits["/odds"] == out["odds_refetched"] < len(morning["odds"])
+    for old, new in zip(morning["tickets"], after["tickets"]):
+        kept = [L["fid"] for L in old if datetime.fromisoformat(L["kickoff"]).timestamp() > later]
+        assert [L["fid"] for L in new][:len(kept)] == kept
+        assert all(datetime.fromisoformat(L["kickoff"]).timestamp() > later for L in new)
+        if new:
+            assert focus_bets._product([L["odd"] for L in new]) >= 2.0
+    published = json.loads((out_dir / "2plus.json").read_text())["ticket"]["legs"]
+    assert [L["fid"] for L in published] == [L["fid"] for L in after["tickets"][0]]
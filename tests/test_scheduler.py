@@ -0,0 +1,149 @@
+import importlib
+import json
+from datetime import datetime, timezone
+
+import mock_api
+
+
+class FakeClock:
+    def __init__(self, start):
+        self.t = start
+
+    def now(self):
+        return self.t
+
+    def sleep(self, s):
+        self.t += s
+
+
+def test_matchday_timeline_refreshes_and_settles_each_leg_once(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    evaluate_results = importlib.import_module("evaluate_results")
+    scheduler = importlib.import_module("scheduler")
+    out_dir = tmp_path / "public"
+    out_dir.mkdir()
+    monkeypatch.setattr(focus_bets, "OUT_DIR", out_dir)
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(evaluate_results, "PUBLIC", out_dir)
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(scheduler, "SETTLE_AFTER_MIN", 120)   # mock games are final 115 min after kickoff
+
+    clock = FakeClock(datetime(2030, 9, 9, tzinfo=timezone.utc).timestamp())
+    data = mock_api.MockData(fixtures_per_day=60, seed=12)
+    data.clock = clock.now
+    state = mock_api.MockState(data, per_minute=100000)
+    published = []
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        monkeypatch.setattr(evaluate_results, "BASE_URL", srv.url)
+        s = scheduler.Scheduler("2030-09-09", clock=clock.now, sleep=clock.sleep, on_publish=published.append)
+        summary = s.run()
+        odds_after_build = state.hits["/odds"] - summary["odds_calls"]
+
+    legs = {L["fid"] for t in s.tickets for L in t}
+    kickoffs = {s.kickoff[fid] for fid in legs}
+    times = [when for when, _, _ in s.log]
+    assert times == sorted(times)
+    assert summary["odds_calls"] == len(legs)
+    assert summary["settled"] == len(legs)
+    assert summary["result_calls"] == len(kickoffs)
+    refreshes = [fids for _, kind, fids in s.log if kind == "refresh"]
+    assert summary["fixtures_calls"] == len(refreshes) > 0
+    assert state.hits["/fixtures"] == 1 + len(kickoffs) + len(refreshes)
+    assert json.loads((tmp_path / "state" / "run_state.json").read_text())["tickets"] == s.tickets
+    assert odds_after_build > 0 and published[0] == "build"
+
+    evaluation = json.loads((out_dir / "evaluation.json").read_text())
+    assert all(L["result"]["status"] == "FT" for t in evaluation["tickets"] for L in t["legs"])
+
+
+def test_refresh_replaces_a_postponed_leg_and_follows_its_replacement(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    evaluate_results = importlib.import_module("evaluate_results")
+    scheduler = importlib.import_module("scheduler")
+    out_dir = tmp_path / "public"
+    out_dir.mkdir()
+    monkeypatch.setattr(focus_bets, "OUT_DIR", out_dir)
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(evaluate_results, "PUBLIC", out_dir)
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(scheduler, "SETTLE_AFTER_MIN", 120)
+
+    clock = FakeClock(datetime(2030, 9, 9, tzinfo=timezone.utc).timestamp())
+    data = mock_api.MockData(fixtures_per_day=60, seed=12)
+    data.clock = clock.now
+    postponed = set()
+    fixture = data._fixture
+
+    def with_postponed(date_str, i):
+        out = fixture(date_str, i)
+        if out["fixture"]["id"] in postponed:
+            out["fixture"]["status"]["short"] = "PST"
+        return out
+
+    data._fixture = with_postponed
+    state = mock_api.MockState(data, per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        monkeypatch.setattr(evaluate_results, "BASE_URL", srv.url)
+        s = scheduler.Scheduler("2030-09-09", clock=clock.now, sleep=clock.sleep)
+        s.start()
+        first = {L["fid"]: L for L in s.tickets[0]}
+        gone = max(first, key=lambda fid: s.kickoff[fid])   # the last kickoff still has its refresh job
+        postponed.add(gone)
+        # half the other fixtures were postponed after the morning build; only a re-read shows it
+        on_tickets = {L["fid"] for t in s.tickets for L in t}
+        postponed.update(fid for fid in s.fixtures if fid not in on_tickets and fid % 2 == 0)
+        while s.timeline:   # run() without its start()
+            when, _, kind, fids = scheduler.heapq.heappop(s.timeline)
+            clock.t = max(clock.t, when)
+            getattr(s, kind)(fids)
+            s.log.append((when, kind, fids))
+            if gone in fids and kind == "refresh":
+                # replacements are checked when they are picked, not only at their own refresh
+                assert not postponed & {L["fid"] for t in s.tickets for L in t}
+
+    legs = [L["fid"] for L in s.tickets[0]]
+    assert gone not in legs
+    assert focus_bets._product([L["odd"] for L in s.tickets[0]]) >= focus_bets.TARGETS[0]
+    assert set(legs) <= set(s.results) and gone not in s.results
+    saved = json.loads((tmp_path / "state" / "run_state.json").read_text())
+    assert saved["tickets"] == s.tickets
+    published = json.loads((out_dir / "2plus.json").read_text())["ticket"]["legs"]
+    assert [L["fid"] for L in published] == legs
+
+
+def test_cron_ticks_drive_the_same_timeline_from_saved_state(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    evaluate_results = importlib.import_module("evaluate_results")
+    scheduler = importlib.import_module("scheduler")
+    out_dir = tmp_path / "public"
+    out_dir.mkdir()
+    monkeypatch.setattr(focus_bets, "OUT_DIR", out_dir)
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(evaluate_results, "PUBLIC", out_dir)
+    monkeypatch.setattr(evaluate_results, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(scheduler, "SETTLE_AFTER_MIN", 120)
+
+    clock = FakeClock(datetime(2030, 9, 9, tzinfo=timezone.utc).timestamp())
+    data = mock_api.MockData(fixtures_per_day=60, seed=12)
+    data.clock = clock.now
+    state = mock_api.MockState(data, per_minute=100000)
+    jobs = []
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        monkeypatch.setattr(evaluate_results, "BASE_URL", srv.url)
+        for _ in range(2 * 36):   # every 30 minutes, each run a fresh process
+            focus_bets._reset_caches()
+            s = scheduler.Scheduler("2030-09-09", clock=clock.now, sleep=clock.sleep)
+            out = s.tick()
+            jobs.append(out["jobs"])
+            clock.t += 1800
+
+    saved = json.loads((tmp_path / "state" / "scheduler.json").read_text())
+    legs = {L["fid"] for t in saved["tickets"] for L in t}
+    assert saved["timeline"] == [] and jobs[0] == 0 and sum(jobs) > 0
+    assert legs <= {int(fid) for fid, r in saved["results"].items() if r["status"] == "FT"}
+    assert json.loads((tmp_path / "state" / "run_state.json").read_text())["tickets"] == saved["tickets"]
+    evaluation = json.loads((out_dir / "evaluation.json").read_text())
+    assert all(L["result"]["status"] == "FT" for t in evaluation["tickets"] for L in t["legs"])
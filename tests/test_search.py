@@ -0,0 +1,148 @@
+import importlib
+import itertools
+import random
+
+
+def random_pool(seed, n):
+    r = random.Random(seed)
+    countries = ["England", "Spain", "Italy", "Serbia", "Norway"]
+    return [
+        {"fid": i, "country": r.choice(countries), "odd": round(r.uniform(1.05, 1.45), 2), "prio": r.choice([1, 2])}
+        for i in range(n)
+    ]
+
+
+def brute_force_min_legs(fb, pool, target):
+    for k in range(fb.LEGS_MIN, fb.LEGS_MAX + 1):
+        for combo in itertools.combinations(pool, k):
+            ok = True
+            cur = []
+            for L in combo:
+                if not fb._diversity_ok(cur, L):
+                    ok = False
+                    break
+                cur.append(L)
+            if ok and fb._product([L["odd"] for L in combo]) >= target:
+                return k
+    return None
+
+
+def test_search_matches_brute_force_leg_count():
+    fb = importlib.import_module("focus_bets")
+    for seed in range(20):
+        pool = random_pool(seed, 12)
+        res = fb._search_ticket(pool, 2.5, set(), node_budget=0, time_budget_ms=0)
+        expected = brute_force_min_legs(fb, pool, 2.5)
+        assert res["complete"] is True
+        assert (len(res["legs"]) if res["legs"] else None) == expected
+
+
+def test_search_returns_incumbent_when_budget_runs_out():
+    fb = importlib.import_module("focus_bets")
+    pool = random_pool(99, 200)
+    for L in pool:
+        # priority legs are short prices, so the greedy incumbent is far from optimal
+        L["odd"] = round(L["odd"] - 0.3, 2) if L["prio"] == 2 and L["odd"] > 1.35 else L["odd"]
+
+    res = fb._search_ticket(pool, 2.5, set(), node_budget=5, time_budget_ms=0)
+
+    assert res["complete"] is False
+    assert res["nodes"] == 6
+    assert res["legs"]
+    assert fb._product([L["odd"] for L in res["legs"]]) >= 2.5
+    assert res["gap"] == len(res["legs"]) - res["lower_bound"]
+
+
+def test_parallel_portfolio_matches_sequential_optimum(monkeypatch):
+    fb = importlib.import_module("focus_bets")
+    pool = random_pool(5, 80)
+    seq = fb._search_ticket(pool, 3.0, set(), node_budget=0, time_budget_ms=0)
+
+    try:
+        par = fb._search_portfolio(pool, 3.0, set(), node_budget=0, time_budget_ms=0, workers=4)
+    finally:
+        fb.shutdown_solvers()
+
+    key = lambda legs: (len(legs), -sum(x["prio"] for x in legs))
+    assert par["complete"] is True
+    assert key(par["legs"]) == key(seq["legs"])
+    assert fb._product([x["odd"] for x in par["legs"]]) >= 3.0
+    cur = []
+    for L in par["legs"]:
+        assert fb._diversity_ok(cur, L)
+        cur.append(L)
+
+
+def test_portfolio_breaks_ties_the_same_way_on_every_run():
+    fb = importlib.import_module("focus_bets")
+    # every leg has the same priority: many tickets tie on (legs, priority)
+    pool = [dict(L, prio=1) for L in random_pool(11, 80)]
+    seq = fb._search_ticket(pool, 3.0, set(), node_budget=0, time_budget_ms=0)
+    try:
+        runs = [fb._search_portfolio(pool, 3.0, set(), node_budget=0, time_budget_ms=0, workers=3,
+                                     incumbent=seq["legs"] if i % 2 else None) for i in range(4)]
+        assert fb._EXECUTOR_WORKERS == len(fb._portfolio(3))
+    finally:
+        fb.shutdown_solvers()
+
+    stripes = [fb._search_ticket(pool, 3.0, set(), node_budget=0, time_budget_ms=0, stripe=(i, 2)) for i in range(2)]
+    expected = min((p["legs"] for p in stripes if p["legs"]), key=fb._tie_key)
+    assert all(r["complete"] for r in runs)
+    assert {tuple(L["fid"] for L in r["legs"]) for r in runs} == {tuple(L["fid"] for L in expected)}
+
+
+def test_probe_time_comes_out_of_the_portfolio_budget(monkeypatch):
+    fb = importlib.import_module("focus_bets")
+    monkeypatch.setattr(fb, "SOLVER_WORKERS", 4)
+    monkeypatch.setattr(fb, "PARALLEL_MIN_POOL", 1)
+    probe = {"legs": None, "nodes": 10, "elapsed_ms": 30.0, "complete": False, "lower_bound": 3, "gap": None}
+    monkeypatch.setattr(fb, "_search_ticket", lambda *a, **k: dict(probe))
+    budgets = []
+
+    def portfolio(pool, target, used, nodes, time_ms, workers, incumbent):
+        budgets.append(time_ms)
+        return {"legs": None, "nodes": 5, "elapsed_ms": time_ms, "complete": False, "lower_bound": 3, "gap": None}
+
+    monkeypatch.setattr(fb, "_search_portfolio", portfolio)
+    res = fb._solve([{}], 3.0, set(), 0, 100)
+    assert budgets == [70.0] and res["elapsed_ms"] == 100.0 and res["nodes"] == 15
+
+    probe["elapsed_ms"] = 120.0   # the probe alone used the whole budget
+    assert fb._solve([{}], 3.0, set(), 0, 100)["nodes"] == 10 and budgets == [70.0]
+
+
+def test_stop_flag_stripes_and_executor_size(monkeypatch):
+    import multiprocessing as mp
+    fb = importlib.import_module("focus_bets")
+    pool = random_pool(6, 200)
+
+    stop = mp.Value("b", 1)
+    res = fb._search_ticket(pool, 9.0, set(), node_budget=0, time_budget_ms=0, stop=stop)
+    assert res["complete"] is False and res["nodes"] == 256
+
+    # the stripes together cover the whole tree
+    full = fb._search_ticket(pool, 4.0, set(), node_budget=0, time_budget_ms=0)
+    parts = [fb._search_ticket(pool, 4.0, set(), node_budget=0, time_budget_ms=0, stripe=(i, 3)) for i in range(3)]
+    assert all(p["complete"] for p in parts)
+    assert min(fb._ticket_key(p["legs"]) for p in parts if p["legs"]) == fb._ticket_key(full["legs"])
+
+    # an easy pool is proven by the sequential probe without starting a process pool
+    monkeypatch.setattr(fb, "SOLVER_WORKERS", 4)
+    monkeypatch.setattr(fb, "PARALLEL_MIN_POOL", 10)
+    assert fb._solve(pool, 3.0, set(), 0, 0)["complete"] and fb._EXECUTOR is None
+    try:
+        first = fb._get_executor(2)
+        assert fb._get_executor(2) is first
+        assert fb._get_executor(3) is not first and fb._EXECUTOR_WORKERS == 3
+    finally:
+        fb.shutdown_solvers()
+
+
+def test_beam_search_returns_valid_ticket():
+    fb = importlib.import_module("focus_bets")
+    pool = random_pool(8, 120)
+
+    res = fb._beam_ticket(pool, 2.5, set(), width=8)
+
+    assert res["legs"] and fb.LEGS_MIN <= len(res["legs"]) <= fb.LEGS_MAX
+    assert fb._product([x["odd"] for x in res["legs"]]) >= 2.5
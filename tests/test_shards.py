@@ -0,0 +1,63 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import mock_api
+
+REPO = Path(__file__).resolve().parents[1]
+OUTPUTS = ("public/2plus.json", "public/3plus.json", "public/4plus.json", "public/daily_log.json",
+           "public/feed_snapshot.json", "state/league_stats.json")
+
+
+def test_shard_partition_is_stable_and_complete():
+    focus_bets = importlib.import_module("focus_bets")
+    fids = range(20300101000, 20300101400)
+    parts = [[f for f in fids if focus_bets.shard_of(f, 4) == i] for i in range(4)]
+    assert sorted(f for p in parts for f in p) == list(fids)
+    assert all(60 < len(p) < 140 for p in parts)
+
+
+def test_local_shard_processes_merge_to_single_node_output(tmp_path):
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=60, seed=17), per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        env = dict(os.environ)
+        env.update({"API_FOOTBALL_URL": srv.url, "DEBUG": "0", "PYTHONPATH": str(REPO)})
+        for name, args in (("single", []), ("sharded", ["--local-shards", "3"])):
+            (tmp_path / name).mkdir()
+            subprocess.run([sys.executable, str(REPO / "focus_bets.py"), "2030-10-10", *args],
+                           cwd=tmp_path / name, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    for name in OUTPUTS:
+        single = (tmp_path / "single" / name).read_bytes()
+        assert single == (tmp_path / "sharded" / name).read_bytes(), name
+    assert json.loads((tmp_path / "single" / "public" / "2plus.json").read_text())["ticket"]["legs"]
+    assert len(list((tmp_path / "sharded" / "shards" / "2030-10-10").glob("shard-*-of-3.json"))) == 3
+
+
+def test_shards_share_one_fixture_list_while_the_day_moves_on(tmp_path, monkeypatch):
+    from datetime import datetime, timezone
+    focus_bets = importlib.import_module("focus_bets")
+    monkeypatch.setattr(focus_bets, "SHARD_DIR", tmp_path / "shards")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(focus_bets, "PREFILTER", True)
+
+    now = [datetime(2030, 10, 11, tzinfo=timezone.utc).timestamp()]
+    data = mock_api.MockData(fixtures_per_day=150, seed=17)
+    data.clock = lambda: now[0]
+    state = mock_api.MockState(data, per_minute=100000)
+    with mock_api.MockServer(state) as srv:
+        monkeypatch.setattr(focus_bets, "BASE_URL", srv.url)
+        focus_bets.write_shard_fixtures("2030-10-11")
+        for i in range(2):
+            now[0] += 6 * 3600   # later runners see finished games in a fresh /fixtures
+            focus_bets.run_shard("2030-10-11", i, 2)
+        fixture_calls, odds_calls = state.hits["/fixtures"], state.hits["/odds"]
+        out = focus_bets.run_merged("2030-10-11", 2)
+
+    assert fixture_calls == 1 and odds_calls < 150   # one list for all shards, each shard prefiltered
+    assert state.hits["/fixtures"] == fixture_calls and state.hits["/odds"] == odds_calls   # merge stays offline
+    assert out["tickets_count"] > 0
@@ -0,0 +1,105 @@
+import importlib
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import mock_api
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=10) as r:
+        return json.loads(r.read())
+
+
+def test_service_answers_custom_specs_from_warm_pool(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    ticket_service = importlib.import_module("ticket_service")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=80, seed=8), per_minute=100000)
+    with mock_api.MockServer(state) as api:
+        monkeypatch.setattr(focus_bets, "BASE_URL", api.url)
+        service = ticket_service.TicketService("2030-07-07", all_fixtures=True)
+        service.refresh()
+    odds_calls = state.hits["/odds"]
+
+    httpd = ticket_service.make_server(service)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    try:
+        first = get(f"{base}/ticket?target=3.0&markets=BTTS&legs_max=4")
+        legs = first["ticket"]["legs"]
+        assert legs and len(legs) <= 4
+        assert {L["market"] for L in legs} == {"BTTS"}
+        assert first["ticket"]["total_odds"] >= 3.0
+        assert first["cached"] is False
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get(f"{base}/ticket?target=3.0&markets=BTTS&legs_max=4")))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert all(r["cached"] and r["ticket"] == first["ticket"] for r in results)
+
+        with pytest.raises(urllib.error.HTTPError) as e:
+            get(f"{base}/ticket?markets=Corners")
+        assert e.value.code == 400
+        assert get(f"{base}/health")["hits"] == 8
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert state.hits["/odds"] == odds_calls   # requests never touch the API
+
+
+def test_snapshot_keeps_its_own_fair_pools_and_one_budget_per_request(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    ticket_service = importlib.import_module("ticket_service")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+    monkeypatch.setattr(focus_bets, "ODDS_CONSENSUS", "fair")
+    focus_bets._ODDS_CACHE[-1] = {"sentinel": {}}
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=80, seed=8), per_minute=100000)
+    with mock_api.MockServer(state) as api:
+        monkeypatch.setattr(focus_bets, "BASE_URL", api.url)
+        service = ticket_service.TicketService("2030-07-07", all_fixtures=True, node_budget=40, time_budget_ms=0)
+        service.refresh()
+    assert focus_bets._ODDS_CACHE.pop(-1) == {"sentinel": {}}   # the morning caches are not wiped
+
+    snap = service.snapshot
+    pool = snap.pool(0, None, 0.0)
+    assert pool and all(L["fair_odd"] > 1.0 for L in pool)
+    assert snap._pools[(0, None)][0][0][1] is pool[0]   # built once, only filtered per request
+
+    out = service.ticket({"target": "50", "legs_min": "2", "legs_max": "8"}, now_ts=0.0)
+    assert out["search"]["nodes"] <= 40
+
+
+def test_reload_reuses_unchanged_odds_and_cache_drops_started_tickets(tmp_path, monkeypatch):
+    focus_bets = importlib.import_module("focus_bets")
+    ticket_service = importlib.import_module("ticket_service")
+    monkeypatch.setattr(focus_bets, "OUT_DIR", tmp_path / "public")
+
+    state = mock_api.MockState(mock_api.MockData(fixtures_per_day=80, seed=8), per_minute=100000)
+    with mock_api.MockServer(state) as api:
+        monkeypatch.setattr(focus_bets, "BASE_URL", api.url)
+        service = ticket_service.TicketService("2030-07-07", all_fixtures=True)
+        service.refresh()
+        first = state.hits["/odds"]
+        service.refresh()   # nothing changed and nothing kicks off soon
+        assert state.hits["/odds"] == first and service.snapshot.refetched == 0
+        monkeypatch.setattr(ticket_service, "SERVICE_REFETCH_MIN", 10 ** 7)
+        service.refresh()   # everything is "about to kick off"
+        assert service.snapshot.refetched == len(service.snapshot.odds) > 0
+
+    spec = {"target": "3.0", "markets": "BTTS"}
+    out = service.ticket(spec, now_ts=0.0)
+    assert service.ticket(spec, now_ts=0.0)["cached"] is True
+    start = min(service.snapshot.kickoff[L["fid"]] for L in out["ticket"]["legs"])
+    again = service.ticket(spec, now_ts=start)
+    assert again["cached"] is False
+    assert all(service.snapshot.kickoff[L["fid"]] > start for L in again["ticket"]["legs"])
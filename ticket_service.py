@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""On-demand ticket builder over a warm, in-memory candidate pool.
+
+    python ticket_service.py --port 8088 --refresh 900
+    curl 'http://127.0.0.1:8088/ticket?target=5.0&markets=BTTS&legs_max=4'
+
+The day's fixtures and parsed odds (fair prices too, see ODDS_CONSENSUS) are loaded
+once into a snapshot of their own and reloaded every --refresh seconds in a
+background thread; a reload re-reads /odds only for fixtures whose status or
+kickoff changed and for those kicking off within SERVICE_REFETCH_MIN. Requests
+only read the current snapshot. A spec is target,
+markets ("BTTS" or "BTTS:Yes", comma separated), legs_min, legs_max. Answers come
+from the same relax loop and branch & bound as the morning run, with one small
+search budget per request, and are kept in an LRU keyed by (snapshot version,
+spec) and dropped once one of their legs kicks off. Fixtures that have kicked
+off drop out of every pool.
+"""
+from __future__ import annotations
+import os, sys, json, time, argparse, threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import focus_bets as fb
+
+SERVICE_NODE_BUDGET = int(os.getenv("SERVICE_NODE_BUDGET", "20000"))
+SERVICE_TIME_BUDGET_MS = float(os.getenv("SERVICE_TIME_BUDGET_MS", "25"))
+SERVICE_CACHE_SIZE = int(os.getenv("SERVICE_CACHE_SIZE", "512"))
+SERVICE_REFRESH_S = float(os.getenv("SERVICE_REFRESH_S", "900"))
+SERVICE_REFETCH_MIN = float(os.getenv("SERVICE_REFETCH_MIN", "120"))
+MAX_TARGET = 1000.0
+
+
+class SpecError(ValueError):
+    pass
+
+
+def parse_spec(params: Dict[str, Any]) -> Tuple[float, Optional[frozenset], int, int]:
+    """(target, allowed pairs or None, legs_min, legs_max) from query/body params."""
+    try:
+        target = float(params.get("target", fb.TARGETS[0]))
+        legs_min = int(params.get("legs_min", fb.LEGS_MIN))
+        legs_max = int(params.get("legs_max", fb.LEGS_MAX))
+    except (TypeError, ValueError) as e:
+        raise SpecError(str(e))
+    if not 1.0 < target <= MAX_TARGET:
+        raise SpecError(f"target must be in (1, {MAX_TARGET:g}]")
+    if not 1 <= legs_min <= legs_max <= fb.LEGS_MAX * 2:
+        raise SpecError("need 1 <= legs_min <= legs_max")
+
+    markets = params.get("markets") or ""
+    if isinstance(markets, str):
+        markets = [m for m in markets.split(",") if m.strip()]
+    allowed = None
+    if markets:
+        allowed = set()
+        for m in markets:
+            mkt, _, pick = str(m).strip().partition(":")
+            pairs = [k for k in fb.BASE_TH if k[0] == mkt and (not pick or k[1] == pick)]
+            if not pairs:
+                raise SpecError(f"unknown market {m!r}")
+            allowed.update(pairs)
+        allowed = frozenset(allowed)
+    return round(target, 2), allowed, legs_min, legs_max
+
+
+class Snapshot:
+    """One load of the day with its own parsed odds; the focus_bets caches are left alone.
+
+    Pools are built once per (relax step, allowed pairs) and only filtered by
+    kickoff per request. With `prev` (the snapshot being replaced, same date) the
+    odds of fixtures that did not change and are not about to kick off are reused.
+    """
+
+    def __init__(self, date_str: str, all_fixtures: bool = False, prev: Optional["Snapshot"] = None):
+        self.date = date_str
+        self.loaded_at = time.time()
+        fixtures = []
+        for f in fb._get("/fixtures", {"date": date_str}).get("response") or []:
+            lg = f.get("league", {}) or {}
+            if fb._status(f) in fb.SKIP_STATUS or not (all_fixtures or lg.get("id") in fb.ALLOW_LIST):
+                continue
+            fixtures.append(f)
+        # fid -> (status, kickoff ts, best odds, fair odds), what the next reload diffs against
+        self.odds: Dict[int, Tuple[str, float, Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]] = {}
+        known = prev.odds if prev is not None and prev.date == date_str else {}
+        soon = self.loaded_at + SERVICE_REFETCH_MIN * 60
+        seen = {int(f["fixture"]["id"]): (fb._status(f), fb._kickoff_ts(f)) for f in fixtures}
+        stale = []
+        for fid, now_seen in seen.items():
+            old = known.get(fid)
+            if old is not None and old[:2] == now_seen and now_seen[1] > soon:
+                self.odds[fid] = old
+            else:
+                stale.append(fid)
+        for fid, (_, best, fair) in fb.load_odds(stale).items():
+            self.odds[fid] = (*seen[fid], best, fair)
+        self.refetched = len(stale)
+        # (kickoff ts, in allow list, leg base, best odds, fair odds)
+        self.rows: List[Tuple[float, bool, Dict[str, Any], Dict[str, Dict[str, float]], Dict[str, Dict[str, float]]]] = []
+        self.kickoff: Dict[int, float] = {}
+        for f in fixtures:
+            fid = int(f["fixture"]["id"])
+            _, kickoff, best, fair = self.odds[fid]
+            self.kickoff[fid] = kickoff
+            if best:
+                lg = f.get("league", {}) or {}
+                self.rows.append((kickoff, lg.get("id") in fb.ALLOW_LIST, fb._leg_base(f), best, fair))
+        self._lock = threading.Lock()   # pools fill lazily from request threads
+        self._pools: Dict[Any, Tuple[List[Tuple[float, Dict[str, Any]]], List[Tuple[float, Dict[str, Any]]]]] = {}
+        # the morning tickets' market sets are the common specs: build their pools before serving
+        for allowed, _, _ in fb._ticket_configs():
+            for step in range(fb.RELAX_STEPS + 1):
+                self.pool(step, None if allowed is None else frozenset(allowed), 0.0)
+
+    def _legs(self, caps: Dict[Tuple[str, str], float], allowed: Optional[frozenset], allow_only: bool) -> List[Tuple[float, Dict[str, Any]]]:
+        out = []
+        for kickoff, in_allow, base, best, fair in self.rows:
+            if allow_only and not in_allow:
+                continue
+            leg = fb._make_leg(base, best, fair, caps, allowed)
+            if leg:
+                out.append((kickoff, leg))
+        out.sort(key=lambda x: (x[1]["prio"], x[1]["odd"]), reverse=True)
+        return out
+
+    def pool(self, step: int, allowed: Optional[frozenset], now_ts: float) -> List[Dict[str, Any]]:
+        # same pick and widening rule as _pool_for_ticket; caps are BASE_TH relaxed `step` times
+        key = (step, allowed)
+        with self._lock:
+            if key not in self._pools:
+                caps = {k: v + step * fb.RELAX_ADD for k, v in fb.BASE_TH.items()}
+                self._pools[key] = (self._legs(caps, allowed, True), self._legs(caps, allowed, False))
+            allow, every = self._pools[key]
+        out = [leg for kickoff, leg in allow if kickoff > now_ts]
+        return out if len(out) >= fb.POOL_MIN_LEGS else [leg for kickoff, leg in every if kickoff > now_ts]
+
+
+class TicketService:
+    def __init__(self, date_str: Optional[str] = None, all_fixtures: bool = False,
+                 cache_size: int = SERVICE_CACHE_SIZE, node_budget: int = SERVICE_NODE_BUDGET,
+                 time_budget_ms: float = SERVICE_TIME_BUDGET_MS):
+        self.fixed_date = date_str
+        self.all_fixtures = all_fixtures
+        self.cache_size = cache_size
+        self.node_budget = node_budget
+        self.time_budget_ms = time_budget_ms
+        self.version = 0
+        self.snapshot: Optional[Snapshot] = None
+        self._cache: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.stats = {"requests": 0, "hits": 0}
+
+    def refresh(self) -> None:
+        date_str = self.fixed_date or datetime.now(fb.TZ).strftime("%Y-%m-%d")
+        with self._refresh_lock:   # one loader at a time
+            snap = Snapshot(date_str, self.all_fixtures, self.snapshot)
+        with self._lock:
+            self.snapshot = snap
+            self.version += 1
+            self._cache.clear()
+        fb._log(f"▶ ticket service snapshot v{self.version} date={date_str} fixtures={len(snap.rows)} "
+                f"odds refetched={snap.refetched}")
+
+    def start_refresher(self, interval_s: float) -> threading.Thread:
+        def loop():
+            while not self._stop.wait(interval_s):
+                try:
+                    self.refresh()
+                except Exception as e:   # keep serving the previous snapshot
+                    fb._log(f"⚠️ ticket service refresh failed: {e}")
+        t = threading.Thread(target=loop, daemon=True)
+        t.start()
+        return t
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def ticket(self, params: Dict[str, Any], now_ts: Optional[float] = None) -> Dict[str, Any]:
+        spec = parse_spec(params)
+        now_ts = time.time() + fb.KICKOFF_MARGIN_MIN * 60 if now_ts is None else now_ts
+        with self._lock:
+            snap, version = self.snapshot, self.version
+            self.stats["requests"] += 1
+            key = (version, spec)
+            hit = self._cache.get(key)
+            if hit is not None and hit[1] > now_ts:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return {**hit[0], "cached": True}
+        if snap is None:
+            raise RuntimeError("no snapshot loaded")
+
+        target, allowed, legs_min, legs_max = spec
+        t0 = time.perf_counter()
+        # one node and time budget for the whole request, shared by the relax steps
+        # (0 = unlimited, as in _search_ticket)
+        deadline = t0 + self.time_budget_ms / 1000.0
+        nodes = 0
+        res: Dict[str, Any] = {"legs": None}
+        for step in range(fb.RELAX_STEPS + 1):
+            left_ms = (deadline - time.perf_counter()) * 1000.0 if self.time_budget_ms > 0 else 0
+            left_nodes = self.node_budget - nodes if self.node_budget > 0 else 0
+            if (self.time_budget_ms > 0 and left_ms <= 0) or (self.node_budget > 0 and left_nodes <= 0):
+                break
+            res = fb._search_ticket(snap.pool(step, allowed, now_ts), target, set(), left_nodes,
+                                    left_ms, legs_min=legs_min, legs_max=legs_max)
+            nodes += res["nodes"]
+            if res["legs"]:
+                break
+        res["nodes"] = nodes
+        legs = res["legs"] or []
+        out = {
+            "date": snap.date,
+            "version": version,
+            "spec": {"target": target, "markets": sorted(f"{m}:{p}" for m, p in allowed) if allowed else None,
+                     "legs_min": legs_min, "legs_max": legs_max},
+            "ticket": fb._ticket_json(legs) if legs else {"total_odds": 0, "legs": []},
+            "search": {k: res.get(k) for k in ("nodes", "complete", "gap")},
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+        }
+        # valid until its first leg kicks off (an empty answer until the pools change)
+        horizon = min((snap.kickoff.get(L["fid"], 0.0) for L in legs), default=float("inf"))
+        with self._lock:
+            if self.version == version:
+                self._cache[key] = (out, horizon)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return {**out, "cached": False}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: TicketService
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code: int, body: Dict[str, Any]) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _answer(self, path: str, params: Dict[str, Any]) -> None:
+        if path == "/health":
+            snap = self.service.snapshot
+            self._send(200, {"version": self.service.version, "date": snap.date if snap else None,
+                             "fixtures": len(snap.rows) if snap else 0, **self.service.stats})
+            return
+        if path != "/ticket":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            self._send(200, self.service.ticket(params))
+        except SpecError as e:
+            self._send(400, {"error": str(e)})
+        except RuntimeError as e:
+            self._send(503, {"error": str(e)})
+
+    def do_GET(self):
+        u = urlparse(self.path)
+        self._answer(u.path, {k: v[-1] for k, v in parse_qs(u.query).items()})
+
+    def do_POST(self):
+        u = urlparse(self.path)
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            params = json.loads(self.rfile.read(n) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "invalid JSON body"})
+            return
+        self._answer(u.path, params if isinstance(params, dict) else {})
+
+
+def make_server(service: TicketService, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"service": service})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    httpd.daemon_threads = True
+    return httpd
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8088")))
+    ap.add_argument("--date", default=None, help="serve a fixed date (default: today, follows the clock)")
+    ap.add_argument("--refresh", type=float, default=SERVICE_REFRESH_S, help="seconds between pool reloads")
+    ap.add_argument("--all", action="store_true", help="load every fixture, not just ALLOW_LIST")
+    a = ap.parse_args(argv)
+
+    service = TicketService(a.date, a.all)
+    service.refresh()
+    service.start_refresher(a.refresh)
+    httpd = make_server(service, a.host, a.port)
+    print(f"ticket service on http://{a.host}:{httpd.server_address[1]}", file=sys.stderr, flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()